@@ -18,15 +18,19 @@ Storage: backend/data/master_overrides.json
 """
 from __future__ import annotations
 
-import json
-from datetime import datetime
+import threading
+from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any, Optional
 
-from fastapi import APIRouter, HTTPException
+import orjson
+from fastapi import APIRouter, HTTPException, Request, Response
 from loguru import logger
 from pydantic import BaseModel, field_validator
 
+from app.core.cache import response_cache
+from app.core.storage import atomic_write_bytes
+
 master_override_router = APIRouter(prefix="/api/master-overrides", tags=["master-overrides"])
 
 # ── Storage ───────────────────────────────────────────────────────────────────
@@ -37,24 +41,47 @@ _OVERRIDES_FILE = _DATA_DIR / "master_overrides.json"
 _OVERRIDES_FILE.parent.mkdir(parents=True, exist_ok=True)
 
 
+# Parsed overrides keyed on the file's st_mtime_ns. Repeated loads while the
+# file is untouched return the same dict object — callers must copy before
+# mutating (see the write routes below).
+_cache: tuple[int, dict[str, dict]] | None = None
+
+# Serialises load → merge → save in the write routes. Sync routes run on the
+# threadpool, so two concurrent POSTs would otherwise drop one update.
+_write_lock = threading.Lock()
+
+
 def _load() -> dict[str, dict]:
-    if not _OVERRIDES_FILE.exists():
+    global _cache
+    try:
+        mtime_ns = _OVERRIDES_FILE.stat().st_mtime_ns
+    except FileNotFoundError:
         return {}
+    if _cache is not None and _cache[0] == mtime_ns:
+        return _cache[1]
     try:
-        return json.loads(_OVERRIDES_FILE.read_text(encoding="utf-8"))
+        data = orjson.loads(_OVERRIDES_FILE.read_bytes())
     except Exception as exc:
         logger.error(f"master_overrides: failed to load {_OVERRIDES_FILE}: {exc}")
         return {}
+    _cache = (mtime_ns, data)
+    return data
 
 
 def _save(data: dict) -> None:
+    """Write via a temp file + os.replace so readers never see a partial file."""
+    global _cache
     try:
-        _OVERRIDES_FILE.write_text(
-            json.dumps(data, indent=2, ensure_ascii=False), encoding="utf-8"
+        atomic_write_bytes(
+            _OVERRIDES_FILE,
+            orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS),
         )
     except Exception as exc:
         logger.error(f"master_overrides: failed to save {_OVERRIDES_FILE}: {exc}")
         raise
+    _cache = (_OVERRIDES_FILE.stat().st_mtime_ns, data)
+    # Order items embed overrides — drop cached /api/order responses.
+    response_cache.clear("order")
 
 
 # ── Pydantic schemas ──────────────────────────────────────────────────────────
@@ -124,12 +151,27 @@ def apply_overrides(
 # ── Routes ────────────────────────────────────────────────────────────────────
 
 
-@master_override_router.get("/")
-def list_overrides() -> list[MasterOverrideOut]:
-    """List all item master overrides."""
+def _etag() -> str:
+    """Weak validator derived from the overrides file's mtime."""
+    try:
+        mtime_ns = _OVERRIDES_FILE.stat().st_mtime_ns
+    except FileNotFoundError:
+        mtime_ns = 0
+    return f'W/"{mtime_ns}"'
+
+
+@master_override_router.get("/", response_model=list[MasterOverrideOut])
+def list_overrides(request: Request, response: Response):
+    """List all item master overrides. Honours If-None-Match with a 304."""
+    etag = _etag()
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in (t.strip() for t in if_none_match.split(",")):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
     data = _load()
+    # Stored entries were validated by MasterOverrideIn when written.
     return [
-        MasterOverrideOut(item_name=name, **{k: v for k, v in ov.items()})
+        MasterOverrideOut.model_construct(item_name=name, **ov)
         for name, ov in data.items()
     ]
 
@@ -145,18 +187,18 @@ def get_override(item_name: str) -> MasterOverrideOut:
 @master_override_router.post("/{item_name}")
 def set_override(item_name: str, body: MasterOverrideIn) -> MasterOverrideOut:
     """Save / update an override for an item. Only non-None fields are stored."""
-    data = _load()
-    existing = data.get(item_name, {})
-
     # Merge: only update fields that are explicitly provided
     update = body.model_dump(exclude_none=True)
     if not update:
         raise HTTPException(status_code=422, detail="No fields to update")
 
-    merged = {**existing, **update}
-    merged["last_modified"] = datetime.utcnow().isoformat()
-    data[item_name] = merged
-    _save(data)
+    with _write_lock:
+        data = dict(_load())
+        existing = data.get(item_name, {})
+        merged = {**existing, **update}
+        merged["last_modified"] = datetime.now(timezone.utc).isoformat()
+        data[item_name] = merged
+        _save(data)
 
     logger.info(f"master_overrides: saved override for '{item_name}': {update}")
     return MasterOverrideOut(item_name=item_name, **{k: v for k, v in merged.items()})
@@ -165,11 +207,12 @@ def set_override(item_name: str, body: MasterOverrideIn) -> MasterOverrideOut:
 @master_override_router.delete("/{item_name}")
 def delete_override(item_name: str) -> dict:
     """Remove all overrides for an item."""
-    data = _load()
-    if item_name not in data:
-        raise HTTPException(status_code=404, detail=f"No override found for '{item_name}'")
-    del data[item_name]
-    _save(data)
+    with _write_lock:
+        data = dict(_load())
+        if item_name not in data:
+            raise HTTPException(status_code=404, detail=f"No override found for '{item_name}'")
+        del data[item_name]
+        _save(data)
     logger.info(f"master_overrides: deleted override for '{item_name}'")
     return {"status": "deleted", "item_name": item_name}
 
@@ -177,8 +220,8 @@ def delete_override(item_name: str) -> dict:
 @master_override_router.delete("/")
 def clear_all_overrides() -> dict:
     """Remove ALL overrides. Use with caution."""
-    data = _load()
-    count = len(data)
-    _save({})
+    with _write_lock:
+        count = len(_load())
+        _save({})
     logger.warning(f"master_overrides: cleared all {count} overrides")
     return {"status": "cleared", "count": count}
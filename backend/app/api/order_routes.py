@@ -8,30 +8,62 @@ Endpoints:
   GET  /api/order/items/{name}/history  – monthly history for one item
   POST /api/order/export          – generate OrderList.xlsx download
   GET  /api/order/compliance      – basic GST compliance check on vouchers
+
+/groups and /items are served from app.core.cache.response_cache; any code
+that changes vouchers, masters or overrides clears the "order" namespace.
 """
 from __future__ import annotations
 
+import asyncio
 import io
 import math
-from datetime import date, datetime, timedelta
+from collections import OrderedDict
+from collections.abc import Mapping
+from datetime import date, datetime, timedelta, timezone
+from types import MappingProxyType
 from typing import Any, Optional
 
 from dateutil.relativedelta import relativedelta
 from fastapi import APIRouter, Depends, HTTPException, Query
-from fastapi.responses import StreamingResponse
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from loguru import logger
 from pydantic import BaseModel
+from sqlalchemy import Date, bindparam
 from sqlmodel import Session, col, func, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
+from app.core.cache import bump_data_version, data_version, response_cache
 from app.core.config import settings
-from app.core.database import get_session
+from app.core.database import get_async_session, get_session
 from app.etl.mkcp_importer import import_mkcp
 from app.models.master import StockItem
 from app.models.order import AlternateUnit, ItemGroupMapping, VendorGroup
-from app.models.transaction import Voucher, VoucherLine
+from app.models.transaction import VOUCHER_TYPE_UPPER, Voucher, VoucherLine
 from app.api.master_override_routes import get_all_overrides
 
-order_router = APIRouter(prefix="/api/order", tags=["order"])
+order_router = APIRouter(
+    prefix="/api/order", tags=["order"], default_response_class=ORJSONResponse
+)
+
+# Response-cache namespace and TTLs (seconds). Entries are dropped on import
+# and on master-override edits, so the TTL only bounds staleness from writers
+# that bypass those paths.
+_CACHE_NS = "order"
+_GROUPS_TTL = 300
+_ITEMS_TTL = 60
+
+# Rows fetched per round-trip by the compliance check.
+_COMPLIANCE_BATCH = 200
+
+# Voucher aggregates keyed on (data_version(), ...). They only change when
+# an import bumps the version, so they outlive the response-cache TTL and are
+# shared by every months_cover / group combination.
+_AGG_CACHE_MAX = 32
+_agg_cache: OrderedDict[tuple, Any] = OrderedDict()
+
+# Shared read-only stand-in for items without a master override, so a miss
+# does not allocate a fresh dict per item.
+_NO_OVERRIDE: Mapping[str, Any] = MappingProxyType({})
 
 # ── Pydantic schemas ──────────────────────────────────────────────────────────
 
@@ -89,7 +121,65 @@ def _get_mkcp_dir() -> str:
     return getattr(settings, "MKCP_DATA_DIR", r"C:/Users/kanis/Desktop/MKCP")
 
 
-def _compute_closing_maps(session: Session) -> tuple[dict, dict, dict]:
+# Aggregation statements are built once at import time; per-request values
+# are supplied as bound parameters so each call only executes them.
+# SQLAlchemy's compiled cache (query_cache_size, default 500) then reuses the
+# compiled SQL for every execution.
+
+_INWARD_TOTALS_STMT = (
+    select(VoucherLine.stock_item_name, func.sum(VoucherLine.quantity), func.max(VoucherLine.unit))
+    .join(Voucher, VoucherLine.voucher_id == Voucher.id)
+    .where(
+        VOUCHER_TYPE_UPPER == "PURCHASE",
+        Voucher.is_cancelled == False,  # noqa: E712
+        VoucherLine.stock_item_name.isnot(None),
+    )
+    .group_by(VoucherLine.stock_item_name)
+)
+
+_OUTWARD_TOTALS_STMT = (
+    select(VoucherLine.stock_item_name, func.sum(VoucherLine.quantity))
+    .join(Voucher, VoucherLine.voucher_id == Voucher.id)
+    .where(
+        VOUCHER_TYPE_UPPER == "SALES",
+        Voucher.is_cancelled == False,  # noqa: E712
+        VoucherLine.stock_item_name.isnot(None),
+    )
+    .group_by(VoucherLine.stock_item_name)
+)
+
+_RECENT_OUTWARD_STMT = (
+    select(VoucherLine.stock_item_name, func.sum(VoucherLine.quantity))
+    .join(Voucher, VoucherLine.voucher_id == Voucher.id)
+    .where(
+        VOUCHER_TYPE_UPPER == "SALES",
+        Voucher.is_cancelled == False,  # noqa: E712
+        Voucher.voucher_date >= bindparam("cutoff", type_=Date),
+        VoucherLine.stock_item_name.isnot(None),
+    )
+    .group_by(VoucherLine.stock_item_name)
+)
+
+_ALL_ITEM_NAMES_STMT = select(StockItem.name).union(
+    select(VoucherLine.stock_item_name).where(VoucherLine.stock_item_name.isnot(None))
+)
+
+_hist_month = func.strftime("%Y-%m", Voucher.voucher_date)
+_ITEM_HISTORY_STMT = (
+    select(_hist_month, VOUCHER_TYPE_UPPER, func.sum(VoucherLine.quantity))
+    .join(Voucher, VoucherLine.voucher_id == Voucher.id)
+    .where(
+        VoucherLine.stock_item_name == bindparam("item_name"),
+        VOUCHER_TYPE_UPPER.in_(["PURCHASE", "SALES"]),
+        Voucher.is_cancelled == False,  # noqa: E712
+        Voucher.voucher_date >= bindparam("start_date", type_=Date),
+        Voucher.voucher_date <= bindparam("range_end", type_=Date),
+    )
+    .group_by(_hist_month, VOUCHER_TYPE_UPPER)
+)
+
+
+async def _compute_closing_maps(session: AsyncSession) -> tuple[dict, dict, dict]:
     """
     Returns three maps over ALL voucher history:
       inward_map:  {item_name → total_purchase_qty}
@@ -97,65 +187,49 @@ def _compute_closing_maps(session: Session) -> tuple[dict, dict, dict]:
       unit_map:    {item_name → unit_str}
     """
     # Total purchases per item
-    inward_stmt = (
-        select(VoucherLine.stock_item_name, func.sum(VoucherLine.quantity), func.max(VoucherLine.unit))
-        .join(Voucher, VoucherLine.voucher_id == Voucher.id)
-        .where(
-            func.upper(Voucher.voucher_type) == "PURCHASE",
-            Voucher.is_cancelled == False,  # noqa: E712
-            VoucherLine.stock_item_name.isnot(None),
-        )
-        .group_by(VoucherLine.stock_item_name)
-    )
     inward_map: dict[str, float] = {}
     unit_map: dict[str, str] = {}
-    for name, qty, unit in session.exec(inward_stmt).all():
+    for name, qty, unit in (await session.exec(_INWARD_TOTALS_STMT)).all():
         if name:
             inward_map[name] = float(qty or 0)
             if unit:
                 unit_map[name] = unit
 
     # Total sales per item
-    outward_stmt = (
-        select(VoucherLine.stock_item_name, func.sum(VoucherLine.quantity))
-        .join(Voucher, VoucherLine.voucher_id == Voucher.id)
-        .where(
-            func.upper(Voucher.voucher_type) == "SALES",
-            Voucher.is_cancelled == False,  # noqa: E712
-            VoucherLine.stock_item_name.isnot(None),
-        )
-        .group_by(VoucherLine.stock_item_name)
-    )
     outward_map: dict[str, float] = {
         name: float(qty or 0)
-        for name, qty in session.exec(outward_stmt).all()
+        for name, qty in (await session.exec(_OUTWARD_TOTALS_STMT)).all()
         if name
     }
 
     return inward_map, outward_map, unit_map
 
 
-def _compute_avg_outward_map(session: Session, lookback_months: int = 6) -> dict[str, float]:
+async def _compute_avg_outward_map(session: AsyncSession, lookback_months: int = 6) -> dict[str, float]:
     """Avg monthly outward (sales qty) per item over last N months."""
-    cutoff = datetime.utcnow().date() - relativedelta(months=lookback_months)
-    stmt = (
-        select(VoucherLine.stock_item_name, func.sum(VoucherLine.quantity))
-        .join(Voucher, VoucherLine.voucher_id == Voucher.id)
-        .where(
-            func.upper(Voucher.voucher_type) == "SALES",
-            Voucher.is_cancelled == False,  # noqa: E712
-            Voucher.voucher_date >= cutoff,
-            VoucherLine.stock_item_name.isnot(None),
-        )
-        .group_by(VoucherLine.stock_item_name)
-    )
+    cutoff = datetime.now(timezone.utc).date() - relativedelta(months=lookback_months)
+    rows = (await session.exec(_RECENT_OUTWARD_STMT, params={"cutoff": cutoff})).all()
     return {
         name: float(qty or 0) / max(lookback_months, 1)
-        for name, qty in session.exec(stmt).all()
+        for name, qty in rows
         if name
     }
 
 
+async def _cached_aggregate(key: tuple, compute):
+    """Return _agg_cache[key], computing it with ``await compute()`` on a miss."""
+    full_key = (data_version(), *key)
+    value = _agg_cache.get(full_key)
+    if value is None:
+        value = await compute()
+        _agg_cache[full_key] = value
+        while len(_agg_cache) > _AGG_CACHE_MAX:
+            _agg_cache.popitem(last=False)
+    else:
+        _agg_cache.move_to_end(full_key)
+    return value
+
+
 # ── Routes ────────────────────────────────────────────────────────────────────
 
 
@@ -165,6 +239,7 @@ def trigger_mkcp_import(session: Session = Depends(get_session)) -> dict:
     data_dir = _get_mkcp_dir()
     try:
         counts = import_mkcp(data_dir, session)
+        bump_data_version()
         logger.info(f"MKCP import complete: {counts}")
         return {"status": "ok", "data_dir": data_dir, "counts": counts}
     except Exception as exc:
@@ -173,18 +248,25 @@ def trigger_mkcp_import(session: Session = Depends(get_session)) -> dict:
 
 
 @order_router.get("/groups", response_model=list[VendorGroupRead])
-def list_groups(session: Session = Depends(get_session)):
+async def list_groups(session: AsyncSession = Depends(get_async_session)):
     """Return all vendor/stock groups."""
-    rows = session.exec(select(VendorGroup).order_by(VendorGroup.name)).all()
-    return [VendorGroupRead(name=r.name, parent=r.parent, base_unit=r.base_unit) for r in rows]
+    key = (_CACHE_NS, "groups")
+    cached = response_cache.get(key)
+    if cached is not None:
+        return cached
+
+    rows = (await session.exec(select(VendorGroup).order_by(VendorGroup.name))).all()
+    result = [VendorGroupRead(name=r.name, parent=r.parent, base_unit=r.base_unit) for r in rows]
+    response_cache.set(key, result, expire=_GROUPS_TTL)
+    return result
 
 
 @order_router.get("/items", response_model=list[OrderItemRead])
-def list_order_items(
+async def list_order_items(
     months_cover: int = Query(default=2, ge=1, le=12, description="Months of cover for reorder suggestion"),
     lookback: int = Query(default=6, ge=1, le=24, description="Months to average outward for suggestion"),
     group: Optional[str] = Query(default=None, description="Filter by vendor group name"),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
 ):
     """
     Return all stock items enriched with:
@@ -194,149 +276,160 @@ def list_order_items(
     - avg monthly outward (last N months)
     - reorder suggestion (in PKG and base units)
     """
+    key = (_CACHE_NS, "items", months_cover, lookback, group)
+    cached = response_cache.get(key)
+    if cached is not None:
+        return ORJSONResponse(cached)
+
     # Build lookup dicts
-    inward_map, outward_map, unit_map = _compute_closing_maps(session)
-    avg_map = _compute_avg_outward_map(session, lookback)
+    # The lookback window moves with the calendar, so today is part of its key
+    today = datetime.now(timezone.utc).date()
+    inward_map, outward_map, unit_map = await _cached_aggregate(
+        ("closing",), lambda: _compute_closing_maps(session)
+    )
+    avg_map = await _cached_aggregate(
+        ("avg_outward", lookback, today), lambda: _compute_avg_outward_map(session, lookback)
+    )
 
     # Opening balances
-    opening_map: dict[str, float] = {
-        si.name: si.opening_balance
-        for si in session.exec(select(StockItem)).all()
-    }
+    opening_map: dict[str, float] = dict(
+        (await session.exec(select(StockItem.name, StockItem.opening_balance))).all()
+    )
 
     # AlternateUnit factors
-    au_map: dict[str, AlternateUnit] = {
-        au.item_name: au
-        for au in session.exec(select(AlternateUnit)).all()
-    }
+    au_map: dict[str, Optional[float]] = dict(
+        (await session.exec(select(AlternateUnit.item_name, AlternateUnit.pkg_factor))).all()
+    )
 
     # Group mappings
     gm_map: dict[str, str] = {
-        igm.item_name: igm.group_name
-        for igm in session.exec(select(ItemGroupMapping)).all()
-        if igm.group_name
-    }
-
-    # All item names (union of StockItem master + VoucherLine names)
-    names_from_master = {si.name for si in session.exec(select(StockItem)).all()}
-    names_from_lines = {
-        r
-        for r in session.exec(
-            select(VoucherLine.stock_item_name)
-            .distinct()
-            .where(VoucherLine.stock_item_name.isnot(None))
+        item_name: group_name
+        for item_name, group_name in (
+            await session.exec(select(ItemGroupMapping.item_name, ItemGroupMapping.group_name))
         ).all()
+        if group_name
     }
-    all_names = sorted(names_from_master | names_from_lines)
+
+    # All item names (union of StockItem master + VoucherLine names), deduped in SQL
+    all_names = sorted(
+        name for (name,) in (await session.exec(_ALL_ITEM_NAMES_STMT)).all() if name
+    )
 
     # Master overrides (user-editable, always take precedence)
     master_overrides = get_all_overrides()
 
-    results: list[OrderItemRead] = []
-    for name in all_names:
-        item_group = gm_map.get(name)
-        item_ov = master_overrides.get(name, {})
+    # One record per item so the main loop does a single lookup instead of
+    # probing every map separately.
+    records: dict[str, dict[str, Any]] = {
+        name: {
+            "opening": opening_map.get(name, 0.0),
+            "inward": inward_map.get(name, 0.0),
+            "outward": outward_map.get(name, 0.0),
+            "avg": avg_map.get(name, 0.0),
+            "au": au_map.get(name),
+            "group": gm_map.get(name),
+            "unit": unit_map.get(name, "PCS"),
+            "ov": master_overrides.get(name) or _NO_OVERRIDE,
+        }
+        for name in all_names
+    }
 
-        # Apply group override
-        if item_ov.get("group"):
-            item_group = item_ov["group"]
+    # Items without a mapped group are reported as "Togo Cycles", so that
+    # filter value also matches unmapped items.
+    match_unmapped = group == "Togo Cycles"
 
-        if group and item_group != group and (group != "Togo Cycles" or item_group is not None):
+    results: list[OrderItemRead] = []
+    for name, rec in records.items():
+        item_group = rec["group"]
+        factor: Optional[float] = rec["au"]
+        base_unit = rec["unit"]
+
+        # Apply overrides (most items have none, so skip the lookups)
+        item_ov = rec["ov"]
+        if item_ov:
+            if item_ov.get("group"):
+                item_group = item_ov["group"]
+            if item_ov.get("pkg_factor") is not None:
+                factor = item_ov["pkg_factor"]
+            base_unit = item_ov.get("base_unit") or base_unit
+
+        if group and item_group != group and (not match_unmapped or item_group is not None):
             continue
 
-        opening = opening_map.get(name, 0.0)
-        closing_base = opening + inward_map.get(name, 0.0) - outward_map.get(name, 0.0)
-
-        au = au_map.get(name)
-        factor: Optional[float] = au.pkg_factor if au else None
-
-        # Apply pkg_factor override
-        if item_ov.get("pkg_factor") is not None:
-            factor = item_ov["pkg_factor"]
+        closing_base = rec["opening"] + rec["inward"] - rec["outward"]
+        avg_outward = rec["avg"]
+        sugg_base = max(0.0, avg_outward * months_cover - closing_base)
 
         closing_pkg: Optional[float] = None
         suggestion_pkg: Optional[float] = None
         if factor and factor > 0:
             closing_pkg = round(closing_base / factor, 2)
+            suggestion_pkg = float(math.ceil(sugg_base / factor))
 
-        avg_outward = avg_map.get(name, 0.0)
-        target_base = avg_outward * months_cover
-        sugg_base = max(0.0, target_base - closing_base)
-
-        if factor and factor > 0:
-            suggestion_pkg = math.ceil(sugg_base / factor)
-
-        # Apply base_unit override
-        base_unit = item_ov.get("base_unit") or unit_map.get(name, "PCS")
-
+        # Values are computed here and already of the declared types, so
+        # skip per-row validation.
         results.append(
-            OrderItemRead(
+            OrderItemRead.model_construct(
                 name=name,
                 group=item_group or "Togo Cycles",
                 base_unit=base_unit,
                 pkg_factor=factor,
                 current_closing_base=round(closing_base, 3),
-                current_closing_pkg=round(closing_pkg, 2) if closing_pkg is not None else None,
+                current_closing_pkg=closing_pkg,
                 suggestion_pkg=suggestion_pkg,
                 suggestion_base=round(sugg_base, 3),
                 avg_monthly_outward=round(avg_outward, 3),
             )
         )
 
-    return results
+    # Rows are built locally from known-good values; hand plain dicts straight
+    # to orjson instead of re-validating them against response_model.
+    content = [r.model_dump() for r in results]
+    response_cache.set(key, content, expire=_ITEMS_TTL)
+    return ORJSONResponse(content)
 
 
 @order_router.get("/items/{item_name}/history", response_model=list[OrderMonthlyRow])
-def item_history(
+async def item_history(
     item_name: str,
     months: int = Query(default=12, ge=1, le=24),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
 ):
     """Monthly Opening / Inward / Outward / Closing for a single item."""
-    si = session.exec(select(StockItem).where(StockItem.name == item_name)).first()
+    si = (await session.exec(select(StockItem).where(StockItem.name == item_name))).first()
     opening_balance = si.opening_balance if si else 0.0
 
-    today = datetime.utcnow().date()
+    today = datetime.now(timezone.utc).date()
     start_date = (today - relativedelta(months=months)).replace(day=1)
+    range_end = (today.replace(day=1) + relativedelta(months=1)) - timedelta(days=1)
+
+    # One grouped query for the whole window instead of two per month
+    hist_rows = (
+        await session.exec(
+            _ITEM_HISTORY_STMT,
+            params={"item_name": item_name, "start_date": start_date, "range_end": range_end},
+        )
+    ).all()
+    qty_map: dict[tuple[str, str], float] = {
+        (month, vt): float(qty or 0.0)
+        for month, vt, qty in hist_rows
+    }
+
     current_month = start_date
     running = opening_balance
     rows: list[OrderMonthlyRow] = []
 
     while current_month <= today:
-        month_end = (current_month + relativedelta(months=1)) - timedelta(days=1)
-
-        inward_row = session.exec(
-            select(func.sum(VoucherLine.quantity))
-            .join(Voucher, VoucherLine.voucher_id == Voucher.id)
-            .where(
-                VoucherLine.stock_item_name == item_name,
-                func.upper(Voucher.voucher_type) == "PURCHASE",
-                Voucher.is_cancelled == False,  # noqa: E712
-                Voucher.voucher_date >= current_month,
-                Voucher.voucher_date <= month_end,
-            )
-        ).first()
-        inward = float(inward_row or 0.0)
-
-        outward_row = session.exec(
-            select(func.sum(VoucherLine.quantity))
-            .join(Voucher, VoucherLine.voucher_id == Voucher.id)
-            .where(
-                VoucherLine.stock_item_name == item_name,
-                func.upper(Voucher.voucher_type) == "SALES",
-                Voucher.is_cancelled == False,  # noqa: E712
-                Voucher.voucher_date >= current_month,
-                Voucher.voucher_date <= month_end,
-            )
-        ).first()
-        outward = float(outward_row or 0.0)
+        month = current_month.strftime("%Y-%m")
+        inward = qty_map.get((month, "PURCHASE"), 0.0)
+        outward = qty_map.get((month, "SALES"), 0.0)
 
         opening_this = running
         running = running + inward - outward
 
         rows.append(
             OrderMonthlyRow(
-                month=current_month.strftime("%Y-%m"),
+                month=month,
                 opening=round(opening_this, 3),
                 inward=round(inward, 3),
                 outward=round(outward, 3),
@@ -348,27 +441,22 @@ def item_history(
     return rows
 
 
-@order_router.post("/export")
-def export_order_excel(
-    rows: list[OrderExportRow],
-    session: Session = Depends(get_session),
-):
-    """
-    Generate an OrderList.xlsx from the provided order rows.
-    Returns the file as a streaming download.
-    """
+def _build_xlsx(rows: list[OrderExportRow]) -> bytes:
+    """Render the OrderList workbook (order sheet + by-vendor sheet) to bytes."""
     try:
         import openpyxl
+        from openpyxl.cell import WriteOnlyCell
         from openpyxl.styles import Alignment, Font, PatternFill
         from openpyxl.utils import get_column_letter
     except ImportError:
         raise HTTPException(status_code=500, detail="openpyxl not installed")
 
-    wb = openpyxl.Workbook()
+    # Write-only mode streams rows out as they are appended instead of
+    # keeping a Cell object per value for the whole sheet.
+    wb = openpyxl.Workbook(write_only=True)
 
     # ── Sheet 1: Order List ───────────────────────────────────────────────────
-    ws = wb.active
-    ws.title = "OrderList"
+    ws = wb.create_sheet("OrderList")
 
     header_fill = PatternFill(start_color="1F3864", end_color="1F3864", fill_type="solid")
     header_font = Font(bold=True, color="FFFFFF", size=10)
@@ -379,16 +467,10 @@ def export_order_excel(
         "Item Name", "Group / Vendor", "Order Qty (PKG)", "Order Qty (PCS)",
         "UoM", "Current Stock", "Suggested (PKG)", "Remarks",
     ]
-    for col_idx, h in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=col_idx, value=h)
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = center
-
     highlight_fill = PatternFill(start_color="E2EFDA", end_color="E2EFDA", fill_type="solid")
 
-    for row_idx, r in enumerate(rows, 2):
-        data = [
+    data_rows = [
+        [
             r.item_name,
             r.group or "",
             round(r.qty_pkg, 2),
@@ -398,121 +480,166 @@ def export_order_excel(
             round(r.suggestion_pkg, 2) if r.suggestion_pkg is not None else "",
             r.remarks,
         ]
-        for col_idx, val in enumerate(data, 1):
-            cell = ws.cell(row=row_idx, column=col_idx, value=val)
+        for r in rows
+    ]
+
+    # Auto column widths — write-only sheets need dimensions before any row
+    max_len = [len(h) for h in headers]
+    for data in data_rows:
+        for i, val in enumerate(data):
+            max_len[i] = max(max_len[i], len(str(val or "")))
+    for col_idx, width in enumerate(max_len, 1):
+        ws.column_dimensions[get_column_letter(col_idx)].width = min(width + 4, 45)
+
+    header_cells = []
+    for h in headers:
+        cell = WriteOnlyCell(ws, value=h)
+        cell.font = header_font
+        cell.fill = header_fill
+        cell.alignment = center
+        header_cells.append(cell)
+    ws.append(header_cells)
+
+    for r, data in zip(rows, data_rows):
+        out = []
+        for val in data:
+            cell = WriteOnlyCell(ws, value=val)
             cell.font = row_font
             if r.qty_pkg > 0:
                 cell.fill = highlight_fill
-
-    # Auto column widths
-    for col_idx in range(1, len(headers) + 1):
-        col_letter = get_column_letter(col_idx)
-        max_len = max(
-            len(str(ws.cell(row=r, column=col_idx).value or ""))
-            for r in range(1, len(rows) + 2)
-        )
-        ws.column_dimensions[col_letter].width = min(max_len + 4, 45)
+            out.append(cell)
+        ws.append(out)
 
     # ── Sheet 2: By Vendor ────────────────────────────────────────────────────
     ws2 = wb.create_sheet("By Vendor")
-    ws2.cell(row=1, column=1, value="Group / Vendor").font = header_font
-    ws2.cell(row=1, column=1).fill = header_fill
-    ws2.cell(row=1, column=2, value="Item Name").font = header_font
-    ws2.cell(row=1, column=2).fill = header_fill
-    ws2.cell(row=1, column=3, value="Order Qty (PKG)").font = header_font
-    ws2.cell(row=1, column=3).fill = header_fill
+    for col_idx, width in [(1, 25), (2, 45), (3, 15)]:
+        ws2.column_dimensions[get_column_letter(col_idx)].width = width
+
+    header_cells = []
+    for h in ("Group / Vendor", "Item Name", "Order Qty (PKG)"):
+        cell = WriteOnlyCell(ws2, value=h)
+        cell.font = header_font
+        cell.fill = header_fill
+        header_cells.append(cell)
+    ws2.append(header_cells)
 
     # Group and sort
     from itertools import groupby
 
     sorted_rows = sorted(rows, key=lambda r: (r.group or "~", r.item_name))
-    row_idx = 2
     for group_name, group_rows in groupby(sorted_rows, key=lambda r: r.group or "Togo Cycles"):
-        group_list = list(group_rows)
-        for r in group_list:
+        for r in group_rows:
             if r.qty_pkg > 0:
-                ws2.cell(row=row_idx, column=1, value=group_name)
-                ws2.cell(row=row_idx, column=2, value=r.item_name)
-                ws2.cell(row=row_idx, column=3, value=round(r.qty_pkg, 2))
-                row_idx += 1
+                ws2.append([group_name, r.item_name, round(r.qty_pkg, 2)])
 
-    for col_idx, width in [(1, 25), (2, 45), (3, 15)]:
-        ws2.column_dimensions[get_column_letter(col_idx)].width = width
-
-    # Stream to client
     buf = io.BytesIO()
     wb.save(buf)
-    buf.seek(0)
+    return buf.getvalue()
+
+
+@order_router.post("/export")
+async def export_order_excel(rows: list[OrderExportRow]):
+    """
+    Generate an OrderList.xlsx from the provided order rows.
+    Returns the file as a streaming download.
+    """
+    # Building and zipping the workbook is CPU-bound; keep it off the event loop.
+    data = await asyncio.to_thread(_build_xlsx, rows)
 
     return StreamingResponse(
-        buf,
+        io.BytesIO(data),
         media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
         headers={"Content-Disposition": "attachment; filename=OrderList.xlsx"},
     )
 
 
 @order_router.get("/compliance", response_model=list[ComplianceIssue])
-def gst_compliance_check(
+async def gst_compliance_check(
     limit: int = Query(default=200, ge=1, le=2000),
     voucher_type: Optional[str] = Query(default=None),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
 ):
     """
     Basic GST compliance check on Sales/Purchase vouchers.
     Flags: missing invoice number, missing party, zero amount, missing HSN.
     """
-    stmt = select(Voucher).where(Voucher.is_cancelled == False)  # noqa: E712
+    stmt = select(
+        Voucher.id,
+        Voucher.voucher_number,
+        Voucher.voucher_type,
+        Voucher.voucher_date,
+        Voucher.party_name,
+        Voucher.amount,
+    ).where(Voucher.is_cancelled == False)  # noqa: E712
     if voucher_type:
-        stmt = stmt.where(func.upper(Voucher.voucher_type) == voucher_type.upper())
+        stmt = stmt.where(VOUCHER_TYPE_UPPER == voucher_type.upper())
     else:
         stmt = stmt.where(
-            func.upper(Voucher.voucher_type).in_(["SALES", "PURCHASE"])
+            VOUCHER_TYPE_UPPER.in_(["SALES", "PURCHASE"])
         )
-    stmt = stmt.order_by(col(Voucher.voucher_date).desc()).limit(limit)
+    stmt = (
+        stmt.order_by(col(Voucher.voucher_date).desc())
+        .limit(limit)
+        .execution_options(yield_per=_COMPLIANCE_BATCH)
+    )
 
     issues: list[ComplianceIssue] = []
-    for v in session.exec(stmt).all():
-        v_issues: list[str] = []
-
-        if not (v.voucher_number or "").strip():
-            v_issues.append("Missing invoice number")
-        if not (v.party_name or "").strip():
-            v_issues.append("Missing party name")
-        if not v.amount or v.amount <= 0:
-            v_issues.append("Zero or negative amount")
-
-        # Check HSN on at least one item line
-        lines = session.exec(
-            select(VoucherLine)
-            .where(
-                VoucherLine.voucher_id == v.id,
-                VoucherLine.stock_item_name.isnot(None),
+    # Stream vouchers in batches; each batch prefetches its inventory lines
+    # and the subset of those items that carry an HSN code in the master.
+    result = await session.stream(stmt)
+    async for batch in result.partitions():
+        items_by_voucher: dict[int, set[str]] = {}
+        line_rows = (
+            await session.exec(
+                select(VoucherLine.voucher_id, VoucherLine.stock_item_name).where(
+                    col(VoucherLine.voucher_id).in_([v.id for v in batch]),
+                    VoucherLine.stock_item_name.isnot(None),
+                )
             )
-            .limit(5)
         ).all()
-        if lines:
-            # Lookup HSN from StockItem master
-            has_hsn = False
-            for line in lines:
-                si = session.exec(
-                    select(StockItem).where(StockItem.name == line.stock_item_name)
-                ).first()
-                if si and si.hsn_code:
-                    has_hsn = True
-                    break
-            if not has_hsn:
+        for vid, item_name in line_rows:
+            items_by_voucher.setdefault(vid, set()).add(item_name)
+
+        batch_item_names = set().union(*items_by_voucher.values())
+        hsn_items: set[str] = set()
+        if batch_item_names:
+            hsn_items = set(
+                (
+                    await session.exec(
+                        select(StockItem.name).where(
+                            col(StockItem.name).in_(batch_item_names),
+                            StockItem.hsn_code.isnot(None),
+                            StockItem.hsn_code != "",
+                        )
+                    )
+                ).all()
+            )
+
+        for v in batch:
+            v_issues: list[str] = []
+
+            if not (v.voucher_number or "").strip():
+                v_issues.append("Missing invoice number")
+            if not (v.party_name or "").strip():
+                v_issues.append("Missing party name")
+            if not v.amount or v.amount <= 0:
+                v_issues.append("Zero or negative amount")
+
+            # Check HSN (from the StockItem master) on at least one item line
+            line_items = items_by_voucher.get(v.id)
+            if line_items and not (line_items & hsn_items):
                 v_issues.append("No HSN code on inventory lines")
 
-        if v_issues:
-            issues.append(
-                ComplianceIssue(
-                    voucher_id=v.id,
-                    voucher_number=v.voucher_number or "",
-                    voucher_type=v.voucher_type,
-                    voucher_date=str(v.voucher_date),
-                    party_name=v.party_name,
-                    issues=v_issues,
+            if v_issues:
+                issues.append(
+                    ComplianceIssue(
+                        voucher_id=v.id,
+                        voucher_number=v.voucher_number or "",
+                        voucher_type=v.voucher_type,
+                        voucher_date=str(v.voucher_date),
+                        party_name=v.party_name,
+                        issues=v_issues,
+                    )
                 )
-            )
 
     return issues
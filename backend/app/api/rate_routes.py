@@ -2,9 +2,9 @@
 Item Rate Override API.
 
 Stores pkg_rate (rate per package) and unit_rate (rate per piece) per item
-in a local JSON file.  These overrides ALWAYS take precedence over Tally XML-
-derived rates so the business owner can correct/update prices without touching
-the original Tally data.
+in a local SQLite database.  These overrides ALWAYS take precedence over
+Tally XML-derived rates so the business owner can correct/update prices
+without touching the original Tally data.
 
 Endpoints:
   GET    /api/rates                 – list all saved overrides
@@ -13,30 +13,95 @@ Endpoints:
   DELETE /api/rates/{item_name}     – remove override (revert to Tally rate)
   GET    /api/rates/log/changes     – audit log of rate changes
 
-Data files (created automatically on first use):
-  backend/data/item_rate_overrides.json
-  backend/data/rate_change_log.json
+Data file (created automatically on first use):
+  backend/data/rates.sqlite   (WAL mode; tables "overrides" and "changelog")
+
+Saves update the in-memory overrides immediately and are committed by a
+background flusher in batches every _FLUSH_INTERVAL seconds (and at exit), so
+a burst of POSTs costs one transaction. A crash can lose at most that last
+window of changes.
+
+The earlier JSON stores (item_rate_overrides.json, rate_change_log.jsonl /
+rate_change_log.json) are imported into the database once and then removed.
 """
 from __future__ import annotations
 
-import json
+import asyncio
+import atexit
+import functools
+import math
+import mmap
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Optional
+from typing import Iterable, Optional
 
-from fastapi import APIRouter, HTTPException
+import orjson
+from fastapi import APIRouter, Depends, HTTPException
+from loguru import logger
 from pydantic import BaseModel
 
 rate_router = APIRouter(prefix="/api/rates", tags=["rates"])
 
 # ── File paths (relative to this file → backend/data/) ────────────────────────
 _DATA_DIR = Path(__file__).resolve().parent.parent.parent / "data"
+_DB_FILE = _DATA_DIR / "rates.sqlite"
+# Pre-SQLite stores; migrated into _DB_FILE on first use
 _OVERRIDES_FILE = _DATA_DIR / "item_rate_overrides.json"
-_CHANGELOG_FILE = _DATA_DIR / "rate_change_log.json"
+_CHANGELOG_FILE = _DATA_DIR / "rate_change_log.jsonl"
+_LEGACY_CHANGELOG_FILE = _DATA_DIR / "rate_change_log.json"
+
+# Entries kept by the rolling changelog window
+_CHANGELOG_MAX = 1000
+
+# Seconds the flusher waits after the first queued change, so a burst of
+# saves lands in one transaction; and the queue length that forces an
+# immediate flush from the saving thread
+_FLUSH_INTERVAL = 0.1
+_FLUSH_MAX_PENDING = 1000
 
 # Warn when a single save changes a rate by more than this fraction
 _CHANGE_THRESHOLD = 0.30   # 30 %
 
+_UTC = timezone.utc
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS overrides (
+    item          TEXT PRIMARY KEY,
+    pkg_rate      REAL,
+    unit_rate     REAL,
+    last_modified TEXT
+);
+CREATE TABLE IF NOT EXISTS changelog (
+    id        INTEGER PRIMARY KEY,
+    item      TEXT NOT NULL,
+    field     TEXT NOT NULL,
+    old_value REAL,
+    new_value REAL NOT NULL,
+    timestamp TEXT NOT NULL
+);
+"""
+
+_LOG_COLUMNS = ("item", "field", "old_value", "new_value", "timestamp")
+
+_UPSERT_OVERRIDE_SQL = (
+    "INSERT INTO overrides (item, pkg_rate, unit_rate, last_modified) VALUES (?, ?, ?, ?) "
+    "ON CONFLICT(item) DO UPDATE SET pkg_rate = excluded.pkg_rate, "
+    "unit_rate = excluded.unit_rate, last_modified = excluded.last_modified"
+)
+_INSERT_LOG_SQL = (
+    "INSERT INTO changelog (item, field, old_value, new_value, timestamp) "
+    "VALUES (:item, :field, :old_value, :new_value, :timestamp)"
+)
+# Rolling window — ids only grow, so everything below the newest
+# _CHANGELOG_MAX ids is dropped
+_TRIM_LOG_SQL = "DELETE FROM changelog WHERE id <= (SELECT MAX(id) FROM changelog) - ?"
+
 
 # ── Pydantic schemas ──────────────────────────────────────────────────────────
 
@@ -63,56 +128,300 @@ class ChangeLogEntry(BaseModel):
     timestamp: str
 
 
-# ── Low-level JSON helpers ────────────────────────────────────────────────────
+# ── Low-level storage helpers ─────────────────────────────────────────────────
+
 
+@dataclass(slots=True, frozen=True)
+class _Entry:
+    """One stored override (a row of the overrides table)."""
+    pkg_rate: Optional[float] = None
+    unit_rate: Optional[float] = None
+    last_modified: Optional[str] = None
+
+
+_NO_ENTRY = _Entry()
+
+
+# Shared connection, opened lazily by _db(). sqlite3 connections are not safe
+# for concurrent use, so every access happens under _cache_lock.
+_conn: Optional[sqlite3.Connection] = None
+
+# All overrides, loaded from the database and then kept in step with our own
+# writes. "version" is the PRAGMA data_version the dict was read at; it only
+# changes when another connection commits, which forces a re-read.
+# "data" is replaced (never mutated) on every change — callers may hold on to
+# it as a snapshot.
+# "table" is the same data as parallel columns sorted by item name, for
+# listing (see _OverrideTable), built lazily; point lookups use the dict.
+# "epoch" increments whenever "data" is replaced, keying the resolver caches.
+_CACHE: dict = {"version": None, "data": {}, "table": None, "epoch": 0}
+_cache_lock = threading.Lock()
+
+# Serialises read → merge → write in the write routes, which run
+# concurrently on the threadpool.
+_write_lock = threading.Lock()
+
+# Changes accepted into _CACHE but not yet committed: item → entry (None for
+# a delete), plus changelog rows in order. Guarded by _cache_lock; the
+# flusher thread waits on _dirty_cv for them.
+_pending: dict[str, Optional[_Entry]] = {}
+_pending_log: list[dict] = []
+_dirty_cv = threading.Condition(_cache_lock)
+_flusher: Optional[threading.Thread] = None
+
+
+class _OverrideTable:
+    """
+    Overrides as parallel columns ordered by item name. Missing rates are NaN
+    in the float arrays so they can be stored unboxed.
+    """
 
-def _load_overrides() -> dict:
-    """Load the overrides dict from disk, returning {} if file absent."""
+    __slots__ = ("names", "pkg", "unit", "modified")
+
+    def __init__(self, data: dict[str, _Entry]) -> None:
+        self.names: list[str] = sorted(data)
+        entries = [data[n] for n in self.names]
+        self.pkg = array("d", [_nan_if_none(e.pkg_rate) for e in entries])
+        self.unit = array("d", [_nan_if_none(e.unit_rate) for e in entries])
+        self.modified: list[Optional[str]] = [e.last_modified for e in entries]
+
+    def rows(self):
+        """Yield (name, pkg_rate, unit_rate, last_modified) with NaN → None."""
+        for name, pkg, unit, mod in zip(self.names, self.pkg, self.unit, self.modified):
+            yield name, _none_if_nan(pkg), _none_if_nan(unit), mod
+
+
+def _nan_if_none(v: Optional[float]) -> float:
+    return math.nan if v is None else float(v)
+
+
+def _none_if_nan(v: float) -> Optional[float]:
+    return None if v != v else v
+
+
+def _db() -> sqlite3.Connection:
+    """Return the shared connection, creating the database on first use."""
+    global _conn
+    if _conn is None:
+        _DATA_DIR.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(_DB_FILE, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        _migrate_legacy_json(conn)
+        _conn = conn
+    return _conn
+
+
+def _read_json_mapped(path: Path):
+    """
+    Parse a JSON file straight from a read-only memory map, so a large file is
+    not first copied into a bytes object.
+    """
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return None
+        with mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ) as mm:
+            view = memoryview(mm)
+            try:
+                return orjson.loads(view)
+            finally:
+                view.release()
+
+
+def _migrate_legacy_json(conn: sqlite3.Connection) -> None:
+    """Import the pre-SQLite JSON overrides and changelog (one-time)."""
+    sources = [p for p in (_OVERRIDES_FILE, _LEGACY_CHANGELOG_FILE, _CHANGELOG_FILE) if p.exists()]
+    if not sources:
+        return
+    overrides: dict = {}
     if _OVERRIDES_FILE.exists():
-        with open(_OVERRIDES_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return {}
+        overrides = _read_json_mapped(_OVERRIDES_FILE) or {}
+    log: list[dict] = []
+    if _LEGACY_CHANGELOG_FILE.exists():     # single JSON array, oldest first
+        log.extend(_read_json_mapped(_LEGACY_CHANGELOG_FILE) or [])
+    if _CHANGELOG_FILE.exists():            # JSON lines, appended after the array
+        log.extend(orjson.loads(ln) for ln in _CHANGELOG_FILE.read_bytes().splitlines() if ln.strip())
+    with conn:
+        conn.executemany(
+            _UPSERT_OVERRIDE_SQL,
+            [
+                (name, e.get("pkg_rate"), e.get("unit_rate"), e.get("last_modified"))
+                for name, e in overrides.items()
+            ],
+        )
+        conn.executemany(_INSERT_LOG_SQL, log[-_CHANGELOG_MAX:])
+    for path in sources:
+        path.unlink()
+
 
+def _refresh() -> None:
+    """Re-read the overrides if another connection changed them. Hold _cache_lock."""
+    conn = _db()
+    version = conn.execute("PRAGMA data_version").fetchone()[0]
+    if _CACHE["version"] == version:
+        return
+    rows = conn.execute("SELECT item, pkg_rate, unit_rate, last_modified FROM overrides")
+    data = {item: _Entry(pkg, unit, mod) for item, pkg, unit, mod in rows}
+    # Queued changes are newer than anything on disk
+    _apply(data, _pending)
+    _CACHE.update(version=version, data=data, table=None, epoch=_CACHE["epoch"] + 1)
 
-def _save_overrides(data: dict) -> None:
-    """Persist the overrides dict to disk, creating the data dir if needed."""
-    _DATA_DIR.mkdir(parents=True, exist_ok=True)
-    with open(_OVERRIDES_FILE, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
 
+def _apply(data: dict[str, _Entry], changes: dict[str, Optional[_Entry]]) -> None:
+    for name, entry in changes.items():
+        if entry is None:
+            data.pop(name, None)
+        else:
+            data[name] = entry
 
-def _load_changelog() -> list:
-    if _CHANGELOG_FILE.exists():
-        with open(_CHANGELOG_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return []
 
+def _load_overrides_sorted() -> tuple[dict[str, _Entry], _OverrideTable]:
+    """Return (overrides, sorted column table)."""
+    with _cache_lock:
+        _refresh()
+        if _CACHE["table"] is None:
+            _CACHE["table"] = _OverrideTable(_CACHE["data"])
+        return _CACHE["data"], _CACHE["table"]
 
-def _append_changelog(entries: list[dict]) -> None:
-    _DATA_DIR.mkdir(parents=True, exist_ok=True)
-    log = _load_changelog()
-    log.extend(entries)
-    # Rolling window — keep only the most recent 1 000 entries
-    if len(log) > 1000:
-        log = log[-1000:]
-    with open(_CHANGELOG_FILE, "w", encoding="utf-8") as f:
-        json.dump(log, f, indent=2, ensure_ascii=False)
+
+def _load_overrides() -> dict[str, _Entry]:
+    """Return the overrides dict ({} if none are saved)."""
+    with _cache_lock:
+        _refresh()
+        return _CACHE["data"]
+
+
+def _write_override(item_name: str, entry: Optional[_Entry], log: Optional[list[dict]] = None) -> None:
+    """
+    Record one override (a delete when *entry* is None) plus its changelog
+    rows: the cache is updated at once, the database by the flusher.
+    """
+    global _flusher
+    with _cache_lock:
+        _pending[item_name] = entry
+        if log:
+            _pending_log.extend(log)
+        data = dict(_CACHE["data"])
+        _apply(data, {item_name: entry})
+        _CACHE.update(data=data, table=None, epoch=_CACHE["epoch"] + 1)
+        backlog = len(_pending) + len(_pending_log)
+        if _flusher is None:
+            _flusher = threading.Thread(target=_flush_loop, name="rate-flusher", daemon=True)
+            _flusher.start()
+        _dirty_cv.notify()
+    if backlog >= _FLUSH_MAX_PENDING:
+        _flush_now()
+
+
+def _flush_now() -> None:
+    """Commit all queued override rows and changelog entries in one transaction."""
+    with _cache_lock:
+        if not _pending and not _pending_log:
+            return
+        conn = _db()
+        with conn:
+            for name, entry in _pending.items():
+                if entry is None:
+                    conn.execute("DELETE FROM overrides WHERE item = ?", (name,))
+                else:
+                    conn.execute(
+                        _UPSERT_OVERRIDE_SQL,
+                        (name, entry.pkg_rate, entry.unit_rate, entry.last_modified),
+                    )
+            if _pending_log:
+                conn.executemany(_INSERT_LOG_SQL, _pending_log)
+                conn.execute(_TRIM_LOG_SQL, (_CHANGELOG_MAX,))
+        _pending.clear()
+        _pending_log.clear()
+
+
+def _flush_loop() -> None:
+    """Flusher thread: after each change, wait out the burst, then commit it."""
+    while True:
+        with _dirty_cv:
+            while not _pending and not _pending_log:
+                _dirty_cv.wait()
+        time.sleep(_FLUSH_INTERVAL)
+        try:
+            _flush_now()
+        except Exception as exc:
+            # Changes stay queued and are retried on the next pass
+            logger.error(f"rates: failed to flush overrides to {_DB_FILE}: {exc}")
+
+
+atexit.register(_flush_now)
+
+
+def _tail_changelog(limit: int) -> list[dict]:
+    """Return the newest *limit* changelog entries, newest first."""
+    limit = min(limit, _CHANGELOG_MAX)
+    if limit <= 0:
+        return []
+    _flush_now()
+    with _cache_lock:
+        rows = _db().execute(
+            "SELECT item, field, old_value, new_value, timestamp FROM changelog "
+            "ORDER BY id DESC LIMIT ?",
+            (limit,),
+        ).fetchall()
+    return [dict(zip(_LOG_COLUMNS, row)) for row in rows]
 
 
 # ── Public helper: called by other route modules ──────────────────────────────
 
 
+def _current_epoch() -> int:
+    """Revalidate the overrides cache against the database and return its epoch."""
+    _load_overrides()
+    return _CACHE["epoch"]
+
+
+# Resolved rates per (item, tally rate, epoch). A save or external change bumps
+# the epoch, so stale results are simply never asked for again and age out.
+@functools.lru_cache(maxsize=4096)
+def _resolve_unit_rate(item_name: str, tally_rate: Optional[float], epoch: int) -> Optional[float]:
+    entry = _CACHE["data"].get(item_name)
+    if entry and entry.unit_rate is not None:
+        return float(entry.unit_rate)
+    return tally_rate
+
+
+@functools.lru_cache(maxsize=4096)
+def _resolve_pkg_rate(item_name: str, tally_pkg_rate: Optional[float], epoch: int) -> Optional[float]:
+    entry = _CACHE["data"].get(item_name)
+    if entry and entry.pkg_rate is not None:
+        return float(entry.pkg_rate)
+    return tally_pkg_rate
+
+
 def get_effective_rate(item_name: str, tally_rate: Optional[float] = None) -> Optional[float]:
     """
     Return the effective unit_rate for an item.
     Override (if saved) always wins over the tally_rate argument.
     Use this single function everywhere — never hard-code rate lookups.
     """
+    return _resolve_unit_rate(item_name, tally_rate, _current_epoch())
+
+
+def get_effective_rates(
+    pairs: Iterable[tuple[str, Optional[float]]],
+) -> list[Optional[float]]:
+    """
+    Batch form of get_effective_rate for (item_name, tally_rate) pairs.
+    Loads the overrides once for the whole batch — use it when resolving
+    rates for many lines in one request.
+    """
     overrides = _load_overrides()
-    entry = overrides.get(item_name)
-    if entry and entry.get("unit_rate") is not None:
-        return float(entry["unit_rate"])
-    return tally_rate
+    out: list[Optional[float]] = []
+    for name, tally_rate in pairs:
+        entry = overrides.get(name)
+        if entry and entry.unit_rate is not None:
+            out.append(float(entry.unit_rate))
+        else:
+            out.append(tally_rate)
+    return out
 
 
 def get_effective_pkg_rate(item_name: str, tally_pkg_rate: Optional[float] = None) -> Optional[float]:
@@ -120,55 +429,133 @@ def get_effective_pkg_rate(item_name: str, tally_pkg_rate: Optional[float] = Non
     Return the effective pkg_rate for an item.
     Override (if saved) always wins over the tally_pkg_rate argument.
     """
-    overrides = _load_overrides()
-    entry = overrides.get(item_name)
-    if entry and entry.get("pkg_rate") is not None:
-        return float(entry["pkg_rate"])
-    return tally_pkg_rate
+    return _resolve_pkg_rate(item_name, tally_pkg_rate, _current_epoch())
+
+
+async def get_overrides_snapshot() -> tuple[dict[str, _Entry], _OverrideTable]:
+    """
+    FastAPI dependency: (overrides, sorted column table) loaded once per request.
+    Read-only — write routes reload under _write_lock instead.
+    """
+    return await asyncio.to_thread(_load_overrides_sorted)
+
+
+# ── Blocking write paths (run via asyncio.to_thread) ─────────────────────────
+
+
+def _store_rate_override(item_name: str, body: RateOverrideIn) -> RateOverrideRead:
+    """Merge *body* into the stored override and log the change (blocking I/O)."""
+    with _write_lock:
+        old_entry = _load_overrides().get(item_name, _NO_ENTRY)
+        # One timestamp per request, shared by the changelog entries and the
+        # stored override; second precision is plenty for an audit trail.
+        now_iso = datetime.now(_UTC).isoformat(timespec="seconds")
+
+        warnings: list[str] = []
+        changelog_entries: list[dict] = []
+
+        for field, new_val in [("pkg_rate", body.pkg_rate), ("unit_rate", body.unit_rate)]:
+            if new_val is None:
+                continue
+            old_val: Optional[float] = getattr(old_entry, field)
+
+            # Threshold check — compare against threshold * old so the common
+            # "no warning" case needs no division
+            if old_val and old_val > 0:
+                delta = abs(new_val - old_val)
+                if delta > _CHANGE_THRESHOLD * old_val:
+                    warnings.append(
+                        f"{field} changed by {delta / old_val * 100:.1f}% "
+                        f"(threshold is {_CHANGE_THRESHOLD * 100:.0f}%)"
+                    )
+
+            changelog_entries.append(
+                {
+                    "item": item_name,
+                    "field": field,
+                    "old_value": old_val,
+                    "new_value": new_val,
+                    "timestamp": now_iso,
+                }
+            )
+
+        # Merge with existing entry so a partial update doesn't erase the other field
+        new_entry = _Entry(
+            pkg_rate=body.pkg_rate if body.pkg_rate is not None else old_entry.pkg_rate,
+            unit_rate=body.unit_rate if body.unit_rate is not None else old_entry.unit_rate,
+            last_modified=now_iso,
+        )
+        _write_override(item_name, new_entry, changelog_entries)
+
+    return RateOverrideRead(
+        item_name=item_name,
+        pkg_rate=new_entry.pkg_rate,
+        unit_rate=new_entry.unit_rate,
+        last_modified=now_iso,
+        warnings=warnings,
+    )
+
+
+def _remove_rate_override(item_name: str) -> None:
+    """Delete the stored override for *item_name*; 404 if there is none."""
+    with _write_lock:
+        if item_name not in _load_overrides():
+            raise HTTPException(
+                status_code=404,
+                detail=f"No override found for '{item_name}'",
+            )
+        _write_override(item_name, None)
 
 
 # ── Endpoints ─────────────────────────────────────────────────────────────────
 
 
 @rate_router.get("/log/changes", response_model=list[ChangeLogEntry])
-def get_change_log(limit: int = 100):
+async def get_change_log(limit: int = 100):
     """Return the most recent rate-change audit log entries (newest first)."""
-    log = _load_changelog()
-    return list(reversed(log))[:limit]
+    return await asyncio.to_thread(_tail_changelog, limit)
 
 
 @rate_router.get("/", response_model=list[RateOverrideRead])
-def list_rate_overrides():
+async def list_rate_overrides(
+    snapshot: tuple[dict[str, _Entry], _OverrideTable] = Depends(get_overrides_snapshot),
+):
     """Return all items that have a saved rate override."""
-    overrides = _load_overrides()
+    _, table = snapshot
+    # Stored entries were validated on save; build the models without re-validating
     return [
-        RateOverrideRead(
+        RateOverrideRead.model_construct(
             item_name=name,
-            pkg_rate=entry.get("pkg_rate"),
-            unit_rate=entry.get("unit_rate"),
-            last_modified=entry.get("last_modified"),
+            pkg_rate=pkg,
+            unit_rate=unit,
+            last_modified=mod,
+            warnings=[],
         )
-        for name, entry in sorted(overrides.items())
+        for name, pkg, unit, mod in table.rows()
     ]
 
 
 @rate_router.get("/{item_name}", response_model=RateOverrideRead)
-def get_rate_override(item_name: str):
+async def get_rate_override(
+    item_name: str,
+    snapshot: tuple[dict[str, _Entry], _OverrideTable] = Depends(get_overrides_snapshot),
+):
     """Return the rate override for a specific item (empty if none saved)."""
-    overrides = _load_overrides()
+    overrides, _ = snapshot
     entry = overrides.get(item_name)
     if not entry:
         return RateOverrideRead(item_name=item_name)
-    return RateOverrideRead(
+    return RateOverrideRead.model_construct(
         item_name=item_name,
-        pkg_rate=entry.get("pkg_rate"),
-        unit_rate=entry.get("unit_rate"),
-        last_modified=entry.get("last_modified"),
+        pkg_rate=entry.pkg_rate,
+        unit_rate=entry.unit_rate,
+        last_modified=entry.last_modified,
+        warnings=[],
     )
 
 
 @rate_router.post("/{item_name}", response_model=RateOverrideRead)
-def save_rate_override(item_name: str, body: RateOverrideIn):
+async def save_rate_override(item_name: str, body: RateOverrideIn):
     """
     Save pkg_rate and/or unit_rate override for an item.
 
@@ -184,69 +571,13 @@ def save_rate_override(item_name: str, body: RateOverrideIn):
     if body.unit_rate is not None and body.unit_rate < 0:
         raise HTTPException(status_code=422, detail="unit_rate cannot be negative")
 
-    overrides = _load_overrides()
-    old_entry = overrides.get(item_name, {})
-    now_iso = datetime.now(timezone.utc).isoformat()
-
-    warnings: list[str] = []
-    changelog_entries: list[dict] = []
-
-    for field, new_val in [("pkg_rate", body.pkg_rate), ("unit_rate", body.unit_rate)]:
-        if new_val is None:
-            continue
-        old_val: Optional[float] = old_entry.get(field)
-
-        # Threshold check
-        if old_val and old_val > 0:
-            pct = abs(new_val - old_val) / old_val
-            if pct > _CHANGE_THRESHOLD:
-                warnings.append(
-                    f"{field} changed by {pct * 100:.1f}% "
-                    f"(threshold is {_CHANGE_THRESHOLD * 100:.0f}%)"
-                )
-
-        changelog_entries.append(
-            {
-                "item": item_name,
-                "field": field,
-                "old_value": old_val,
-                "new_value": new_val,
-                "timestamp": now_iso,
-            }
-        )
-
-    if changelog_entries:
-        _append_changelog(changelog_entries)
-
-    # Merge with existing entry so a partial update doesn't erase the other field
-    new_entry = {
-        "pkg_rate": body.pkg_rate if body.pkg_rate is not None else old_entry.get("pkg_rate"),
-        "unit_rate": body.unit_rate if body.unit_rate is not None else old_entry.get("unit_rate"),
-        "last_modified": now_iso,
-    }
-    overrides[item_name] = new_entry
-    _save_overrides(overrides)
-
-    return RateOverrideRead(
-        item_name=item_name,
-        pkg_rate=new_entry["pkg_rate"],
-        unit_rate=new_entry["unit_rate"],
-        last_modified=now_iso,
-        warnings=warnings,
-    )
+    return await asyncio.to_thread(_store_rate_override, item_name, body)
 
 
 @rate_router.delete("/{item_name}")
-def delete_rate_override(item_name: str):
+async def delete_rate_override(item_name: str):
     """
     Remove the rate override for an item, reverting it to Tally XML rates.
     """
-    overrides = _load_overrides()
-    if item_name not in overrides:
-        raise HTTPException(
-            status_code=404,
-            detail=f"No override found for '{item_name}'",
-        )
-    del overrides[item_name]
-    _save_overrides(overrides)
+    await asyncio.to_thread(_remove_rate_override, item_name)
     return {"status": "deleted", "item": item_name}
@@ -21,27 +21,36 @@ Endpoints:
 """
 from __future__ import annotations
 
+import asyncio
+import base64
+import binascii
 import csv
-import io
-import json
-import tempfile
-from datetime import date, datetime, timedelta
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import date, datetime
 from pathlib import Path
 from typing import Optional
 
+import aiofiles.tempfile
+import orjson
 from dateutil.relativedelta import relativedelta
 
 from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile, status
-from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.responses import JSONResponse, ORJSONResponse, StreamingResponse
 from loguru import logger
-from sqlmodel import Session, col, func, select
+from pydantic import TypeAdapter
+from sqlalchemy import case, lambda_stmt
+from sqlalchemy.orm import joinedload
+from sqlmodel import col, func, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
+from app.core.cache import data_version, response_cache
 from app.core.config import settings
-from app.core.database import get_session
+from app.core.database import async_engine, get_async_session
 from app.etl.importer import import_file
 from app.etl.watcher import get_watcher
-from app.models.master import Ledger, StockItem
-from app.models.transaction import ImportLog, Voucher, VoucherLine
+from app.models.master import Company, Ledger, StockItem
+from app.models.transaction import VOUCHER_TYPE_UPPER, ImportLog, Voucher, VoucherLine
 from app.schemas.responses import (
     AgingBucket,
     AgingReport,
@@ -69,16 +78,52 @@ def _vtype_filter(stmt, field, vtype: str):
     """Case-insensitive voucher_type filter (handles SALES vs Sales)."""
     return stmt.where(func.upper(field) == vtype.upper())
 
+
+def _encode_cursor(voucher_date: date, voucher_id: int) -> str:
+    """Opaque keyset cursor for the voucher list: the last row's (date, id)."""
+    return base64.urlsafe_b64encode(f"{voucher_date}:{voucher_id}".encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> tuple[date, int]:
+    try:
+        raw_date, raw_id = base64.urlsafe_b64decode(cursor.encode()).decode().split(":")
+        return date.fromisoformat(raw_date), int(raw_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
 router = APIRouter(prefix="/api")
 
+# KPI / monthly / aging responses are cached per data_version() — imports
+# bump it — with a TTL as a backstop. Keys are the (bounded) query params.
+_CACHE_NS = "reports"
+_REPORT_TTL = 300
+
+# List validators for ORM rows: one call into pydantic-core per response
+# instead of a model_validate per row.
+_VOUCHER_LIST = TypeAdapter(list[VoucherRead])
+_LEDGER_LIST = TypeAdapter(list[LedgerRead])
+_STOCK_ITEM_LIST = TypeAdapter(list[StockItemRead])
+_IMPORT_LOG_LIST = TypeAdapter(list[ImportLogRead])
+
+
+def _list_response(adapter: TypeAdapter, rows) -> ORJSONResponse:
+    """
+    Validate ORM rows once and send them as-is: returning a Response skips
+    FastAPI's second validation pass through response_model, which is kept
+    on the routes for the OpenAPI schema.
+    """
+    models = adapter.validate_python(rows, from_attributes=True)
+    return ORJSONResponse(adapter.dump_python(models, mode="json"))
+
 
 # ── Health ────────────────────────────────────────────────────────────────────
 
 
 @router.get("/health", response_model=HealthResponse)
-def health(session: Session = Depends(get_session)):
+async def health(session: AsyncSession = Depends(get_async_session)):
     try:
-        session.exec(select(Voucher).limit(1))
+        await session.exec(select(Voucher.id).limit(1))
         db_status = "ok"
     except Exception as e:
         db_status = f"error: {e}"
@@ -92,17 +137,22 @@ def health(session: Session = Depends(get_session)):
 # ── Import ────────────────────────────────────────────────────────────────────
 
 
+_UPLOAD_CHUNK = 1 << 20  # 1 MiB
+
+
 async def _stream_to_file(upload_file: UploadFile, dest_file) -> None:
-    """Stream uploaded file to disk in 1MB chunks to avoid loading entire file in RAM."""
-    while chunk := await upload_file.read(1024 * 1024):  # 1 MB chunks
-        dest_file.write(chunk)
+    """
+    Stream an upload to an aiofiles handle in fixed chunks, so neither the
+    whole file sits in RAM nor the disk writes block the event loop.
+    """
+    while chunk := await upload_file.read(_UPLOAD_CHUNK):
+        await dest_file.write(chunk)
 
 
 @router.post("/import", response_model=ImportResponse)
 async def manual_import(
     file: Optional[UploadFile] = File(default=None),
     path: Optional[str] = Query(default=None, description="Absolute path to XML file on server"),
-    session: Session = Depends(get_session),
 ):
     """
     Manually trigger import of a Tally XML file.
@@ -111,22 +161,23 @@ async def manual_import(
     if file is not None:
         # Stream uploaded file to disk in chunks (memory-efficient for large files)
         suffix = Path(file.filename or "upload.xml").suffix
-        with tempfile.NamedTemporaryFile(
-            delete=False, suffix=suffix, dir=settings.TALLY_INBOX
+        async with aiofiles.tempfile.NamedTemporaryFile(
+            "wb", delete=False, suffix=suffix, dir=settings.TALLY_INBOX
         ) as tmp:
             await _stream_to_file(file, tmp)
             tmp_path = tmp.name
-        log = import_file(tmp_path)
+        # Parsing and upserting are blocking — keep them off the event loop
+        log = await asyncio.to_thread(import_file, tmp_path)
     elif path:
         if not Path(path).exists():
             raise HTTPException(status_code=404, detail=f"File not found: {path}")
-        log = import_file(path)
+        log = await asyncio.to_thread(import_file, path)
     else:
         raise HTTPException(
             status_code=400, detail="Provide either a file upload or a path parameter"
         )
 
-    warnings = json.loads(log.warnings) if log.warnings else None
+    warnings = orjson.loads(log.warnings) if log.warnings else None
     return ImportResponse(
         id=log.id,
         file_name=log.file_name,
@@ -144,154 +195,189 @@ async def manual_import(
 # ── Vouchers ──────────────────────────────────────────────────────────────────
 
 
-@router.get("/vouchers", response_model=VoucherListResponse)
-def list_vouchers(
-    date_from: Optional[date] = Query(default=None),
-    date_to: Optional[date] = Query(default=None),
-    voucher_type: Optional[str] = Query(default=None),
-    ledger: Optional[str] = Query(default=None, description="Filter by party name or ledger"),
-    search: Optional[str] = Query(default=None, description="Search voucher number or party"),
-    company_id: Optional[int] = Query(default=None),
-    page: int = Query(default=1, ge=1),
-    page_size: int = Query(default=50, ge=1, le=500),
-    session: Session = Depends(get_session),
-):
-    stmt = select(Voucher)
+# list_vouchers is built from lambda statements: SQLAlchemy caches each
+# lambda by its code location and turns the closure values into bound
+# parameters, so the statement is constructed and compiled once per
+# combination of active filters rather than on every request.
+
 
+def _voucher_list_filters(stmt, date_from, date_to, voucher_type, ledger, search, company_id):
+    """Append the active /vouchers filters to a lambda statement."""
     if date_from:
-        stmt = stmt.where(Voucher.voucher_date >= date_from)
+        stmt += lambda s: s.where(Voucher.voucher_date >= date_from)
     if date_to:
-        stmt = stmt.where(Voucher.voucher_date <= date_to)
+        stmt += lambda s: s.where(Voucher.voucher_date <= date_to)
     if voucher_type:
-        stmt = stmt.where(Voucher.voucher_type == voucher_type)
+        stmt += lambda s: s.where(Voucher.voucher_type == voucher_type)
     if ledger:
-        stmt = stmt.where(
+        stmt += lambda s: s.where(
             (col(Voucher.party_name).contains(ledger))
             | (col(Voucher.party_ledger).contains(ledger))
         )
     if search:
-        stmt = stmt.where(
+        stmt += lambda s: s.where(
             (col(Voucher.voucher_number).contains(search))
             | (col(Voucher.party_name).contains(search))
         )
     if company_id:
-        stmt = stmt.where(Voucher.company_id == company_id)
+        stmt += lambda s: s.where(Voucher.company_id == company_id)
+    return stmt
 
-    total_stmt = select(func.count()).select_from(stmt.subquery())
-    total = session.exec(total_stmt).one()
 
-    stmt = stmt.order_by(col(Voucher.voucher_date).desc())
-    stmt = stmt.offset((page - 1) * page_size).limit(page_size)
-    items = session.exec(stmt).all()
+def _newest_first(stmt):
+    # id breaks ties between same-day vouchers so the cursor is unambiguous
+    return stmt.order_by(col(Voucher.voucher_date).desc(), col(Voucher.id).desc())
+
+
+@router.get("/vouchers", response_model=VoucherListResponse)
+async def list_vouchers(
+    date_from: Optional[date] = Query(default=None),
+    date_to: Optional[date] = Query(default=None),
+    voucher_type: Optional[str] = Query(default=None),
+    ledger: Optional[str] = Query(default=None, description="Filter by party name or ledger"),
+    search: Optional[str] = Query(default=None, description="Search voucher number or party"),
+    company_id: Optional[int] = Query(default=None),
+    page: int = Query(default=1, ge=1),
+    page_size: int = Query(default=50, ge=1, le=500),
+    cursor: Optional[str] = Query(default=None, description="next_cursor from the previous page"),
+    include_total: bool = Query(default=True, description="Run the COUNT for 'total'"),
+    session: AsyncSession = Depends(get_async_session),
+):
+    """
+    List vouchers newest first. Page with either ``page`` (OFFSET) or, for
+    deep pages, the ``cursor`` returned as ``next_cursor`` — the latter seeks
+    on (voucher_date, id) so every page costs the same.
+    """
+    def _filtered(stmt):
+        return _voucher_list_filters(
+            stmt, date_from, date_to, voucher_type, ledger, search, company_id
+        )
+
+    async def _count() -> int:
+        stmt = _filtered(lambda_stmt(lambda: select(func.count(Voucher.id))))
+        return (await session.exec(stmt)).scalar_one()
+
+    offset = (page - 1) * page_size
+    total = None
+    if cursor:
+        after_date, after_id = _decode_cursor(cursor)
+        if include_total:
+            # A window count would only see rows past the cursor
+            total = await _count()
+        stmt = _filtered(lambda_stmt(lambda: select(Voucher)))
+        # Row-value (date, id) < (?, ?) spelt out — lambdas can only bind
+        # scalar closure values
+        stmt += lambda s: _newest_first(
+            s.where(
+                (Voucher.voucher_date < after_date)
+                | ((Voucher.voucher_date == after_date) & (Voucher.id < after_id))
+            )
+        ).limit(page_size)
+        items = (await session.exec(stmt)).scalars().all()
+    elif include_total:
+        # The total rides along as COUNT(*) OVER () — one scan, not two
+        stmt = _filtered(lambda_stmt(lambda: select(Voucher, func.count().over())))
+        stmt += lambda s: _newest_first(s).offset(offset).limit(page_size)
+        rows = (await session.exec(stmt)).all()
+        items = [v for v, _ in rows]
+        if rows:
+            total = rows[0][1]
+        else:
+            # Past the last page no row carries the count
+            total = await _count() if page > 1 else 0
+    else:
+        stmt = _filtered(lambda_stmt(lambda: select(Voucher)))
+        stmt += lambda s: _newest_first(s).offset(offset).limit(page_size)
+        items = (await session.exec(stmt)).scalars().all()
+
+    next_cursor = None
+    if len(items) == page_size:
+        next_cursor = _encode_cursor(items[-1].voucher_date, items[-1].id)
 
     return VoucherListResponse(
         total=total,
         page=page,
         page_size=page_size,
-        items=[VoucherRead.model_validate(v) for v in items],
+        items=_VOUCHER_LIST.validate_python(items, from_attributes=True),
+        next_cursor=next_cursor,
     )
 
 
 @router.get("/vouchers/{voucher_id}", response_model=VoucherDetail)
-def get_voucher(voucher_id: int, session: Session = Depends(get_session)):
-    voucher = session.get(Voucher, voucher_id)
+async def get_voucher(voucher_id: int, session: AsyncSession = Depends(get_async_session)):
+    stmt = select(Voucher).where(Voucher.id == voucher_id).options(joinedload(Voucher.lines))
+    voucher = (await session.exec(stmt)).unique().first()
     if not voucher:
         raise HTTPException(status_code=404, detail="Voucher not found")
-
-    lines = session.exec(
-        select(VoucherLine)
-        .where(VoucherLine.voucher_id == voucher_id)
-        .order_by(VoucherLine.order)
-    ).all()
-
-    detail = VoucherDetail.model_validate(voucher)
-    detail.lines = [
-        {
-            "id": l.id,
-            "ledger_name": l.ledger_name,
-            "amount": l.amount,
-            "is_tax_line": l.is_tax_line,
-            "tax_head": l.tax_head,
-            "tax_rate": l.tax_rate,
-            "stock_item_name": l.stock_item_name,
-            "quantity": l.quantity,
-            "unit": l.unit,
-            "rate": l.rate,
-            "order": l.order,
-        }
-        for l in lines
-    ]
-    return detail
+    # Lines come back with the voucher in one query, already in line order
+    return VoucherDetail.model_validate(voucher)
 
 
 # ── KPIs ──────────────────────────────────────────────────────────────────────
 
 
+def _typed_sum(amount, vtype: str):
+    """SUM(amount) restricted to one voucher type, as a FILTER aggregate."""
+    return func.sum(amount).filter(VOUCHER_TYPE_UPPER == vtype)
+
+
 @router.get("/kpis", response_model=KPIResponse)
-def get_kpis(
+async def get_kpis(
     date_from: Optional[date] = Query(default=None),
     date_to: Optional[date] = Query(default=None),
     company_id: Optional[int] = Query(default=None),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
 ):
-    def _base_stmt():
-        s = select(Voucher).where(Voucher.is_cancelled == False)
-        if date_from:
-            s = s.where(Voucher.voucher_date >= date_from)
-        if date_to:
-            s = s.where(Voucher.voucher_date <= date_to)
-        if company_id:
-            s = s.where(Voucher.company_id == company_id)
-        return s
-
-    def _sum(type_name: str) -> float:
-        s = select(func.sum(Voucher.amount)).where(
-            func.upper(Voucher.voucher_type) == type_name.upper(),
-            Voucher.is_cancelled == False,
-        )
-        if date_from:
-            s = s.where(Voucher.voucher_date >= date_from)
-        if date_to:
-            s = s.where(Voucher.voucher_date <= date_to)
-        if company_id:
-            s = s.where(Voucher.company_id == company_id)
-        return float(session.exec(s).one() or 0.0)
-
-    total_sales = _sum("Sales")
-    total_purchases = _sum("Purchase")
+    key = (_CACHE_NS, "kpis", data_version(), date_from, date_to, company_id)
+    cached = response_cache.get(key)
+    if cached is not None:
+        return cached
+
+    date_filters = []
+    if date_from:
+        date_filters.append(Voucher.voucher_date >= date_from)
+    if date_to:
+        date_filters.append(Voucher.voucher_date <= date_to)
+
+    # Every voucher total plus the count in one scan, via conditional aggregates
+    totals_stmt = select(
+        _typed_sum(Voucher.amount, "SALES"),
+        _typed_sum(Voucher.amount, "PURCHASE"),
+        _typed_sum(Voucher.amount, "RECEIPT"),
+        _typed_sum(Voucher.amount, "PAYMENT"),
+        func.count(Voucher.id),
+    ).where(Voucher.is_cancelled == False, *date_filters)
+    if company_id:
+        totals_stmt = totals_stmt.where(Voucher.company_id == company_id)
+    sales, purchases, receipts, payments, total_vouchers = (await session.exec(totals_stmt)).one()
+
+    total_sales = float(sales or 0.0)
+    total_purchases = float(purchases or 0.0)
     net_revenue = total_sales - total_purchases
 
-    # GST: sum from VoucherLine where is_tax_line=True
-    def _gst(vtype: str) -> float:
-        s = (
-            select(func.sum(VoucherLine.amount))
-            .join(Voucher, VoucherLine.voucher_id == Voucher.id)
-            .where(
-                VoucherLine.is_tax_line == True,
-                func.upper(Voucher.voucher_type) == vtype.upper(),
-                Voucher.is_cancelled == False,
-            )
+    # GST: sum from VoucherLine where is_tax_line=True, split by voucher type
+    gst_stmt = (
+        select(
+            _typed_sum(VoucherLine.amount, "SALES"),
+            _typed_sum(VoucherLine.amount, "PURCHASE"),
         )
-        if date_from:
-            s = s.where(Voucher.voucher_date >= date_from)
-        if date_to:
-            s = s.where(Voucher.voucher_date <= date_to)
-        return abs(float(session.exec(s).one() or 0.0))
-
-    gst_collected = _gst("Sales")
-    gst_paid = _gst("Purchase")
+        .join(Voucher, VoucherLine.voucher_id == Voucher.id)
+        .where(
+            VoucherLine.is_tax_line == True,
+            Voucher.is_cancelled == False,
+            *date_filters,
+        )
+    )
+    gst_sales, gst_purchases = (await session.exec(gst_stmt)).one()
+    gst_collected = abs(float(gst_sales or 0.0))
+    gst_paid = abs(float(gst_purchases or 0.0))
 
     # Receivables: total Sales minus total Receipts (from customers)
-    total_receipts = _sum("Receipt")
-    outstanding_receivables = max(0.0, total_sales - total_receipts)
+    outstanding_receivables = max(0.0, total_sales - float(receipts or 0.0))
     # Payables: total Purchases minus total Payments (to vendors)
-    total_payments = _sum("Payment")
-    outstanding_payables = max(0.0, total_purchases - total_payments)
-
-    total_stmt = select(func.count()).select_from(_base_stmt().subquery())
-    total_vouchers = session.exec(total_stmt).one() or 0
+    outstanding_payables = max(0.0, total_purchases - float(payments or 0.0))
 
-    return KPIResponse(
+    result = KPIResponse(
         total_sales=round(total_sales, 2),
         total_purchases=round(total_purchases, 2),
         net_revenue=round(net_revenue, 2),
@@ -303,84 +389,80 @@ def get_kpis(
         date_from=str(date_from) if date_from else None,
         date_to=str(date_to) if date_to else None,
     )
+    response_cache.set(key, result, expire=_REPORT_TTL)
+    return result
 
 
 @router.get("/kpis/monthly", response_model=list[MonthlyDataPoint])
-def get_monthly_kpis(
+async def get_monthly_kpis(
     year: Optional[int] = Query(default=None),
     company_id: Optional[int] = Query(default=None),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
 ):
     """Return monthly aggregated sales, purchases, GST for chart rendering."""
+    key = (_CACHE_NS, "monthly", data_version(), year, company_id)
+    cached = response_cache.get(key)
+    if cached is not None:
+        return cached
+
     # SQLite: strftime('%Y-%m', date_column)
     month_expr = func.strftime("%Y-%m", Voucher.voucher_date)
 
-    result: dict[str, MonthlyDataPoint] = {}
-
-    for vtype, field in [("Sales", "sales"), ("Purchase", "purchases")]:
-        stmt = (
-            select(month_expr.label("month"), func.sum(Voucher.amount).label("total"))
-            .where(func.upper(Voucher.voucher_type) == vtype.upper(), Voucher.is_cancelled == False)
-            .group_by("month")
-            .order_by("month")
+    # Sales and purchases per month in one grouped scan
+    stmt = (
+        select(
+            month_expr.label("month"),
+            _typed_sum(Voucher.amount, "SALES"),
+            _typed_sum(Voucher.amount, "PURCHASE"),
         )
-        if year:
-            stmt = stmt.where(
-                func.strftime("%Y", Voucher.voucher_date) == str(year)
-            )
-        if company_id:
-            stmt = stmt.where(Voucher.company_id == company_id)
-
-        for row in session.exec(stmt):
-            month, total = row
-            if month not in result:
-                result[month] = MonthlyDataPoint(
-                    month=month, sales=0, purchases=0, gst_collected=0
-                )
-            setattr(result[month], field, round(total or 0, 2))
-
+        .where(VOUCHER_TYPE_UPPER.in_(("SALES", "PURCHASE")), Voucher.is_cancelled == False)
+        .group_by("month")
+        .order_by("month")
+    )
     # GST per month
     gst_stmt = (
-        select(
-            func.strftime("%Y-%m", Voucher.voucher_date).label("month"),
-            func.sum(VoucherLine.amount).label("gst"),
-        )
+        select(month_expr.label("month"), func.sum(VoucherLine.amount))
         .join(Voucher, VoucherLine.voucher_id == Voucher.id)
         .where(
             VoucherLine.is_tax_line == True,
-            func.upper(Voucher.voucher_type) == "SALES",
+            VOUCHER_TYPE_UPPER == "SALES",
             Voucher.is_cancelled == False,
         )
         .group_by("month")
-        .order_by("month")
     )
     if year:
-        gst_stmt = gst_stmt.where(
-            func.strftime("%Y", Voucher.voucher_date) == str(year)
-        )
+        year_filter = func.strftime("%Y", Voucher.voucher_date) == str(year)
+        stmt = stmt.where(year_filter)
+        gst_stmt = gst_stmt.where(year_filter)
     if company_id:
+        stmt = stmt.where(Voucher.company_id == company_id)
         gst_stmt = gst_stmt.where(Voucher.company_id == company_id)
 
-    for row in session.exec(gst_stmt):
-        month, gst = row
-        if month not in result:
-            result[month] = MonthlyDataPoint(
-                month=month, sales=0, purchases=0, gst_collected=0
-            )
-        result[month].gst_collected = round(abs(gst or 0), 2)
-
-    return sorted(result.values(), key=lambda x: x.month)
+    gst_by_month = dict((await session.exec(gst_stmt)).all())
+    # Tax lines only occur on sales vouchers, so every GST month is already
+    # a row of the ordered totals query
+    points = [
+        MonthlyDataPoint(
+            month=month,
+            sales=round(sales or 0, 2),
+            purchases=round(purchases or 0, 2),
+            gst_collected=round(abs(gst_by_month.get(month) or 0), 2),
+        )
+        for month, sales, purchases in await session.exec(stmt)
+    ]
+    response_cache.set(key, points, expire=_REPORT_TTL)
+    return points
 
 
 # ── Reports ───────────────────────────────────────────────────────────────────
 
 
 @router.get("/reports/top-customers", response_model=list[TopCustomer])
-def top_customers(
+async def top_customers(
     n: int = Query(default=10, ge=1, le=100),
     date_from: Optional[date] = Query(default=None),
     date_to: Optional[date] = Query(default=None),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
 ):
     # Create labeled columns
     total_label = func.sum(Voucher.amount).label("total")
@@ -392,7 +474,7 @@ def top_customers(
             total_label,
             count_label,
         )
-        .where(func.upper(Voucher.voucher_type) == "SALES", Voucher.is_cancelled == False)
+        .where(VOUCHER_TYPE_UPPER == "SALES", Voucher.is_cancelled == False)
         .group_by(Voucher.party_name)
         .order_by(total_label.desc())
         .limit(n)
@@ -402,7 +484,7 @@ def top_customers(
     if date_to:
         stmt = stmt.where(Voucher.voucher_date <= date_to)
 
-    rows = session.exec(stmt).all()
+    rows = (await session.exec(stmt)).all()
     return [
         TopCustomer(
             party_name=r[0] or "Unknown",
@@ -414,11 +496,11 @@ def top_customers(
 
 
 @router.get("/items/top", response_model=list[TopItem])
-def top_items(
+async def top_items(
     n: int = Query(default=10, ge=1, le=100),
     date_from: Optional[date] = Query(default=None),
     date_to: Optional[date] = Query(default=None),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
 ):
     # Create labeled columns
     qty_label = func.sum(VoucherLine.quantity).label("qty")
@@ -435,7 +517,7 @@ def top_items(
         .join(Voucher, VoucherLine.voucher_id == Voucher.id)
         .where(
             VoucherLine.stock_item_name.isnot(None),
-            func.upper(Voucher.voucher_type) == "SALES",
+            VOUCHER_TYPE_UPPER == "SALES",
             Voucher.is_cancelled == False,
         )
         .group_by(VoucherLine.stock_item_name)
@@ -447,7 +529,7 @@ def top_items(
     if date_to:
         stmt = stmt.where(Voucher.voucher_date <= date_to)
 
-    rows = session.exec(stmt).all()
+    rows = (await session.exec(stmt)).all()
     return [
         TopItem(
             stock_item_name=r[0],
@@ -460,110 +542,143 @@ def top_items(
     ]
 
 
+# Voucher types counted as stock movements: (inward, outward)
+_INWARD_TYPE, _OUTWARD_TYPE = "PURCHASE", "SALES"
+
+
+def _inventory_months(months: int) -> list[date]:
+    """First day of every month from N months ago up to the current month."""
+    today = datetime.utcnow().date()
+    current_month = (today - relativedelta(months=months)).replace(day=1)
+    month_starts: list[date] = []
+    while current_month <= today:
+        month_starts.append(current_month)
+        current_month += relativedelta(months=1)
+    return month_starts
+
+
+# One StockItem row per name — names repeat across companies, the latest
+# row wins — so it can be joined to voucher lines without multiplying them.
+_STOCK_ITEM_MASTER = (
+    select(StockItem.name, StockItem.opening_balance, StockItem.unit_name)
+    .where(col(StockItem.id).in_(select(func.max(StockItem.id)).group_by(StockItem.name)))
+    .subquery()
+)
+
+
+async def _item_movements(
+    session: AsyncSession,
+    month_starts: list[date],
+    item_name: str | None = None,
+) -> tuple[
+    dict[str, dict[tuple[str, str], tuple[float, str | None]]],
+    dict[str, tuple[float, str | None]],
+]:
+    """
+    Purchase/sales quantities per item, month and type over the whole window
+    in one grouped query, with the item's master opening balance and unit
+    joined in. Returns (movements, masters):
+      movements  {item: {("YYYY-MM", "PURCHASE"|"SALES"): (qty, unit)}}
+      masters    {item: (opening_balance, unit_name)}
+    Restricted to *item_name* when given.
+    """
+    month_expr = func.strftime("%Y-%m", Voucher.voucher_date)
+    master = _STOCK_ITEM_MASTER
+    stmt = (
+        select(
+            VoucherLine.stock_item_name,
+            month_expr,
+            VOUCHER_TYPE_UPPER,
+            func.sum(VoucherLine.quantity),
+            func.max(VoucherLine.unit),
+            master.c.opening_balance,
+            master.c.unit_name,
+        )
+        .join(Voucher, VoucherLine.voucher_id == Voucher.id)
+        .outerjoin(master, master.c.name == VoucherLine.stock_item_name)
+        .where(
+            VOUCHER_TYPE_UPPER.in_((_INWARD_TYPE, _OUTWARD_TYPE)),
+            Voucher.is_cancelled == False,
+            Voucher.voucher_date >= month_starts[0],
+            Voucher.voucher_date < month_starts[-1] + relativedelta(months=1),
+        )
+        .group_by(
+            VoucherLine.stock_item_name,
+            month_expr,
+            VOUCHER_TYPE_UPPER,
+            master.c.opening_balance,
+            master.c.unit_name,
+        )
+    )
+    if item_name is not None:
+        stmt = stmt.where(VoucherLine.stock_item_name == item_name)
+    else:
+        stmt = stmt.where(VoucherLine.stock_item_name.isnot(None))
+
+    movements: dict[str, dict[tuple[str, str], tuple[float, str | None]]] = {}
+    masters: dict[str, tuple[float, str | None]] = {}
+    for name, month, vtype, qty, unit, opening, unit_name in await session.exec(stmt):
+        movements.setdefault(name, {})[(month, vtype)] = (float(qty or 0.0), unit)
+        masters[name] = (opening or 0.0, unit_name or None)
+    return movements, masters
+
+
 def _compute_item_monthly(
-    session: Session,
-    item_name: str,
-    months: int,
+    month_starts: list[date],
+    movements: dict[tuple[str, str], tuple[float, str | None]],
     opening_balance: float = 0.0,
 ) -> tuple[list[ItemMonthlyData], float, str | None]:
     """
-    Compute monthly inward/outward/closing for one item over last N months.
-    Returns (monthly_data, closing_balance, unit).
+    Compute monthly inward/outward/closing for one item from its
+    _item_movements entry. Returns (monthly_data, closing_balance, unit).
     """
-    today = datetime.utcnow().date()
-    start_date = today - relativedelta(months=months)
-    current_month = start_date.replace(day=1)
     monthly_data: list[ItemMonthlyData] = []
     running_balance = opening_balance
     unit: str | None = None
 
-    while current_month <= today:
-        month_end = (current_month + relativedelta(months=1)) - timedelta(days=1)
-
-        # Inward: Purchases
-        inward_stmt = (
-            select(func.sum(VoucherLine.quantity), func.max(VoucherLine.unit))
-            .join(Voucher, VoucherLine.voucher_id == Voucher.id)
-            .where(
-                VoucherLine.stock_item_name == item_name,
-                func.upper(Voucher.voucher_type) == "PURCHASE",
-                Voucher.is_cancelled == False,
-                Voucher.voucher_date >= current_month,
-                Voucher.voucher_date <= month_end,
-            )
-        )
-        inward_row = session.exec(inward_stmt).first()
-        inward = float(inward_row[0] or 0.0) if inward_row else 0.0
-        if inward_row and inward_row[1] and not unit:
-            unit = inward_row[1]
-
-        # Outward: Sales
-        outward_stmt = (
-            select(func.sum(VoucherLine.quantity), func.max(VoucherLine.unit))
-            .join(Voucher, VoucherLine.voucher_id == Voucher.id)
-            .where(
-                VoucherLine.stock_item_name == item_name,
-                func.upper(Voucher.voucher_type) == "SALES",
-                Voucher.is_cancelled == False,
-                Voucher.voucher_date >= current_month,
-                Voucher.voucher_date <= month_end,
-            )
-        )
-        outward_row = session.exec(outward_stmt).first()
-        outward = float(outward_row[0] or 0.0) if outward_row else 0.0
-        if outward_row and outward_row[1] and not unit:
-            unit = outward_row[1]
+    for month_start in month_starts:
+        month = month_start.strftime("%Y-%m")
+        inward, inward_unit = movements.get((month, _INWARD_TYPE), (0.0, None))
+        outward, outward_unit = movements.get((month, _OUTWARD_TYPE), (0.0, None))
+        # First unit seen, earliest month first, purchases before sales
+        unit = unit or inward_unit or outward_unit
 
         running_balance = running_balance + inward - outward
         monthly_data.append(
             ItemMonthlyData(
-                month=current_month.strftime("%Y-%m"),
+                month=month,
                 inward=round(inward, 3),
                 outward=round(outward, 3),
                 closing=round(running_balance, 3),
             )
         )
-        current_month += relativedelta(months=1)
 
     return monthly_data, running_balance, unit
 
 
 @router.get("/items/inventory", response_model=list[ItemInventoryReport])
-def item_inventory(
+async def item_inventory(
     months: int = Query(default=8, ge=1, le=24, description="Number of months to look back"),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
 ):
     """
     Get item inventory data with inward/outward/closing for last N months.
     Opening balance sourced from StockItem master.
     Inward = Purchases (qty). Outward = Sales (qty).
     """
-    # Build opening balance lookup from StockItem master
-    opening_map: dict[str, float] = {}
-    unit_map: dict[str, str] = {}
-    for si in session.exec(select(StockItem)).all():
-        if si.name:
-            opening_map[si.name] = si.opening_balance or 0.0
-            if si.unit_name:
-                unit_map[si.name] = si.unit_name
-
-    # Get all unique items that have voucher line entries
-    items_stmt = (
-        select(VoucherLine.stock_item_name)
-        .distinct()
-        .where(VoucherLine.stock_item_name.isnot(None))
-        .order_by(VoucherLine.stock_item_name)
-    )
-    item_names = [r for r in session.exec(items_stmt).all() if r]
+    # Items without movements in the window are left out below anyway, so
+    # the grouped query (which also carries the master data) drives the report
+    month_starts = _inventory_months(months)
+    movements, masters = await _item_movements(session, month_starts)
 
     results = []
-    for item_name in item_names:
-        opening = opening_map.get(item_name, 0.0)
+    for item_name in sorted(name for name in movements if name):
+        opening, master_unit = masters[item_name]
         monthly_data, closing, unit = _compute_item_monthly(
-            session, item_name, months, opening
+            month_starts, movements[item_name], opening
         )
         if not unit:
-            unit = unit_map.get(item_name)
+            unit = master_unit
 
         if any(m.inward > 0 or m.outward > 0 for m in monthly_data):
             results.append(
@@ -580,19 +695,21 @@ def item_inventory(
 
 
 @router.get("/items/inventory/{item_name}", response_model=ItemInventoryReport)
-def item_inventory_detail(
+async def item_inventory_detail(
     item_name: str,
     months: int = Query(default=8, ge=1, le=24),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
 ):
     """Get detailed monthly inventory for a single stock item."""
     # Get opening balance from StockItem master
-    si = session.exec(select(StockItem).where(StockItem.name == item_name)).first()
+    si = (await session.exec(select(StockItem).where(StockItem.name == item_name))).first()
     opening = si.opening_balance if si else 0.0
     unit_name = si.unit_name if si else None
 
+    month_starts = _inventory_months(months)
+    movements, _ = await _item_movements(session, month_starts, item_name)
     monthly_data, closing, unit = _compute_item_monthly(
-        session, item_name, months, opening
+        month_starts, movements.get(item_name, {}), opening
     )
     if not unit:
         unit = unit_name
@@ -610,68 +727,95 @@ def item_inventory_detail(
 
 
 @router.get("/reports/aging", response_model=AgingReport)
-def aging_report(
-    session: Session = Depends(get_session),
+async def aging_report(
+    session: AsyncSession = Depends(get_async_session),
 ):
     """
     Accounts Receivable and Payable aging.
     Buckets: 0-30, 31-60, 61-90, 91+ days past due date (or voucher date).
     """
     today = datetime.utcnow().date()
-
-    def _aging_for_type(vtype: str, label: str) -> list[AgingBucket]:
-        stmt = (
-            select(Voucher.party_name, Voucher.amount, Voucher.due_date, Voucher.voucher_date)
-            .where(
-                func.upper(Voucher.voucher_type) == vtype.upper(),
-                Voucher.is_cancelled == False,
-                Voucher.amount > 0,
-            )
+    key = (_CACHE_NS, "aging", data_version(), today)
+    cached = response_cache.get(key)
+    if cached is not None:
+        return cached
+
+    # Bucketing happens in SQL: one row per (type, bucket) comes back
+    # instead of every voucher. Not-yet-due vouchers land in 0-30.
+    days_overdue = func.julianday(today.isoformat()) - func.julianday(
+        func.coalesce(Voucher.due_date, Voucher.voucher_date)
+    )
+    bucket_expr = case(
+        (days_overdue <= 30, "0-30"),
+        (days_overdue <= 60, "31-60"),
+        (days_overdue <= 90, "61-90"),
+        else_="91+",
+    )
+    stmt = (
+        select(VOUCHER_TYPE_UPPER, bucket_expr, func.sum(Voucher.amount))
+        .where(
+            VOUCHER_TYPE_UPPER.in_(("SALES", "PURCHASE")),
+            Voucher.is_cancelled == False,
+            Voucher.amount > 0,
         )
-        rows = session.exec(stmt).all()
-
-        buckets = {"0-30": 0.0, "31-60": 0.0, "61-90": 0.0, "91+": 0.0}
-        for party, amount, due_dt, voucher_dt in rows:
-            ref_date = due_dt or voucher_dt
-            if not ref_date:
-                continue
-            days_overdue = (today - ref_date).days
-            if days_overdue <= 0:
-                # Not yet due or future – still include in 0-30
-                days_overdue = 0
-            if days_overdue <= 30:
-                buckets["0-30"] += amount
-            elif days_overdue <= 60:
-                buckets["31-60"] += amount
-            elif days_overdue <= 90:
-                buckets["61-90"] += amount
-            else:
-                buckets["91+"] += amount
+        .group_by(VOUCHER_TYPE_UPPER, bucket_expr)
+    )
+    totals = {(vtype, bucket): amount for vtype, bucket, amount in await session.exec(stmt)}
 
+    def _buckets(vtype: str) -> list[AgingBucket]:
         return [
-            AgingBucket(bucket=k, amount=round(v, 2))
-            for k, v in buckets.items()
+            AgingBucket(bucket=k, amount=round(totals.get((vtype, k)) or 0.0, 2))
+            for k in ("0-30", "31-60", "61-90", "91+")
         ]
 
-    return AgingReport(
-        receivables=_aging_for_type("Sales", "Receivables"),
-        payables=_aging_for_type("Purchase", "Payables"),
+    report = AgingReport(
+        receivables=_buckets("SALES"),
+        payables=_buckets("PURCHASE"),
         as_of=str(today),
     )
+    response_cache.set(key, report, expire=_REPORT_TTL)
+    return report
 
 
 # ── Export ────────────────────────────────────────────────────────────────────
 
 
+_CSV_COLUMNS = [
+    "id", "voucher_number", "voucher_type", "voucher_date",
+    "party_name", "amount", "gstin", "irn", "narration",
+    "place_of_supply", "billing_city",
+]
+_CSV_BATCH = 1000
+
+
+class _Echo:
+    """Write-through sink for csv.writer: writerow() returns the formatted line."""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+async def _iter_csv(stmt):
+    """Yield the CSV header, then the rows of *stmt* one batch at a time."""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(_CSV_COLUMNS)
+    # The request's session is closed before a streamed body is sent, so the
+    # generator owns its own. csv.writer renders None as "" like the old
+    # DictWriter rows did.
+    async with AsyncSession(async_engine) as session:
+        result = await session.stream(stmt.execution_options(yield_per=_CSV_BATCH))
+        async for batch in result.partitions():
+            yield "".join(writer.writerow(row) for row in batch)
+
+
 @router.get("/export/csv")
-def export_csv(
+async def export_csv(
     voucher_type: Optional[str] = Query(default=None),
     date_from: Optional[date] = Query(default=None),
     date_to: Optional[date] = Query(default=None),
-    session: Session = Depends(get_session),
 ):
-    """Download a CSV of vouchers matching filters."""
-    stmt = select(Voucher)
+    """Download a CSV of vouchers matching filters, streamed as it is read."""
+    stmt = select(*(getattr(Voucher, c) for c in _CSV_COLUMNS))
     if voucher_type:
         stmt = stmt.where(Voucher.voucher_type == voucher_type)
     if date_from:
@@ -680,37 +824,9 @@ def export_csv(
         stmt = stmt.where(Voucher.voucher_date <= date_to)
     stmt = stmt.order_by(col(Voucher.voucher_date).desc())
 
-    vouchers = session.exec(stmt).all()
-
-    output = io.StringIO()
-    writer = csv.DictWriter(
-        output,
-        fieldnames=[
-            "id", "voucher_number", "voucher_type", "voucher_date",
-            "party_name", "amount", "gstin", "irn", "narration",
-            "place_of_supply", "billing_city",
-        ],
-    )
-    writer.writeheader()
-    for v in vouchers:
-        writer.writerow({
-            "id": v.id,
-            "voucher_number": v.voucher_number,
-            "voucher_type": v.voucher_type,
-            "voucher_date": str(v.voucher_date),
-            "party_name": v.party_name or "",
-            "amount": v.amount,
-            "gstin": v.gstin or "",
-            "irn": v.irn or "",
-            "narration": v.narration or "",
-            "place_of_supply": v.place_of_supply or "",
-            "billing_city": v.billing_city or "",
-        })
-
-    output.seek(0)
     filename = f"vouchers_{voucher_type or 'all'}_{date.today()}.csv"
     return StreamingResponse(
-        iter([output.getvalue()]),
+        _iter_csv(stmt),
         media_type="text/csv",
         headers={"Content-Disposition": f"attachment; filename={filename}"},
     )
@@ -720,10 +836,10 @@ def export_csv(
 
 
 @router.get("/ledgers", response_model=list[LedgerRead])
-def list_ledgers(
+async def list_ledgers(
     company_id: Optional[int] = Query(default=None),
     ledger_type: Optional[str] = Query(default=None),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
 ):
     stmt = select(Ledger)
     if company_id:
@@ -731,42 +847,42 @@ def list_ledgers(
     if ledger_type:
         stmt = stmt.where(Ledger.ledger_type == ledger_type)
     stmt = stmt.order_by(Ledger.name)
-    return session.exec(stmt).all()
+    return _list_response(_LEDGER_LIST, (await session.exec(stmt)).all())
 
 
 @router.get("/items", response_model=list[StockItemRead])
-def list_items(
+async def list_items(
     company_id: Optional[int] = Query(default=None),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
 ):
     stmt = select(StockItem)
     if company_id:
         stmt = stmt.where(StockItem.company_id == company_id)
     stmt = stmt.order_by(StockItem.name)
-    return session.exec(stmt).all()
+    return _list_response(_STOCK_ITEM_LIST, (await session.exec(stmt)).all())
 
 
 # ── Import logs ───────────────────────────────────────────────────────────────
 
 
 @router.get("/import-logs", response_model=list[ImportLogRead])
-def list_import_logs(
+async def list_import_logs(
     limit: int = Query(default=50, ge=1, le=200),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
 ):
     stmt = (
         select(ImportLog)
         .order_by(col(ImportLog.started_at).desc())
         .limit(limit)
     )
-    return session.exec(stmt).all()
+    return _list_response(_IMPORT_LOG_LIST, (await session.exec(stmt)).all())
 
 
 # ── Settings ──────────────────────────────────────────────────────────────────
 
 
 @router.get("/settings", response_model=SettingsRead)
-def get_settings():
+async def get_settings():
     w = get_watcher()
     return SettingsRead(
         inbox_path=str(w.inbox),
@@ -778,12 +894,30 @@ def get_settings():
     )
 
 
+# Manual rescans run one at a time on a single worker; a request arriving
+# while one is queued or running joins it instead of starting another.
+_RESCAN_POOL = ThreadPoolExecutor(max_workers=1, thread_name_prefix="inbox-rescan")
+_rescan_future: Future | None = None
+_rescan_lock = threading.Lock()
+
+
+def _log_rescan_failure(fut: Future) -> None:
+    """The endpoint has already answered, so a failed rescan is only logged."""
+    exc = None if fut.cancelled() else fut.exception()
+    if exc is not None:
+        logger.opt(exception=exc).error(f"Inbox rescan failed: {exc}")
+
+
 @router.post("/settings/rescan", status_code=202)
-def rescan_inbox():
+async def rescan_inbox():
     """Trigger a manual rescan of the inbox folder."""
+    global _rescan_future
     w = get_watcher()
-    import threading
-    threading.Thread(target=w.scan_existing, daemon=True).start()
+    with _rescan_lock:
+        if _rescan_future is not None and not _rescan_future.done():
+            return {"message": "Rescan already in progress", "inbox": str(w.inbox)}
+        _rescan_future = _RESCAN_POOL.submit(w.scan_existing)
+        _rescan_future.add_done_callback(_log_rescan_failure)
     return {"message": "Rescan started", "inbox": str(w.inbox)}
 
 
@@ -791,9 +925,9 @@ def rescan_inbox():
 
 
 @router.get("/voucher-types")
-def voucher_types(session: Session = Depends(get_session)):
+async def voucher_types(session: AsyncSession = Depends(get_async_session)):
     stmt = select(Voucher.voucher_type).distinct().order_by(Voucher.voucher_type)
-    rows = session.exec(stmt).all()
+    rows = (await session.exec(stmt)).all()
     return [r for r in rows if r]
 
 
@@ -801,8 +935,7 @@ def voucher_types(session: Session = Depends(get_session)):
 
 
 @router.get("/companies")
-def list_companies(session: Session = Depends(get_session)):
-    from app.models.master import Company
+async def list_companies(session: AsyncSession = Depends(get_async_session)):
     stmt = select(Company).order_by(Company.name)
-    companies = session.exec(stmt).all()
+    companies = (await session.exec(stmt)).all()
     return [{"id": c.id, "name": c.name, "gstin": c.gstin} for c in companies]
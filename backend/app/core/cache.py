@@ -0,0 +1,76 @@
+"""
+Small in-process response cache.
+
+Aggregation endpoints only change when data is imported or overrides are
+edited, so their results are cached here for a short TTL and dropped
+explicitly by the code paths that change the underlying data.
+
+Keys are tuples whose first element is a namespace (e.g. "order"), so one
+namespace can be cleared without touching the others.
+
+data_version() is a counter bumped whenever imported data changes; caches
+that must survive TTL expiry (e.g. voucher aggregates) key on it instead.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+
+class TTLCache:
+    """Thread-safe LRU cache with per-entry expiry and a bounded size."""
+
+    def __init__(self, maxsize: int = 128) -> None:
+        self.maxsize = maxsize
+        self._data: OrderedDict[tuple, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple[Hashable, ...]) -> Any | None:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: tuple[Hashable, ...], value: Any, expire: float) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + expire, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self, namespace: str | None = None) -> None:
+        """Drop every entry, or only those whose key starts with *namespace*."""
+        with self._lock:
+            if namespace is None:
+                self._data.clear()
+                return
+            for key in [k for k in self._data if k[0] == namespace]:
+                del self._data[key]
+
+
+response_cache = TTLCache(maxsize=256)
+
+
+_data_version = 0
+_version_lock = threading.Lock()
+
+
+def data_version() -> int:
+    """Current import generation; changes after every successful import."""
+    return _data_version
+
+
+def bump_data_version() -> None:
+    """Mark imported data as changed and drop all cached responses."""
+    global _data_version
+    with _version_lock:
+        _data_version += 1
+    response_cache.clear()
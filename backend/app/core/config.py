@@ -1,52 +1,75 @@
 """Application configuration loaded from environment variables."""
 import os
+from functools import lru_cache
 from pathlib import Path
-from dotenv import load_dotenv
 
-load_dotenv()
+from dotenv import load_dotenv
+from pydantic import BaseModel, ConfigDict, field_validator
 
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
 
 
-class Settings:
+class Settings(BaseModel):
+    # Parsed and validated once; frozen so nothing mutates it at runtime.
+    model_config = ConfigDict(frozen=True)
+
     # Inbox folder where Tally XML files are dropped
-    TALLY_INBOX: str = os.getenv("TALLY_INBOX", str(BASE_DIR / "data" / "tally_inbox"))
+    TALLY_INBOX: str = str(BASE_DIR / "data" / "tally_inbox")
 
     # SQLite DB URL
-    DATABASE_URL: str = os.getenv(
-        "DATABASE_URL", f"sqlite:///{BASE_DIR / 'tally_dashboard.db'}"
-    )
+    DATABASE_URL: str = f"sqlite:///{BASE_DIR / 'tally_dashboard.db'}"
 
     # API server
-    API_HOST: str = os.getenv("API_HOST", "0.0.0.0")
-    API_PORT: int = int(os.getenv("API_PORT", "8000"))
+    API_HOST: str = "0.0.0.0"
+    API_PORT: int = 8000
 
     # Auth
-    AUTH_ENABLED: bool = os.getenv("AUTH_ENABLED", "false").lower() == "true"
-    AUTH_USERNAME: str = os.getenv("AUTH_USERNAME", "admin")
-    AUTH_PASSWORD: str = os.getenv("AUTH_PASSWORD", "changeme")
+    AUTH_ENABLED: bool = False
+    AUTH_USERNAME: str = "admin"
+    AUTH_PASSWORD: str = "changeme"
 
     # Logging
-    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
+    LOG_LEVEL: str = "INFO"
 
-    # CORS
-    CORS_ORIGINS: list[str] = [
-        o.strip()
-        for o in os.getenv(
-            "CORS_ORIGINS", "http://localhost:5173,http://localhost:3000"
-        ).split(",")
-    ]
+    # CORS (comma-separated in the environment)
+    CORS_ORIGINS: tuple[str, ...] = ("http://localhost:5173", "http://localhost:3000")
 
     # Watcher poll interval (seconds) – used on platforms where inotify is unavailable
-    WATCHER_POLL_INTERVAL: int = int(os.getenv("WATCHER_POLL_INTERVAL", "5"))
+    WATCHER_POLL_INTERVAL: int = 5
+
+    # Keep each voucher's XML for drilldown; false skips serialising it on
+    # import (new vouchers store none, re-imported ones keep what they had)
+    STORE_RAW_XML: bool = True
 
     # Directory for raw XML backups (relative to BASE_DIR)
     RAW_BACKUP_DIR: Path = BASE_DIR / "data" / "raw_backup"
 
-    def __init__(self):
-        # Ensure directories exist
-        Path(self.TALLY_INBOX).mkdir(parents=True, exist_ok=True)
-        self.RAW_BACKUP_DIR.mkdir(parents=True, exist_ok=True)
+    @field_validator("AUTH_ENABLED", mode="before")
+    @classmethod
+    def _parse_flag(cls, v):
+        # Only "true" (any case) enables auth, as before
+        return v.lower() == "true" if isinstance(v, str) else v
+
+    @field_validator("CORS_ORIGINS", mode="before")
+    @classmethod
+    def _split_origins(cls, v):
+        return tuple(o.strip() for o in v.split(",")) if isinstance(v, str) else v
+
+
+# Raw backups always live under BASE_DIR; every other field can be set from
+# the environment (or .env) under its own name.
+_ENV_FIELDS = tuple(name for name in Settings.model_fields if name != "RAW_BACKUP_DIR")
+
+
+@lru_cache
+def get_settings() -> Settings:
+    """Read .env and the environment once and return the shared Settings."""
+    load_dotenv()
+    s = Settings(**{name: os.environ[name] for name in _ENV_FIELDS if name in os.environ})
+    # Ensure directories exist
+    Path(s.TALLY_INBOX).mkdir(parents=True, exist_ok=True)
+    s.RAW_BACKUP_DIR.mkdir(parents=True, exist_ok=True)
+    return s
 
 
-settings = Settings()
+settings = get_settings()
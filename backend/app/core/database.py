@@ -1,5 +1,15 @@
 """SQLModel database engine and session management."""
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+
+from loguru import logger
+from sqlalchemy import and_, delete, event, func, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.schema import CreateIndex
+from sqlalchemy.ext.asyncio import create_async_engine
 from sqlmodel import SQLModel, create_engine, Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.core.config import settings
 
 # Import models so SQLModel.metadata knows about all tables
@@ -7,20 +17,175 @@ import app.models.master  # noqa: F401
 import app.models.transaction  # noqa: F401
 import app.models.order  # noqa: F401
 
-# connect_args for SQLite: enable WAL mode for concurrent reads while watcher writes
+# Applied to every new SQLite connection (sync and async engines):
+# WAL so readers don't block on the watcher's writes, and a larger page
+# cache / mmap window for the aggregation queries.
+_SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA mmap_size=268435456",   # 256 MB
+    "PRAGMA cache_size=-65536",     # 64 MB
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA foreign_keys=ON",
+)
+
+_IS_SQLITE = make_url(settings.DATABASE_URL).get_backend_name() == "sqlite"
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    cursor = dbapi_connection.cursor()
+    for pragma in _SQLITE_PRAGMAS:
+        cursor.execute(pragma)
+    cursor.close()
+
+
+def _disable_pysqlite_transactions(dbapi_connection, connection_record) -> None:
+    # pysqlite would otherwise issue its own deferred BEGIN before DML;
+    # _sqlite_begin below emits BEGIN instead.
+    dbapi_connection.isolation_level = None
+
+
+def _sqlite_begin(conn) -> None:
+    """Start transactions IMMEDIATE when the engine asks for it (write_engine)."""
+    if conn.get_execution_options().get("sqlite_immediate"):
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+    else:
+        conn.exec_driver_sql("BEGIN")
+
+
 engine = create_engine(
     settings.DATABASE_URL,
     connect_args={"check_same_thread": False},
+    pool_size=10,
+    max_overflow=20,
     echo=False,
 )
+if _IS_SQLITE:
+    event.listen(engine, "connect", _set_sqlite_pragmas)
+    event.listen(engine, "connect", _disable_pysqlite_transactions)
+    event.listen(engine, "begin", _sqlite_begin)
+
+# Same pool, but transactions take SQLite's write lock when they begin. For
+# read-then-write work like imports: a deferred transaction that has read
+# cannot upgrade to a writer once another connection has committed (WAL
+# returns SQLITE_BUSY without waiting), so two overlapping imports would fail.
+write_engine = engine.execution_options(sqlite_immediate=True)
+
+
+def _async_url(url: str) -> str:
+    """Map a sync SQLite URL onto the aiosqlite driver."""
+    u = make_url(url)
+    if u.drivername == "sqlite":
+        u = u.set(drivername="sqlite+aiosqlite")
+    return u.render_as_string(hide_password=False)
+
+
+# Async engine on the same database, used by read-heavy async routes so they
+# don't tie up a threadpool worker while SQLite is busy.
+async_engine = create_async_engine(_async_url(settings.DATABASE_URL), echo=False)
+if _IS_SQLITE:
+    event.listen(async_engine.sync_engine, "connect", _set_sqlite_pragmas)
+
+
+def _duplicate_rows(table, index):
+    """Condition matching every row but the oldest (lowest id) per key of *index*."""
+    where = index.dialect_options["sqlite"]["where"]
+    keep = select(func.min(table.c.id)).group_by(*index.expressions)
+    # NULL keys never collide; a partial index only covers its own rows
+    conditions = [expr.is_not(None) for expr in index.expressions]
+    if where is not None:
+        keep = keep.where(where)
+        conditions.append(where)
+    return and_(*conditions, table.c.id.not_in(keep))
+
+
+def _backup_database(conn) -> None:
+    """Copy the SQLite database aside, so rows about to be deleted can be recovered."""
+    database = conn.engine.url.database
+    if not database or database == ":memory:":
+        return
+    path = Path(database)
+    backup = path.with_name(f"{path.name}.pre-dedup-{datetime.now():%Y%m%d-%H%M%S}.bak")
+    target = sqlite3.connect(backup)
+    try:
+        conn.connection.dbapi_connection.backup(target)
+    finally:
+        target.close()
+    logger.warning(f"Backed up {path} to {backup} before removing duplicate rows")
+
+
+def _drop_duplicate_keys(conn, table, index) -> None:
+    """
+    Keep the oldest row per key so a new unique index can be built. It is
+    the row re-imports have been updating: the importer's lookups return the
+    lowest id for a key (see importer._existing_voucher_ids).
+    """
+    duplicate = _duplicate_rows(table, index)
+    # Rows referencing a dropped row (e.g. voucher lines) go with it
+    for child in SQLModel.metadata.sorted_tables:
+        for fk in child.foreign_keys:
+            if fk.column.table is table:
+                dropped = select(table.c.id).where(duplicate)
+                conn.execute(delete(child).where(fk.parent.in_(dropped)))
+    result = conn.execute(delete(table).where(duplicate))
+    if result.rowcount:
+        logger.warning(
+            f"Removed {result.rowcount} duplicate {table.name} rows before creating {index.name}"
+        )
 
 
 def create_db_and_tables() -> None:
     """Create all tables defined in SQLModel models."""
     SQLModel.metadata.create_all(engine)
+    with engine.begin() as conn:
+        _create_indexes(conn)
+        # Refresh planner statistics so the composite indexes get picked
+        conn.exec_driver_sql("ANALYZE")
+
+
+def _create_indexes(conn) -> None:
+    """
+    Create the models' indexes that are missing. create_all skips tables
+    that already exist, so indexes added to the models later are created
+    here for databases built by older versions. IF NOT EXISTS rather than
+    checkfirst: SQLite reflection does not report expression indexes, so
+    checkfirst would try to re-create them.
+
+    Duplicate keys block a new unique index; they are deleted first (oldest
+    row kept), after the database has been copied aside.
+    """
+    new_unique = []
+    if _IS_SQLITE:
+        existing = set(
+            conn.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'index'").scalars()
+        )
+        new_unique = [
+            (table, index)
+            for table in SQLModel.metadata.sorted_tables
+            for index in table.indexes
+            if index.unique and index.name not in existing
+        ]
+    if any(
+        conn.execute(
+            select(func.count()).select_from(table).where(_duplicate_rows(table, index))
+        ).scalar()
+        for table, index in new_unique
+    ):
+        _backup_database(conn)
+        for table, index in new_unique:
+            _drop_duplicate_keys(conn, table, index)
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            conn.execute(CreateIndex(index, if_not_exists=True))
 
 
 def get_session():
     """FastAPI dependency: yields a SQLModel session."""
     with Session(engine) as session:
         yield session
+
+
+async def get_async_session():
+    """FastAPI dependency: yields a SQLModel AsyncSession."""
+    async with AsyncSession(async_engine) as session:
+        yield session
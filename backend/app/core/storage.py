@@ -0,0 +1,28 @@
+"""Helpers for the small JSON data files kept under backend/data/."""
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+
+def atomic_write_bytes(path: Path, data: bytes, *, fsync: bool = False) -> None:
+    """
+    Replace *path* with *data* atomically.
+
+    The bytes go to a sibling ``<name>.tmp`` file which is then renamed over
+    the target with os.replace, so readers see either the old file or the
+    complete new one — never a truncated write. Pass ``fsync=True`` to force
+    the data to disk before the rename (slower; off for hot paths).
+    """
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            written = os.write(fd, view)
+            view = view[written:]
+        if fsync:
+            os.fsync(fd)
+    finally:
+        os.close(fd)
+    os.replace(tmp, path)
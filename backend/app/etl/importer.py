@@ -4,173 +4,316 @@ ETL Importer: orchestrates sanitise → parse → upsert into SQLite.
 Idempotency strategy:
   - If voucher has IRN → use IRN as unique key.
   - Otherwise use composite: (voucher_type, voucher_number, company_name, voucher_date).
-  - Existing records are UPDATEd (not re-inserted), and differences are logged.
+  - Existing records are UPDATEd (not re-inserted); fields missing from the
+    new export keep their stored values.
 """
 from __future__ import annotations
 
 import json
+import mmap
+import os
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
 from typing import Optional
 
 from loguru import logger
-from sqlmodel import Session, select
+from sqlalchemy import bindparam, delete, func, insert, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlmodel import Session, col, select
 
+from app.core.cache import bump_data_version
 from app.core.config import settings
-from app.core.database import engine
-from app.etl.parser import parse_xml_file
+from app.core.database import engine, write_engine
+from app.etl.parser import get_raw_xml, parse_xml_file
 from app.etl.sanitizer import sanitize_xml
-from app.models.master import Company, Ledger, StockItem, Unit
+from app.models.master import (
+    LEDGER_KEY,
+    STOCK_ITEM_KEY,
+    UNIT_KEY,
+    Company,
+    Ledger,
+    StockItem,
+    Unit,
+)
 from app.models.transaction import ImportLog, Voucher, VoucherLine
 
 
 # ── helpers ──────────────────────────────────────────────────────────────────
 
 
-def _upsert_company(session: Session, data: dict) -> Optional[Company]:
+def _timestamps(table) -> dict:
+    """created_at / updated_at values for an INSERT, stamped by SQLite itself."""
+    return {c: func.now() for c in ("created_at", "updated_at") if c in table.c}
+
+
+def _upsert_company(session: Session, data: dict) -> Optional[int]:
+    """INSERT or UPDATE the file's company in one statement; returns its id."""
     if not data or not data.get("name"):
         return None
-    stmt = select(Company).where(Company.name == data["name"])
-    existing = session.exec(stmt).first()
-    if existing:
-        for k, v in data.items():
-            if v:
-                setattr(existing, k, v)
-        existing.updated_at = datetime.utcnow()
-        session.add(existing)
-        return existing
-    company = Company(**data)
-    session.add(company)
-    session.flush()
-    return company
-
-
-def _upsert_ledger(session: Session, data: dict, company_id: Optional[int]) -> Ledger:
-    stmt = select(Ledger).where(
-        Ledger.name == data["name"],
-        Ledger.company_id == company_id,
-    )
-    existing = session.exec(stmt).first()
-    if existing:
-        for k, v in data.items():
-            if v is not None:
-                setattr(existing, k, v)
-        existing.updated_at = datetime.utcnow()
-        session.add(existing)
-        return existing
-    ledger = Ledger(**data, company_id=company_id)
-    session.add(ledger)
-    session.flush()
-    return ledger
-
-
-def _upsert_unit(session: Session, data: dict, company_id: Optional[int]) -> Unit:
-    stmt = select(Unit).where(
-        Unit.name == data["name"],
-        Unit.company_id == company_id,
-    )
-    existing = session.exec(stmt).first()
-    if existing:
-        for k, v in data.items():
-            if v is not None:
-                setattr(existing, k, v)
-        session.add(existing)
-        return existing
-    unit = Unit(**data, company_id=company_id)
-    session.add(unit)
-    session.flush()
-    return unit
-
-
-def _upsert_stock_item(session: Session, data: dict, company_id: Optional[int]) -> StockItem:
-    stmt = select(StockItem).where(
-        StockItem.name == data["name"],
-        StockItem.company_id == company_id,
-    )
-    existing = session.exec(stmt).first()
-    if existing:
-        for k, v in data.items():
-            if v is not None:
-                setattr(existing, k, v)
-        existing.updated_at = datetime.utcnow()
-        session.add(existing)
-        return existing
-    item = StockItem(**data, company_id=company_id)
-    session.add(item)
-    session.flush()
-    return item
-
-
-def _upsert_voucher(
-    session: Session,
-    data: dict,
-    company_id: Optional[int],
-) -> tuple[Voucher, bool]:
+    update = {k: v for k, v in data.items() if v}
+    stmt = sqlite_insert(Company).values({**data, **_timestamps(Company.__table__)})
+    # name is always rewritten (a no-op) so RETURNING yields the id on both paths
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Company.name],
+        set_={**update, "name": stmt.excluded.name, "updated_at": func.now()},
+    ).returning(Company.id)
+    return session.exec(stmt).scalar_one()
+
+
+def _update_columns(table, *also_skip: str) -> list[str]:
     """
-    Returns (voucher, was_inserted).
-    was_inserted=False means it was updated.
+    Columns an import writes on conflict: every parsed field, i.e. all but
+    the surrogate id, company and timestamps (and *also_skip*).
     """
-    lines_data = data.pop("lines", [])
+    skip = {"id", "company_id", "created_at", "updated_at", *also_skip}
+    return [c.name for c in table.c if c.name not in skip]
+
 
-    # Lookup key
+def _master_upsert(table, key):
+    """
+    Single INSERT ... ON CONFLICT DO UPDATE for one master table. Fields a
+    row leaves as None keep their stored values. *key* must repeat the
+    expressions of the model's unique index exactly.
+    """
+    stmt = sqlite_insert(table).values(_timestamps(table))
+    set_ = {
+        c: func.coalesce(stmt.excluded[c], table.c[c])
+        for c in _update_columns(table, "name")
+    }
+    if "updated_at" in table.c:
+        set_["updated_at"] = func.now()
+    return stmt.on_conflict_do_update(index_elements=key, set_=set_)
+
+
+# Built once: the column lists come from the tables, not from each import
+_MASTER_UPSERTS = {
+    model: _master_upsert(model.__table__, key)
+    for model, key in ((Ledger, LEDGER_KEY), (Unit, UNIT_KEY), (StockItem, STOCK_ITEM_KEY))
+}
+
+
+def _upsert_masters(
+    session: Session, model, rows: list[dict], company_id: Optional[int]
+) -> None:
+    """
+    Upsert every parsed row of one master table in a single executemany
+    INSERT ... ON CONFLICT DO UPDATE; a name repeated within the file
+    updates the first row.
+    """
+    if not rows:
+        return
+    session.execute(
+        _MASTER_UPSERTS[model], [{**row, "company_id": company_id} for row in rows]
+    )
+
+
+# Vouchers are looked up and written this many at a time; also bounds the
+# IN (...) lists of the existing-voucher lookup.
+_VOUCHER_BATCH = 500
+
+_VOUCHERS = Voucher.__table__
+_LINES = VoucherLine.__table__
+
+_VOUCHER_COLS = _update_columns(_VOUCHERS)
+
+# Stored vouchers: one executemany UPDATE by id
+_VOUCHER_UPDATE = (
+    update(_VOUCHERS)
+    .where(_VOUCHERS.c.id == bindparam("_id"))
+    .values(
+        {
+            **{
+                c: func.coalesce(bindparam(f"_{c}", type_=_VOUCHERS.c[c].type), _VOUCHERS.c[c])
+                for c in _VOUCHER_COLS
+            },
+            "company_id": bindparam("_company_id"),
+            "updated_at": func.now(),
+        }
+    )
+)
+
+# New vouchers: multi-row INSERT ... RETURNING. The ON CONFLICT branch is
+# only reached if another import stored the same IRN since the lookup.
+_VOUCHER_INSERT = sqlite_insert(_VOUCHERS).values(_timestamps(_VOUCHERS))
+_VOUCHER_INSERT = _VOUCHER_INSERT.on_conflict_do_update(
+    index_elements=[_VOUCHERS.c.irn],
+    set_={
+        **{
+            c: func.coalesce(_VOUCHER_INSERT.excluded[c], _VOUCHERS.c[c])
+            for c in _VOUCHER_COLS
+        },
+        "company_id": _VOUCHER_INSERT.excluded.company_id,
+        "updated_at": func.now(),
+    },
+).returning(_VOUCHERS.c.id, _VOUCHERS.c.irn, _VOUCHERS.c.dedup_key)
+
+
+def _voucher_key(data: dict) -> tuple[str, str]:
+    """Identity of a parsed voucher: its IRN if it has one, else dedup_key."""
     if data.get("irn"):
-        stmt = select(Voucher).where(Voucher.irn == data["irn"])
-    else:
-        stmt = select(Voucher).where(Voucher.dedup_key == data["dedup_key"])
+        return ("irn", data["irn"])
+    return ("dedup", data["dedup_key"])
 
-    existing = session.exec(stmt).first()
-    inserted = False
 
-    if existing:
-        # Log differences
-        diffs = []
-        for k, v in data.items():
-            old = getattr(existing, k, None)
-            if old != v and v is not None:
-                diffs.append(f"{k}: {old!r} → {v!r}")
-        if diffs:
-            logger.debug(f"Updating voucher {data.get('voucher_number')}: {', '.join(diffs[:5])}")
+def _merge_repeats(vouchers: list[dict]) -> tuple[list[dict], int]:
+    """
+    Collapse vouchers that occur more than once in the same file.
 
+    A repeat is matched the way the database lookup matches (IRN, else
+    dedup_key against any earlier voucher) and overwrites the fields it
+    sets, as a re-import would; its lines replace the earlier ones if it
+    has any. Returns (unique vouchers, number of repeats).
+    """
+    merged: list[dict] = []
+    by_irn: dict[str, dict] = {}
+    by_dedup: dict[str, dict] = {}
+    repeats = 0
+    for data in vouchers:
+        if data.get("irn"):
+            target = by_irn.get(data["irn"])
+        else:
+            target = by_dedup.get(data["dedup_key"])
+        if target is None:
+            target = dict(data)
+            merged.append(target)
+            if data.get("irn"):
+                by_irn[data["irn"]] = target
+            by_dedup.setdefault(data["dedup_key"], target)
+            continue
+        repeats += 1
         for k, v in data.items():
-            if v is not None:
-                setattr(existing, k, v)
-        existing.company_id = company_id
-        existing.updated_at = datetime.utcnow()
-        session.add(existing)
-        voucher = existing
-    else:
-        voucher = Voucher(**data, company_id=company_id)
-        session.add(voucher)
-        inserted = True
-
-    session.flush()
-
-    # Replace lines
-    if lines_data:
-        # Delete old lines
-        old_lines = session.exec(
-            select(VoucherLine).where(VoucherLine.voucher_id == voucher.id)
-        ).all()
-        for ol in old_lines:
-            session.delete(ol)
-        session.flush()
-
-        for line_data in lines_data:
-            line = VoucherLine(**line_data, voucher_id=voucher.id)
-            session.add(line)
-
-    return voucher, inserted
+            if k == "lines":
+                if v:
+                    target["lines"] = v
+            elif v is not None:
+                target[k] = v
+    return merged, repeats
+
+
+def _existing_voucher_ids(session: Session, batch: list[dict]) -> dict[tuple[str, str], int]:
+    """Map the keys of *batch* that are already stored to their voucher ids."""
+    irns = [data["irn"] for data in batch if data.get("irn")]
+    dedup_keys = [data["dedup_key"] for data in batch if not data.get("irn")]
+    found: dict[tuple[str, str], int] = {}
+    if irns:
+        stmt = select(Voucher.irn, Voucher.id).where(col(Voucher.irn).in_(irns))
+        for irn, voucher_id in session.exec(stmt):
+            found[("irn", irn)] = voucher_id
+    if dedup_keys:
+        # A key can match several vouchers (e.g. one stored with an IRN and
+        # one without); the oldest wins, as with the former per-row lookup.
+        stmt = (
+            select(Voucher.dedup_key, Voucher.id)
+            .where(col(Voucher.dedup_key).in_(dedup_keys))
+            .order_by(Voucher.id)
+        )
+        for dedup_key, voucher_id in session.exec(stmt):
+            found.setdefault(("dedup", dedup_key), voucher_id)
+    return found
+
+
+def _voucher_row(data: dict, clean_bytes: bytes) -> dict:
+    """The voucher's column values, with raw_xml read from *clean_bytes* if it was streamed."""
+    row = {c: data[c] for c in _VOUCHER_COLS}
+    row["raw_xml"] = get_raw_xml(clean_bytes, data)
+    return row
+
+
+def _bulk_upsert_vouchers(
+    session: Session,
+    vouchers: list[dict],
+    company_id: Optional[int],
+    clean_bytes: bytes = b"",
+) -> tuple[int, int]:
+    """
+    Insert or update *vouchers* in batches. Returns (inserted, updated).
+
+    Stored vouchers are updated with one executemany UPDATE per batch and
+    new ones inserted with one multi-row INSERT ... RETURNING. Fields the
+    new export leaves empty (None) keep their stored values. Lines are
+    replaced only for vouchers that come with lines. *clean_bytes* is the
+    parsed XML, which streamed vouchers' raw_xml is sliced from one batch
+    at a time.
+    """
+    vouchers, updated = _merge_repeats(vouchers)
+    inserted = 0
+    if not vouchers:
+        return inserted, updated
+
+    for start in range(0, len(vouchers), _VOUCHER_BATCH):
+        batch = vouchers[start:start + _VOUCHER_BATCH]
+        ids = _existing_voucher_ids(session, batch)
+
+        stored = [data for data in batch if _voucher_key(data) in ids]
+        if stored:
+            session.execute(
+                _VOUCHER_UPDATE,
+                [
+                    {
+                        "_id": ids[_voucher_key(data)],
+                        "_company_id": company_id,
+                        **{f"_{c}": v for c, v in _voucher_row(data, clean_bytes).items()},
+                    }
+                    for data in stored
+                ],
+            )
+            updated += len(stored)
+
+        new = [data for data in batch if _voucher_key(data) not in ids]
+        if new:
+            # Batched RETURNING rows are not guaranteed to follow parameter
+            # order, so ids are matched back by key.
+            rows = session.execute(
+                _VOUCHER_INSERT,
+                [_voucher_row(data, clean_bytes) | {"company_id": company_id} for data in new],
+            )
+            for voucher_id, irn, dedup_key in rows:
+                ids[_voucher_key({"irn": irn, "dedup_key": dedup_key})] = voucher_id
+            inserted += len(new)
+
+        # Vouchers that bring lines get theirs replaced: one DELETE for the
+        # batch, then one executemany INSERT
+        with_lines = [data for data in batch if data.get("lines")]
+        if with_lines:
+            voucher_ids = [ids[_voucher_key(data)] for data in with_lines]
+            session.execute(delete(_LINES).where(_LINES.c.voucher_id.in_(voucher_ids)))
+            # Parsed lines already hold exactly the VoucherLine columns, so
+            # they go to the INSERT as they are once voucher_id is set
+            line_rows: list[dict] = []
+            for data, voucher_id in zip(with_lines, voucher_ids):
+                for line in data["lines"]:
+                    line["voucher_id"] = voucher_id
+                line_rows.extend(data["lines"])
+            session.execute(insert(_LINES), line_rows)
+
+    return inserted, updated
 
 
 # ── main importer ─────────────────────────────────────────────────────────────
 
 
+@contextmanager
+def _mapped(file_path: Path):
+    """
+    The file's contents as a read-only mmap, so the raw export is paged in
+    from disk instead of copied onto the heap (b"" for an empty file, which
+    cannot be mapped).
+    """
+    with open(file_path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b""
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as raw:
+            yield raw
+
+
 def import_file(file_path: str | Path) -> ImportLog:
     """
     Full ETL pipeline for a single Tally XML file.
 
-    1. Read raw bytes.
-    2. Sanitise.
+    1. Map the raw bytes.
+    2. Sanitise (the mapping is released before parsing).
     3. Parse.
     4. Upsert into DB.
     5. Return ImportLog record.
@@ -186,45 +329,41 @@ def import_file(file_path: str | Path) -> ImportLog:
 
     warnings: list[str] = []
     try:
-        raw = file_path.read_bytes()
-        logger.info(f"Importing {file_path.name} ({len(raw):,} bytes)")
-
-        # --- Sanitise ---
-        clean_bytes, san_warnings = sanitize_xml(
-            raw,
-            source_path=str(file_path),
-            backup_dir=settings.RAW_BACKUP_DIR,
-        )
+        with _mapped(file_path) as raw:
+            logger.info(f"Importing {file_path.name} ({len(raw):,} bytes)")
+
+            # --- Sanitise ---
+            clean_bytes, san_warnings = sanitize_xml(
+                raw,
+                source_path=str(file_path),
+                backup_dir=settings.RAW_BACKUP_DIR,
+            )
         warnings.extend(san_warnings)
 
         # --- Parse ---
-        parsed = parse_xml_file(clean_bytes)
+        parsed = parse_xml_file(clean_bytes, include_raw_xml=settings.STORE_RAW_XML)
         log.file_type = parsed["file_type"]
 
         # --- Upsert ---
-        with Session(engine) as session:
+        # One IMMEDIATE transaction for the whole file, committed on exit
+        with Session(write_engine) as session, session.begin():
             # Company
-            company = None
+            company_id = None
             if parsed["company"]:
-                company = _upsert_company(session, parsed["company"])
+                company_id = _upsert_company(session, parsed["company"])
                 log.masters_processed += 1
 
-            company_id = company.id if company else None
-
             # Masters
-            for led_data in parsed["ledgers"]:
-                _upsert_ledger(session, led_data, company_id)
-                log.masters_processed += 1
-
-            for unit_data in parsed["units"]:
-                _upsert_unit(session, unit_data, company_id)
-                log.masters_processed += 1
-
-            for item_data in parsed["stock_items"]:
-                _upsert_stock_item(session, item_data, company_id)
-                log.masters_processed += 1
+            for model, rows in (
+                (Ledger, parsed["ledgers"]),
+                (Unit, parsed["units"]),
+                (StockItem, parsed["stock_items"]),
+            ):
+                _upsert_masters(session, model, rows, company_id)
+                log.masters_processed += len(rows)
 
             # Transactions
+            dated = []
             for vdata in parsed["vouchers"]:
                 log.vouchers_processed += 1
                 if not vdata.get("voucher_date"):
@@ -232,18 +371,12 @@ def import_file(file_path: str | Path) -> ImportLog:
                         f"Skipped voucher {vdata.get('voucher_number')} – no date"
                     )
                     continue
-                try:
-                    _, inserted = _upsert_voucher(session, vdata, company_id)
-                    if inserted:
-                        log.vouchers_inserted += 1
-                    else:
-                        log.vouchers_updated += 1
-                except Exception as exc:
-                    warnings.append(f"Voucher error: {exc}")
-                    logger.error(f"Voucher upsert failed: {exc}")
-
-            session.commit()
+                dated.append(vdata)
+            log.vouchers_inserted, log.vouchers_updated = _bulk_upsert_vouchers(
+                session, dated, company_id, clean_bytes
+            )
 
+        bump_data_version()
         log.status = "success" if not warnings else "partial"
         logger.info(
             f"{file_path.name}: {log.vouchers_inserted} inserted, "
@@ -260,10 +393,11 @@ def import_file(file_path: str | Path) -> ImportLog:
         log.warnings = json.dumps(warnings[:100]) if warnings else None
         log.finished_at = datetime.utcnow()
 
-        # Persist log
-        with Session(engine) as session:
-            session.add(log)
-            session.commit()
-            session.refresh(log)
+        # Persist log; the id comes back with the INSERT, no refresh needed
+        with engine.begin() as conn:
+            log.id = conn.execute(
+                insert(ImportLog).returning(ImportLog.id),
+                log.model_dump(exclude={"id"}),
+            ).scalar_one()
 
     return log
@@ -13,26 +13,34 @@ pkg_factor matching strategy (in order):
 """
 from __future__ import annotations
 
-import re
-from datetime import datetime
+from bisect import bisect_left
+from collections import defaultdict
 from typing import Any
 
 from loguru import logger
+from sqlalchemy import func
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlmodel import Session, select
 
 from app.etl.mkcp_parser import parse_mkcp_files
 from app.models.order import AlternateUnit, ItemGroupMapping, VendorGroup
 from app.models.master import StockItem
 
-_WS_RE = re.compile(r"\s+")
-
 
 def _norm(name: str) -> str:
     """Normalise item name: upper-case + collapsed whitespace."""
-    return _WS_RE.sub(" ", name.strip()).upper()
+    # str.split() splits on exactly the characters \s matches, and
+    # trims both ends, without a regex pass per name
+    return " ".join(name.split()).upper()
+
+
+try:
+    from rapidfuzz.distance import Levenshtein as _rf_levenshtein
+except ImportError:  # optional C extension; pure-Python fallback below
+    _rf_levenshtein = None
 
 
-def _levenshtein(a: str, b: str) -> int:
+def _py_levenshtein(a: str, b: str) -> int:
     """Compute Levenshtein edit distance between two strings."""
     if a == b:
         return 0
@@ -58,43 +66,104 @@ def _levenshtein(a: str, b: str) -> int:
     return prev[lb]
 
 
+# rapidfuzz computes the same distance with a bit-parallel algorithm in C++
+_levenshtein = _rf_levenshtein.distance if _rf_levenshtein is not None else _py_levenshtein
+
+
+def _fuzzy_buckets(keys: list[str]) -> dict[tuple[str, int], list[tuple[int, str]]]:
+    """
+    Group the xlsx keys by (first character, length) for _fuzzy_match.
+    Each entry keeps the key's insertion rank so ties resolve as before.
+    """
+    buckets: dict[tuple[str, int], list[tuple[int, str]]] = defaultdict(list)
+    for rank, key in enumerate(keys):
+        if key:
+            buckets[key[0], len(key)].append((rank, key))
+    return buckets
+
+
 def _fuzzy_match(
     norm_db: str,
     alt_units_normed: dict[str, float],
+    buckets: dict[tuple[str, int], list[tuple[int, str]]],
     max_dist_factor: float = 0.10,
     abs_max: int = 3,
-) -> tuple[str, float] | None:
+) -> tuple[str, float, int] | None:
     """
     Find the best fuzzy match for norm_db in alt_units_normed.
 
-    Only considers candidates whose first character matches (fast pre-filter).
+    Only considers candidates whose first character matches and whose length
+    is within the threshold (read straight from buckets, see _fuzzy_buckets).
     Threshold: min(abs_max, max(2, int(len(norm_db) * max_dist_factor)))
+    Equal distances go to the key inserted first.
 
-    Returns (matched_key, factor) or None.
+    Returns (matched_key, factor, distance) or None.
     """
     if not norm_db:
         return None
     threshold = min(abs_max, max(2, int(len(norm_db) * max_dist_factor)))
     first_char = norm_db[0]
     best_key: str | None = None
+    best_rank = -1
     best_dist = threshold + 1
 
-    for xlsx_key in alt_units_normed:
-        if not xlsx_key or xlsx_key[0] != first_char:
-            continue
-        # Length gate: skip if length difference alone exceeds threshold
-        if abs(len(xlsx_key) - len(norm_db)) > threshold:
-            continue
-        dist = _levenshtein(norm_db, xlsx_key)
-        if dist < best_dist:
-            best_dist = dist
-            best_key = xlsx_key
+    for length in range(len(norm_db) - threshold, len(norm_db) + threshold + 1):
+        for rank, xlsx_key in buckets.get((first_char, length), ()):
+            dist = _levenshtein(norm_db, xlsx_key)
+            if dist < best_dist or (
+                dist == best_dist and best_key is not None and rank < best_rank
+            ):
+                best_dist = dist
+                best_rank = rank
+                best_key = xlsx_key
 
     if best_key is not None and best_dist <= threshold:
-        return best_key, alt_units_normed[best_key]
+        return best_key, alt_units_normed[best_key], best_dist
     return None
 
 
+class _PrefixIndex:
+    """
+    Prefix lookups over the xlsx keys for step 2 of _build_factor_map.
+
+    first_match(name) returns the key a linear scan in insertion order would
+    stop at first: the earliest key that is a prefix of name or has name as
+    a prefix. Keys that are prefixes of name are found by dict lookups on
+    name's own prefixes; keys extending name form a contiguous run of the
+    sorted keys, whose earliest-inserted member comes from a sparse table of
+    range minima over insertion ranks. Each lookup is O(len(name) + log M).
+    """
+
+    def __init__(self, keys: list[str]) -> None:
+        self._keys = keys
+        self._rank = {k: i for i, k in enumerate(keys)}
+        self._sorted = sorted(keys)
+        # _min[j][i] = lowest rank among _sorted[i : i + 2**j]
+        row = [self._rank[k] for k in self._sorted]
+        self._min = [row]
+        span = 1
+        while 2 * span <= len(keys):
+            row = [min(row[i], row[i + span]) for i in range(len(row) - span)]
+            self._min.append(row)
+            span *= 2
+
+    def first_match(self, name: str) -> str | None:
+        best: int | None = None
+        for end in range(len(name) + 1):
+            rank = self._rank.get(name[:end])
+            if rank is not None and (best is None or rank < best):
+                best = rank
+        lo = bisect_left(self._sorted, name)
+        hi = bisect_left(self._sorted, name + "\U0010ffff", lo)
+        if lo < hi:
+            level = (hi - lo).bit_length() - 1
+            row = self._min[level]
+            rank = min(row[lo], row[hi - (1 << level)])
+            if best is None or rank < best:
+                best = rank
+        return self._keys[best] if best is not None else None
+
+
 def _build_factor_map(
     alt_units_normed: dict[str, float],
     db_item_names: list[str],
@@ -113,34 +182,38 @@ def _build_factor_map(
     factor_map: dict[str, float] = {}
     unmatched_xlsx: set[str] = set(alt_units_normed.keys())
     fuzzy_matches: list[tuple[str, str, int]] = []
-
-    for db_name in db_item_names:
-        norm_db = _norm(db_name)
-
+    prefix_index = _PrefixIndex(list(alt_units_normed))
+    fuzzy_buckets = _fuzzy_buckets(list(alt_units_normed))
+    # Normalise every DB name in one pass up front
+    normed_names = list(map(_norm, db_item_names))
+    # The same item name recurs across companies (and in other spellings
+    # that normalise alike), so prefix/fuzzy results are kept per normalised
+    # name, misses included: (matched xlsx key, fuzzy distance or None).
+    resolved: dict[str, tuple[str, int | None] | None] = {}
+
+    for db_name, norm_db in zip(db_item_names, normed_names):
         # 1. Exact match
         if norm_db in alt_units_normed:
-            factor_map[db_name] = alt_units_normed[norm_db]
-            unmatched_xlsx.discard(norm_db)
-            continue
-
-        # 2. Prefix match
-        prefix_matched = False
-        for xlsx_key, factor in alt_units_normed.items():
-            if norm_db.startswith(xlsx_key) or xlsx_key.startswith(norm_db):
-                factor_map[db_name] = factor
-                unmatched_xlsx.discard(xlsx_key)
-                prefix_matched = True
-                break
-        if prefix_matched:
+            match = (norm_db, None)
+        elif norm_db in resolved:
+            match = resolved[norm_db]
+        else:
+            # 2. Prefix match
+            xlsx_key = prefix_index.first_match(norm_db)
+            if xlsx_key is not None:
+                match = (xlsx_key, None)
+            else:
+                # 3. Fuzzy match (Levenshtein)
+                fuzzy = _fuzzy_match(norm_db, alt_units_normed, fuzzy_buckets)
+                match = (fuzzy[0], fuzzy[2]) if fuzzy else None
+            resolved[norm_db] = match
+        if match is None:
             continue
 
-        # 3. Fuzzy match (Levenshtein)
-        fuzzy = _fuzzy_match(norm_db, alt_units_normed)
-        if fuzzy:
-            xlsx_key, factor = fuzzy
-            dist = _levenshtein(norm_db, xlsx_key)
-            factor_map[db_name] = factor
-            unmatched_xlsx.discard(xlsx_key)
+        xlsx_key, dist = match
+        factor_map[db_name] = alt_units_normed[xlsx_key]
+        unmatched_xlsx.discard(xlsx_key)
+        if dist is not None:
             fuzzy_matches.append((db_name, xlsx_key, dist))
 
     if fuzzy_matches:
@@ -159,6 +232,32 @@ def _build_factor_map(
     return factor_map
 
 
+def _upsert_rows(
+    session: Session, model, key: str, rows: list[dict], columns: tuple[str, ...]
+) -> tuple[int, int]:
+    """
+    Upsert rows keyed on the model's unique *key* column in a single
+    executemany INSERT ... ON CONFLICT DO UPDATE that rewrites *columns*
+    (and updated_at, where the table has one). Returns (added, updated).
+    """
+    if not rows:
+        return 0, 0
+    table = model.__table__
+    existing = set(session.execute(select(table.c[key])).scalars())
+    updated = sum(1 for row in rows if row[key] in existing)
+
+    # Timestamps are stamped by SQLite (CURRENT_TIMESTAMP), not per row here
+    stmt = sqlite_insert(table).values(
+        {c: func.now() for c in ("created_at", "updated_at") if c in table.c}
+    )
+    set_ = {c: stmt.excluded[c] for c in columns}
+    if "updated_at" in table.c:
+        set_["updated_at"] = func.now()
+    stmt = stmt.on_conflict_do_update(index_elements=[table.c[key]], set_=set_)
+    session.execute(stmt, rows)
+    return len(rows) - updated, updated
+
+
 def import_mkcp(data_dir: str, session: Session) -> dict[str, Any]:
     """
     Parse MKCP data files from data_dir and upsert into DB tables.
@@ -186,19 +285,11 @@ def import_mkcp(data_dir: str, session: Session) -> dict[str, Any]:
     }
 
     # ── VendorGroups ──────────────────────────────────────────────────────────
-    for g in parsed["groups"]:
-        existing = session.exec(
-            select(VendorGroup).where(VendorGroup.name == g["name"])
-        ).first()
-        if existing:
-            existing.parent = g["parent"]
-            existing.base_unit = g["base_unit"]
-            existing.guid = g["guid"]
-            session.add(existing)
-            counts["groups_updated"] += 1
-        else:
-            session.add(VendorGroup(**g))
-            counts["groups_added"] += 1
+    # vendor_groups has no updated_at, so a conflict rewrites only these
+    # fields, as the per-row update it replaced did
+    counts["groups_added"], counts["groups_updated"] = _upsert_rows(
+        session, VendorGroup, "name", parsed["groups"], ("parent", "base_unit", "guid")
+    )
 
     session.commit()
     logger.info(
@@ -207,12 +298,11 @@ def import_mkcp(data_dir: str, session: Session) -> dict[str, Any]:
     )
 
     # ── AlternateUnits — resolve against DB items ─────────────────────────────
-    # Fetch all stock item names from DB for fuzzy matching
-    db_item_names: list[str] = [
-        row[0]
-        for row in session.exec(select(StockItem.name)).all()
-        if row[0]
-    ]
+    # Fetch all stock item names from DB for fuzzy matching (a single-column
+    # select yields the names themselves, not rows)
+    db_item_names: list[str] = list(
+        session.exec(select(StockItem.name).where(StockItem.name != "")).all()
+    )
 
     # Build resolved {db_item_name → factor} (handles prefix matching)
     if db_item_names and alt_units_normed:
@@ -233,18 +323,16 @@ def import_mkcp(data_dir: str, session: Session) -> dict[str, Any]:
     unmatched_count = len(alt_units_normed) - len(factor_map)
     counts["unmatched_xlsx_items"] = max(0, unmatched_count)
 
-    for item_name, factor in all_to_store.items():
-        existing = session.exec(
-            select(AlternateUnit).where(AlternateUnit.item_name == item_name)
-        ).first()
-        if existing:
-            existing.pkg_factor = factor
-            existing.updated_at = datetime.utcnow()
-            session.add(existing)
-            counts["alt_units_updated"] += 1
-        else:
-            session.add(AlternateUnit(item_name=item_name, pkg_factor=factor))
-            counts["alt_units_added"] += 1
+    counts["alt_units_added"], counts["alt_units_updated"] = _upsert_rows(
+        session,
+        AlternateUnit,
+        "item_name",
+        [
+            {"item_name": name, "pkg_factor": factor}
+            for name, factor in all_to_store.items()
+        ],
+        ("pkg_factor",),
+    )
 
     session.commit()
     logger.info(
@@ -254,18 +342,16 @@ def import_mkcp(data_dir: str, session: Session) -> dict[str, Any]:
     )
 
     # ── ItemGroupMappings ─────────────────────────────────────────────────────
-    for item_name, group_name in parsed["item_groups"].items():
-        existing = session.exec(
-            select(ItemGroupMapping).where(ItemGroupMapping.item_name == item_name)
-        ).first()
-        if existing:
-            existing.group_name = group_name
-            existing.updated_at = datetime.utcnow()
-            session.add(existing)
-            counts["item_groups_updated"] += 1
-        else:
-            session.add(ItemGroupMapping(item_name=item_name, group_name=group_name))
-            counts["item_groups_added"] += 1
+    counts["item_groups_added"], counts["item_groups_updated"] = _upsert_rows(
+        session,
+        ItemGroupMapping,
+        "item_name",
+        [
+            {"item_name": name, "group_name": group}
+            for name, group in parsed["item_groups"].items()
+        ],
+        ("group_name",),
+    )
 
     session.commit()
     logger.info(
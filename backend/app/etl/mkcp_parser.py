@@ -1,9 +1,9 @@
 """
 Parser for MKCP Tally XML exports.
 
-All five source files are UTF-16 LE encoded (BOM present).
-Python's xml.etree.ElementTree handles the BOM automatically when
-the file is opened in binary mode and bytes passed to fromstring().
+All five source files are UTF-16 LE encoded (BOM present). They are
+streamed through lxml's pull parser one record element at a time, so
+STOCK ITEM.xml (often 50–200 MB) is never held in memory as a whole.
 
 Files expected in MKCP_DATA_DIR:
   STOCK GROUPS.xml        → VendorGroup rows
@@ -23,19 +23,31 @@ Items with no group mapping fall under the virtual group "Togo Cycles".
 """
 from __future__ import annotations
 
+import codecs
+import os
 import re
-import xml.etree.ElementTree as ET
+from collections.abc import Callable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
 from pathlib import Path
-from typing import Optional
+from typing import Any, Optional
 
 from loguru import logger
+from lxml import etree
 
 from app.etl.pkg_converter import load_pkg_conversion
 
-# Illegal XML 1.0 character references (decimal &#N; and hex &#xN;)
-_DECIMAL_REF_RE = re.compile(r"&#(\d+);")
-_HEX_REF_RE = re.compile(r"&#x([0-9A-Fa-f]+);")
-_RAW_CTRL_RE = re.compile(r"[\x00-\x08\x0B\x0C\x0E-\x1F\x7F]")
+# Character references (decimal &#N; and hex &#xN;) in one pattern; its
+# literal "&#" prefix lets the regex engine skip ahead between matches.
+_CHAR_REF_RE = re.compile(r"&#(?:(\d+)|x([0-9A-Fa-f]+));")
+
+_VALID_CTRL = {0x09, 0x0A, 0x0D}  # TAB, LF, CR are the only allowed C0 controls
+
+# str.translate table deleting raw characters that are illegal in XML 1.0
+_RAW_CTRL_DELETE = dict.fromkeys(
+    c for c in [*range(0x20), 0x7F] if c not in _VALID_CTRL
+)
+
+_READ_CHUNK = 1 << 20  # bytes read per parser feed
 
 # Item name suffix pattern: "BELL CROWN MINI ( 300 PCS )" → ("BELL CROWN MINI", 300.0)
 _PKG_FACTOR_RE = re.compile(
@@ -46,93 +58,141 @@ _PKG_FACTOR_RE = re.compile(
 # HSN/rate suffix in PARENT field: "BICYCLE ( 87120010 )" → "BICYCLE"
 _PARENT_SUFFIX_RE = re.compile(r"\s*\(.*?\)\s*$")
 
-# Normalise whitespace for case-insensitive name lookup
-_WS_RE = re.compile(r"\s+")
-
 
 def _norm(name: str) -> str:
     """Normalise a name for fuzzy matching: upper-case, collapsed whitespace."""
-    return _WS_RE.sub(" ", name.strip()).upper()
+    # str.split() splits on the same characters as \s and trims both ends
+    return " ".join(name.split()).upper()
 
 
-def _strip_invalid_xml(content: str) -> str:
-    """Remove characters that are illegal in XML 1.0 before parsing."""
-    _VALID = {0x09, 0x0A, 0x0D}  # TAB, LF, CR are the only allowed C0 controls
+def _drop_illegal_ref(m: re.Match) -> str:
+    code = int(m.group(1)) if m.group(1) is not None else int(m.group(2), 16)
+    if code in _VALID_CTRL or code >= 0x20:
+        return m.group(0)
+    return ""
 
-    def _dec(m: re.Match) -> str:
-        code = int(m.group(1))
-        if code in _VALID or code >= 0x20:
-            return m.group(0)
-        return ""
-
-    def _hex(m: re.Match) -> str:
-        code = int(m.group(1), 16)
-        if code in _VALID or code >= 0x20:
-            return m.group(0)
-        return ""
 
-    content = _DECIMAL_REF_RE.sub(_dec, content)
-    content = _HEX_REF_RE.sub(_hex, content)
-    content = _RAW_CTRL_RE.sub("", content)
-    return content
+def _strip_invalid_xml(content: str) -> str:
+    """Remove characters that are illegal in XML 1.0 before parsing."""
+    content = _CHAR_REF_RE.sub(_drop_illegal_ref, content)
+    return content.translate(_RAW_CTRL_DELETE)
 
 
 # ── Low-level helpers ─────────────────────────────────────────────────────────
 
 
-def parse_utf16_xml(path: str) -> ET.Element:
+def iter_utf16_xml(path: str, tag: str) -> Iterator[etree._Element]:
     """
-    Parse a UTF-16 LE Tally XML file.
+    Stream the <tag> elements of a UTF-16 LE Tally XML file.
     - Decodes UTF-16 BOM automatically.
     - Strips XML-illegal control characters (Tally sometimes outputs &#x1B; etc.).
     - Falls back to UTF-8 if no BOM.
+    Each element is cleared once the caller moves on to the next one.
     """
-    with open(path, "rb") as f:
-        raw = f.read()
-
-    if raw[:2] in (b"\xff\xfe", b"\xfe\xff"):
-        content = raw.decode("utf-16")
-    else:
-        content = raw.decode("utf-8", errors="replace")
-
-    # Strip XML declaration (ET.fromstring chokes on encoding="utf-16" in a str)
-    if content.lstrip().startswith("<?xml"):
-        end = content.index("?>") + 2
-        content = content[end:].lstrip()
-
-    # Remove illegal control characters before parsing
-    content = _strip_invalid_xml(content)
-
-    return ET.fromstring(content)
-
-
-def _text(el: Optional[ET.Element]) -> str:
+    parser = etree.XMLPullParser(events=("end",), tag=tag, huge_tree=True)
+
+    try:
+        with open(path, "rb") as f:
+            bom = f.read(2)
+            encoding = "utf-16" if bom in (b"\xff\xfe", b"\xfe\xff") else "utf-8"
+            decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+
+            raw = f.read(_READ_CHUNK)
+            content = decoder.decode(bom) + decoder.decode(raw)
+            while raw and _in_declaration(content):
+                raw = f.read(_READ_CHUNK)
+                content += decoder.decode(raw)
+            # Strip XML declaration (lxml rejects encoding="utf-16" in a str)
+            if content.lstrip().startswith("<?xml"):
+                end = content.index("?>") + 2
+                content = content[end:].lstrip()
+
+            carry = ""
+            while raw:
+                content = carry + content
+                # Hold back a trailing "&#..." so a character reference split
+                # across two reads is still recognised by _strip_invalid_xml
+                cut = content.rfind("&")
+                if cut != -1 and ";" not in content[cut:]:
+                    content, carry = content[:cut], content[cut:]
+                else:
+                    carry = ""
+
+                # Remove illegal control characters before parsing
+                parser.feed(_strip_invalid_xml(content))
+                yield from _drain(parser)
+
+                raw = f.read(_READ_CHUNK)
+                content = decoder.decode(raw, final=not raw)
+
+        parser.feed(_strip_invalid_xml(carry + content))
+        parser.close()
+        yield from _drain(parser)
+    except etree.XMLSyntaxError as exc:
+        # lxml's error does not pickle, and parse_mkcp_files may run this in
+        # a worker process
+        raise ValueError(f"XML parse error: {exc}") from exc
+
+
+def _in_declaration(text: str) -> bool:
+    """Whether text may end part-way through a leading XML declaration."""
+    text = text.lstrip()
+    return "<?xml".startswith(text) or (text.startswith("<?xml") and "?>" not in text)
+
+
+def _drain(parser: etree.XMLPullParser) -> Iterator[etree._Element]:
+    for _, el in parser.read_events():
+        yield el
+        # Free the finished record and everything parsed before it
+        el.clear()
+        node = el
+        while node is not None:
+            while node.getprevious() is not None:
+                del node.getparent()[0]
+            node = node.getparent()
+
+
+def _text(el: Optional[etree._Element]) -> str:
     """Return stripped text of an element, or ''."""
     if el is None:
         return ""
     return (el.text or "").strip()
 
 
+def _child_text(el: etree._Element, tag: str) -> str:
+    """Stripped text of the first <tag> child, or '' (lxml's find() is slower)."""
+    return _text(next(el.iterchildren(tag), None))
+
+
+def _child_texts(el: etree._Element) -> dict[str, str]:
+    """Stripped text of the first child of each tag, read in one pass."""
+    texts: dict[str, str] = {}
+    for child in el:
+        if child.tag not in texts:
+            texts[child.tag] = (child.text or "").strip()
+    return texts
+
+
 # ── Stock groups ──────────────────────────────────────────────────────────────
 
 
-def parse_stock_groups(root: ET.Element) -> list[dict]:
+def parse_stock_groups(path: str) -> list[dict]:
     """
-    Extract VendorGroup records from all STOCKGROUP elements.
+    Extract VendorGroup records from all STOCKGROUP elements of STOCK GROUPS.xml.
     Returns list of dicts: {name, parent, base_unit, guid}
     """
     groups: list[dict] = []
     seen: set[str] = set()
 
-    for el in root.iter("STOCKGROUP"):
+    for el in iter_utf16_xml(path, "STOCKGROUP"):
         name = (el.get("NAME") or "").strip()
         if not name or name in seen:
             continue
         seen.add(name)
 
-        parent = _text(el.find("PARENT")) or None
-        base_unit = _text(el.find("BASEUNITS")) or "PCS"
-        guid = _text(el.find("GUID")) or None
+        parent = _child_text(el, "PARENT") or None
+        base_unit = _child_text(el, "BASEUNITS") or "PCS"
+        guid = _child_text(el, "GUID") or None
 
         groups.append(
             {
@@ -149,7 +209,7 @@ def parse_stock_groups(root: ET.Element) -> list[dict]:
 # ── Price list → alternate units (secondary source) ───────────────────────────
 
 
-def parse_price_list(root: ET.Element) -> dict[str, float]:
+def parse_price_list(path: str) -> dict[str, float]:
     """
     Extract package factor (items per package) from PRICE LIST ST.xml.
 
@@ -164,7 +224,7 @@ def parse_price_list(root: ET.Element) -> dict[str, float]:
     """
     alt_units: dict[str, float] = {}
 
-    for item_el in root.iter("STOCKITEM"):
+    for item_el in iter_utf16_xml(path, "STOCKITEM"):
         raw_name = (item_el.get("NAME") or "").strip()
         if not raw_name:
             continue
@@ -188,13 +248,13 @@ def parse_price_list(root: ET.Element) -> dict[str, float]:
         kona_factor: Optional[float] = None
         latest_date: str = ""
 
-        for pl_el in item_el.findall("FULLPRICELIST.LIST"):
-            pricelevel = _text(pl_el.find("PRICELEVEL"))
-            if pricelevel.lower() != "kona":
+        for pl_el in item_el.iterchildren("FULLPRICELIST.LIST"):
+            fields = _child_texts(pl_el)
+            if fields.get("PRICELEVEL", "").lower() != "kona":
                 continue
 
-            date_str = _text(pl_el.find("DATE"))
-            rate_str = _text(pl_el.find("RATE"))
+            date_str = fields.get("DATE", "")
+            rate_str = fields.get("RATE", "")
 
             if not rate_str:
                 continue
@@ -222,9 +282,10 @@ def parse_price_list(root: ET.Element) -> dict[str, float]:
 # ── Item group mapping ────────────────────────────────────────────────────────
 
 
-def parse_item_groups(root: ET.Element) -> dict[str, str]:
+def parse_item_groups(path: str) -> dict[str, str]:
     """
-    Build item_name → group_name mapping from STOCKITEM PARENT element.
+    Build item_name → group_name mapping from the STOCKITEM PARENT elements
+    of STOCK ITEM.xml.
 
     Tally appends an HSN code in parentheses to group names in the PARENT field:
         PARENT = "BICYCLE ( 87120010 )"  →  group = "BICYCLE"
@@ -233,13 +294,12 @@ def parse_item_groups(root: ET.Element) -> dict[str, str]:
     """
     mapping: dict[str, str] = {}
 
-    for item_el in root.iter("STOCKITEM"):
+    for item_el in iter_utf16_xml(path, "STOCKITEM"):
         name = (item_el.get("NAME") or "").strip()
         if not name:
             continue
 
-        parent_el = item_el.find("PARENT")
-        raw_group = _text(parent_el)
+        raw_group = _child_text(item_el, "PARENT")
         if not raw_group:
             continue
 
@@ -253,6 +313,27 @@ def parse_item_groups(root: ET.Element) -> dict[str, str]:
 # ── Master entry point ────────────────────────────────────────────────────────
 
 
+def _run_parallel(jobs: dict[str, tuple[Callable[[str], Any], str]]) -> dict[str, Future]:
+    """
+    Run each fn(arg) job in its own worker process and return the finished
+    futures. Jobs return plain dicts/lists, which are cheap to send back.
+    On a single-CPU host the jobs simply run here, in order.
+    """
+    workers = min(len(jobs), os.cpu_count() or 1)
+    if workers < 2:
+        done: dict[str, Future] = {}
+        for key, (fn, arg) in jobs.items():
+            done[key] = fut = Future()
+            try:
+                fut.set_result(fn(arg))
+            except Exception as exc:
+                fut.set_exception(exc)
+        return done
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return {key: pool.submit(fn, arg) for key, (fn, arg) in jobs.items()}
+
+
 def parse_mkcp_files(data_dir: str) -> dict:
     """
     Parse all relevant MKCP data files and return structured data.
@@ -277,18 +358,34 @@ def parse_mkcp_files(data_dir: str) -> dict:
         "source_counts": {"xlsx": 0, "price_list": 0},
     }
 
+    pl_file = data_path / "PRICE LIST ST.xml"
+    sg_file = data_path / "STOCK GROUPS.xml"
+    si_file = data_path / "STOCK ITEM.xml"
+
+    # The files are independent and parsing is CPU-bound, so each one is
+    # parsed in its own worker process; results are collected below.
+    jobs: dict[str, tuple[Callable[[str], Any], str]] = {
+        "xlsx": (load_pkg_conversion, data_dir),
+    }
+    for key, fn, path in (
+        ("price_list", parse_price_list, pl_file),
+        ("groups", parse_stock_groups, sg_file),
+        ("item_groups", parse_item_groups, si_file),
+    ):
+        if path.exists():
+            jobs[key] = (fn, str(path))
+    parsed = _run_parallel(jobs)
+
     # ── 1. PKG CONVERSION.xlsx — PRIMARY pkg_factor source ────────────────────
-    xlsx_units = load_pkg_conversion(data_dir)   # returns {UPPER_NAME → factor}
+    xlsx_units = parsed["xlsx"].result()   # returns {UPPER_NAME → factor}
     result["source_counts"]["xlsx"] = len(xlsx_units)
     logger.info(f"MKCP: {len(xlsx_units)} pkg_factors from PKG CONVERSION.xlsx")
 
     # ── 2. PRICE LIST ST.xml — SECONDARY pkg_factor source ────────────────────
     price_list_units: dict[str, float] = {}
-    pl_file = data_path / "PRICE LIST ST.xml"
-    if pl_file.exists():
+    if "price_list" in parsed:
         try:
-            root = parse_utf16_xml(str(pl_file))
-            price_list_units = parse_price_list(root)   # keys are UPPER-normed
+            price_list_units = parsed["price_list"].result()   # keys are UPPER-normed
             logger.info(
                 f"MKCP: {len(price_list_units)} pkg_factors from {pl_file.name}"
             )
@@ -309,11 +406,9 @@ def parse_mkcp_files(data_dir: str) -> dict:
     )
 
     # ── Stock groups (STOCK GROUPS.xml) ──────────────────────────────────────
-    sg_file = data_path / "STOCK GROUPS.xml"
-    if sg_file.exists():
+    if "groups" in parsed:
         try:
-            root = parse_utf16_xml(str(sg_file))
-            result["groups"] = parse_stock_groups(root)
+            result["groups"] = parsed["groups"].result()
             logger.info(
                 f"MKCP: parsed {len(result['groups'])} stock groups from {sg_file.name}"
             )
@@ -323,11 +418,9 @@ def parse_mkcp_files(data_dir: str) -> dict:
         logger.warning(f"MKCP: {sg_file} not found — skipping stock groups")
 
     # ── Item → group mapping (STOCK ITEM.xml) ─────────────────────────────────
-    si_file = data_path / "STOCK ITEM.xml"
-    if si_file.exists():
+    if "item_groups" in parsed:
         try:
-            root = parse_utf16_xml(str(si_file))
-            result["item_groups"] = parse_item_groups(root)
+            result["item_groups"] = parsed["item_groups"].result()
             logger.info(
                 f"MKCP: parsed {len(result['item_groups'])} item→group mappings "
                 f"from {si_file.name}"
@@ -26,41 +26,55 @@ Canonical Tally XML structure assumed:
 
 from __future__ import annotations
 
+import functools
 import io
+import os
 import re
+from concurrent.futures import ProcessPoolExecutor
 from datetime import date, datetime
 from typing import Any, Optional
-from xml.etree import ElementTree as ET
 
 from loguru import logger
+from lxml import etree as ET
 
 # ── helpers ──────────────────────────────────────────────────────────────────
 
+# libxml2 options shared by the DOM and streaming parses: comments and
+# processing instructions are dropped (as ElementTree did, so element text
+# is not split around them) and huge_tree lifts the limits on text size and
+# nesting depth that large exports can hit.
+_PARSER_OPTIONS = {"remove_comments": True, "remove_pis": True, "huge_tree": True}
 
-def _txt(el: ET.Element, tag: str, default: str = "") -> str:
-    """Return stripped text of first child with given tag, or default."""
-    child = el.find(tag)
-    if child is not None and child.text:
-        return child.text.strip()
-    return default
 
-
-def _float(el: ET.Element, tag: str, default: float = 0.0) -> float:
-    """Parse float from child tag text."""
-    raw = _txt(el, tag)
-    if not raw:
-        return default
-    # Tally sometimes writes amounts with trailing spaces or commas
-    raw = raw.replace(",", "").strip()
-    try:
-        return float(raw)
-    except ValueError:
-        return default
+def _child_texts(el: ET._Element) -> dict[str, str]:
+    """
+    Stripped text of the first child of each tag, read in one pass, so a
+    parser looks fields up by tag instead of scanning the children per field.
+    """
+    texts: dict[str, str] = {}
+    for child in el:
+        if child.tag not in texts:
+            texts[child.tag] = (child.text or "").strip()
+    return texts
 
 
 def _date(raw: str) -> Optional[date]:
     """Parse Tally date formats: YYYYMMDD or YYYY-MM-DD or DD-MM-YYYY."""
     raw = raw.strip()
+    # Fixed-width forms are sliced directly; whatever they reject (other
+    # widths, an impossible month or day) still goes through strptime
+    if raw.isascii():
+        try:
+            if len(raw) == 8 and raw.isdigit():
+                return date(int(raw[:4]), int(raw[4:6]), int(raw[6:]))
+            if len(raw) == 10 and raw[:4].isdigit() and raw[5:7].isdigit() and raw[8:].isdigit():
+                if raw[4] == raw[7] == "-":
+                    return date(int(raw[:4]), int(raw[5:7]), int(raw[8:]))
+            if len(raw) == 10 and raw[:2].isdigit() and raw[3:5].isdigit() and raw[6:].isdigit():
+                if raw[2] == raw[5] == "-":
+                    return date(int(raw[6:]), int(raw[3:5]), int(raw[:2]))
+        except ValueError:
+            pass
     for fmt in ("%Y%m%d", "%Y-%m-%d", "%d-%m-%Y", "%d/%m/%Y"):
         try:
             return datetime.strptime(raw, fmt).date()
@@ -70,17 +84,20 @@ def _date(raw: str) -> Optional[date]:
     return None
 
 
-def _bool(el: ET.Element, tag: str) -> bool:
-    """Return True if child tag text is 'Yes' or 'TRUE'."""
-    val = _txt(el, tag).upper()
-    return val in ("YES", "TRUE", "1")
+def _bool(val: str) -> bool:
+    """Return True if a child tag's text is 'Yes' or 'TRUE'."""
+    return val.upper() in ("YES", "TRUE", "1")
 
 
-def _el_to_xml_str(el: ET.Element) -> str:
+def _el_to_xml_str(el: ET._Element) -> str:
     """Serialise an element back to a compact XML string."""
     return ET.tostring(el, encoding="unicode", xml_declaration=False)
 
 
+# Leading number (with optional sign/decimal) then optional unit
+_QTY_RE = re.compile(r'^([+-]?\s*[\d.,]+)\s*([A-Za-z].*)?\s*$')
+
+
 def _parse_qty(raw: str) -> tuple[Optional[float], Optional[str]]:
     """
     Parse Tally quantity strings like '10 PC', ' 20 PC', '5.5 KGS'.
@@ -89,8 +106,7 @@ def _parse_qty(raw: str) -> tuple[Optional[float], Optional[str]]:
     raw = raw.strip()
     if not raw:
         return None, None
-    # Match leading number (with optional sign/decimal) then optional unit
-    m = re.match(r'^([+-]?\s*[\d.,]+)\s*([A-Za-z].*)?\s*$', raw)
+    m = _QTY_RE.match(raw)
     if m:
         num_str = m.group(1).replace(",", "").replace(" ", "")
         unit_str = (m.group(2) or "").strip() or None
@@ -143,6 +159,9 @@ _VOUCHER_TYPE_MAP: dict[str, str] = {
 }
 
 
+# The three normalisers below are pure and see a handful of distinct values
+# across a whole export, so their results are memoised.
+@functools.lru_cache(maxsize=512)
 def _normalize_voucher_type(raw: str) -> str:
     """Normalize voucher type to consistent title-case form."""
     if not raw:
@@ -153,30 +172,32 @@ def _normalize_voucher_type(raw: str) -> str:
 # ── Master parsers ────────────────────────────────────────────────────────────
 
 
-def parse_company(el: ET.Element) -> dict[str, Any]:
+def parse_company(el: ET._Element) -> dict[str, Any]:
     """Parse a <COMPANY> element from Master.xml."""
-    name = el.get("NAME") or _txt(el, "NAME") or _txt(el, "BASICCOMPANYNAME")
+    fields = _child_texts(el)
+    name = el.get("NAME") or fields.get("NAME", "") or fields.get("BASICCOMPANYNAME", "")
     return {
         "name": name,
-        "gstin": _txt(el, "GSTIN") or _txt(el, "GSTREGISTRATIONNUMBER"),
-        "address": _txt(el, "ADDRESS") or _txt(el, "BASICCOMPANYFORMALNAME"),
-        "state": _txt(el, "BASICCOMPANYSTATE") or _txt(el, "STATENAME"),
-        "pincode": _txt(el, "PINCODE"),
-        "email": _txt(el, "EMAIL"),
-        "phone": _txt(el, "PHONE"),
+        "gstin": fields.get("GSTIN", "") or fields.get("GSTREGISTRATIONNUMBER", ""),
+        "address": fields.get("ADDRESS", "") or fields.get("BASICCOMPANYFORMALNAME", ""),
+        "state": fields.get("BASICCOMPANYSTATE", "") or fields.get("STATENAME", ""),
+        "pincode": fields.get("PINCODE", ""),
+        "email": fields.get("EMAIL", ""),
+        "phone": fields.get("PHONE", ""),
     }
 
 
-def parse_ledger(el: ET.Element) -> dict[str, Any]:
+def parse_ledger(el: ET._Element) -> dict[str, Any]:
     """Parse a <LEDGER> element from Master.xml."""
-    name = el.get("NAME") or _txt(el, "NAME")
+    fields = _child_texts(el)
+    name = el.get("NAME") or fields.get("NAME", "")
 
     # Determine ledger type from parent group
-    parent = _txt(el, "PARENT")
+    parent = fields.get("PARENT", "")
     ledger_type = _infer_ledger_type(parent)
 
     # Opening balance may be plain numeric or "9 PC" style - take first number
-    opening_raw = _txt(el, "OPENINGBALANCE")
+    opening_raw = fields.get("OPENINGBALANCE", "")
     if opening_raw:
         qty, _ = _parse_qty(opening_raw)
         opening_balance = qty if qty is not None else 0.0
@@ -186,19 +207,20 @@ def parse_ledger(el: ET.Element) -> dict[str, Any]:
     return {
         "name": name,
         "parent_group": parent,
-        "mailing_name": _txt(el, "MAILINGNAME"),
-        "gstin": _txt(el, "PARTYGSTIN") or _txt(el, "GSTIN"),
-        "pan": _txt(el, "INCOMETAXNUMBER"),
-        "email": _txt(el, "EMAIL"),
-        "phone": _txt(el, "LEDPHONE"),
-        "address": _txt(el, "ADDRESS"),
-        "state": _txt(el, "STATENAME"),
-        "pincode": _txt(el, "PINCODE"),
+        "mailing_name": fields.get("MAILINGNAME", ""),
+        "gstin": fields.get("PARTYGSTIN", "") or fields.get("GSTIN", ""),
+        "pan": fields.get("INCOMETAXNUMBER", ""),
+        "email": fields.get("EMAIL", ""),
+        "phone": fields.get("LEDPHONE", ""),
+        "address": fields.get("ADDRESS", ""),
+        "state": fields.get("STATENAME", ""),
+        "pincode": fields.get("PINCODE", ""),
         "opening_balance": opening_balance,
         "ledger_type": ledger_type,
     }
 
 
+@functools.lru_cache(maxsize=512)
 def _infer_ledger_type(parent_group: str) -> str:
     """Infer a simplified ledger type from Tally's parent group."""
     pg = parent_group.lower()
@@ -225,14 +247,15 @@ def _infer_ledger_type(parent_group: str) -> str:
     return "Other"
 
 
-def parse_unit(el: ET.Element) -> dict[str, Any]:
+def parse_unit(el: ET._Element) -> dict[str, Any]:
     """Parse a <UNIT> element from Master.xml."""
-    name = el.get("NAME") or _txt(el, "NAME")
+    fields = _child_texts(el)
+    name = el.get("NAME") or fields.get("NAME", "")
     return {
         "name": name,
-        "symbol": _txt(el, "ORIGINALNAME") or name,
-        "formal_name": _txt(el, "FORMALNAME"),
-        "is_simple_unit": _bool(el, "ISSIMPLEUNIT") if el.find("ISSIMPLEUNIT") is not None else True,
+        "symbol": fields.get("ORIGINALNAME", "") or name,
+        "formal_name": fields.get("FORMALNAME", ""),
+        "is_simple_unit": _bool(fields.get("ISSIMPLEUNIT", "")) if "ISSIMPLEUNIT" in fields else True,
     }
 
 
@@ -249,27 +272,29 @@ _UNIT_NORMALISE: dict[str, str] = {
 }
 
 
+@functools.lru_cache(maxsize=512)
 def _norm_unit(raw: str) -> str:
     """Normalise Tally unit abbreviations to a canonical form (PC→PCS, NOS→PCS, etc.)."""
     upper = raw.strip().upper()
     return _UNIT_NORMALISE.get(upper, upper)
 
 
-def parse_stock_item(el: ET.Element) -> dict[str, Any]:
+def parse_stock_item(el: ET._Element) -> dict[str, Any]:
     """Parse a <STOCKITEM> element from Master.xml."""
-    name = el.get("NAME") or _txt(el, "NAME")
+    fields = _child_texts(el)
+    name = el.get("NAME") or fields.get("NAME", "")
 
     # GST details may be in GSTDETAILS.LIST or direct children
-    gst_applicable = _bool(el, "GSTAPPLICABLE") or _txt(el, "ISGSTAPPLICABLE").upper() == "YES"
-    hsn = _txt(el, "HSNCODE") or _txt(el, "HSN")
-    gst_rate_raw = _txt(el, "TAXRATE") or _txt(el, "GSTRATE")
+    gst_applicable = _bool(fields.get("GSTAPPLICABLE", "")) or fields.get("ISGSTAPPLICABLE", "").upper() == "YES"
+    hsn = fields.get("HSNCODE", "") or fields.get("HSN", "")
+    gst_rate_raw = fields.get("TAXRATE", "") or fields.get("GSTRATE", "")
     try:
         gst_rate = float(gst_rate_raw) if gst_rate_raw else None
     except ValueError:
         gst_rate = None
 
     # Opening balance: Tally format is "9 PC" - extract numeric part
-    opening_raw = _txt(el, "OPENINGBALANCE")
+    opening_raw = fields.get("OPENINGBALANCE", "")
     if opening_raw:
         opening_qty, _ = _parse_qty(opening_raw)
         opening_balance = opening_qty if opening_qty is not None else 0.0
@@ -277,25 +302,25 @@ def parse_stock_item(el: ET.Element) -> dict[str, Any]:
         opening_balance = 0.0
 
     # Opening value: may be negative in Tally (credit side) – take abs
-    opening_value_raw = _txt(el, "OPENINGVALUE")
+    opening_value_raw = fields.get("OPENINGVALUE", "")
     try:
         opening_value = abs(float(opening_value_raw.replace(",", ""))) if opening_value_raw else 0.0
     except ValueError:
         opening_value = 0.0
 
     # Normalise base unit: "PC" → "PCS", "NOS" → "PCS" etc.
-    raw_unit = _txt(el, "BASEUNITS") or _txt(el, "UNITS")
+    raw_unit = fields.get("BASEUNITS", "") or fields.get("UNITS", "")
     norm_unit = _norm_unit(raw_unit) if raw_unit else "PCS"
 
     return {
         "name": name,
         "unit_name": norm_unit,
         "base_units": norm_unit,
-        "category": _txt(el, "CATEGORY"),
+        "category": fields.get("CATEGORY", ""),
         "gst_applicable": gst_applicable,
         "hsn_code": hsn,
         "gst_rate": gst_rate,
-        "standard_rate": _parse_rate(_txt(el, "STANDARDRATE")) if _txt(el, "STANDARDRATE") else None,
+        "standard_rate": _parse_rate(fields["STANDARDRATE"]) if fields.get("STANDARDRATE") else None,
         "opening_balance": opening_balance,
         "opening_value": opening_value,
     }
@@ -304,29 +329,31 @@ def parse_stock_item(el: ET.Element) -> dict[str, Any]:
 # ── Transaction parser ────────────────────────────────────────────────────────
 
 
-def parse_voucher(el: ET.Element) -> dict[str, Any]:
+def parse_voucher(el: ET._Element, include_raw_xml: bool = True) -> dict[str, Any]:
     """
     Parse a <VOUCHER> element from Transactions.xml.
 
     Returns a dict with keys matching the Voucher model plus a
-    'lines' key containing a list of VoucherLine dicts.
+    'lines' key containing a list of VoucherLine dicts. With
+    include_raw_xml=False the element is not serialised and raw_xml is None.
     """
-    voucher_number = el.get("VOUCHERNUMBER") or _txt(el, "VOUCHERNUMBER")
-    voucher_type_raw = el.get("VOUCHERTYPENAME") or _txt(el, "VOUCHERTYPENAME")
+    fields = _child_texts(el)
+    voucher_number = el.get("VOUCHERNUMBER") or fields.get("VOUCHERNUMBER", "")
+    voucher_type_raw = el.get("VOUCHERTYPENAME") or fields.get("VOUCHERTYPENAME", "")
     voucher_type = _normalize_voucher_type(voucher_type_raw or "")
 
-    date_raw = el.get("DATE") or _txt(el, "DATE")
+    date_raw = el.get("DATE") or fields.get("DATE", "")
     voucher_date = _date(date_raw) if date_raw else None
 
-    party_name = _txt(el, "PARTYNAME") or el.get("PARTYNAME")
-    party_ledger = _txt(el, "PARTYLEDGERNAME") or party_name
+    party_name = fields.get("PARTYNAME", "") or el.get("PARTYNAME")
+    party_ledger = fields.get("PARTYLEDGERNAME", "") or party_name
 
-    irn = _txt(el, "IRN") or None
-    ack_no = _txt(el, "IRNACKNO") or None
-    ack_date = _txt(el, "IRNACKDATE") or None
+    irn = fields.get("IRN", "") or None
+    ack_no = fields.get("IRNACKNO", "") or None
+    ack_date = fields.get("IRNACKDATE", "") or None
 
     # Amount: use VOUCHERTOTAL, else compute from ledger entries later
-    amount_raw = _txt(el, "VOUCHERTOTAL") or _txt(el, "AMOUNT")
+    amount_raw = fields.get("VOUCHERTOTAL", "") or fields.get("AMOUNT", "")
     try:
         amount = float(amount_raw.replace(",", "")) if amount_raw else 0.0
     except ValueError:
@@ -334,25 +361,25 @@ def parse_voucher(el: ET.Element) -> dict[str, Any]:
 
     # GST / registration
     gstin = (
-        _txt(el, "GSTREGISTRATIONNUMBER")
-        or _txt(el, "GSTNO")
-        or _txt(el, "CMPGSTIN")
+        fields.get("GSTREGISTRATIONNUMBER", "")
+        or fields.get("GSTNO", "")
+        or fields.get("CMPGSTIN", "")
     )
-    place_of_supply = _txt(el, "PLACEOFSUPPLY") or _txt(el, "DESTINATIONSTATE")
-    billing_city = _txt(el, "BILLTOPLACE") or _txt(el, "SHIPCITY")
+    place_of_supply = fields.get("PLACEOFSUPPLY", "") or fields.get("DESTINATIONSTATE", "")
+    billing_city = fields.get("BILLTOPLACE", "") or fields.get("SHIPCITY", "")
 
     # Reference
-    ref_no = _txt(el, "REFERENCE") or _txt(el, "REFNO")
-    due_date_raw = _txt(el, "DUEDATE") or _txt(el, "BILLDATE")
+    ref_no = fields.get("REFERENCE", "") or fields.get("REFNO", "")
+    due_date_raw = fields.get("DUEDATE", "") or fields.get("BILLDATE", "")
     due_date = _date(due_date_raw) if due_date_raw else None
 
     is_cancelled = el.get("ISCANCELLED", "").upper() in ("YES", "TRUE") or \
-                   _bool(el, "ISCANCELLED")
+                   _bool(fields.get("ISCANCELLED", ""))
 
-    narration = _txt(el, "NARRATION")
+    narration = fields.get("NARRATION", "")
 
     # Composite dedup key (used when IRN is absent)
-    company_hint = _txt(el, "CMPNAME") or ""
+    company_hint = fields.get("CMPNAME", "")
     dedup_key = f"{voucher_type}|{voucher_number}|{company_hint}|{date_raw}"
 
     # --- Ledger lines ---
@@ -360,12 +387,17 @@ def parse_voucher(el: ET.Element) -> dict[str, Any]:
 
     # If amount is 0, compute from lines (max of debit/credit side)
     if amount == 0.0 and lines:
-        debit_total = sum(l["amount"] for l in lines if l["amount"] > 0)
-        credit_total = abs(sum(l["amount"] for l in lines if l["amount"] < 0))
+        debit_total = credit_total = 0.0
+        for l in lines:
+            line_amount = l["amount"]
+            if line_amount > 0:
+                debit_total += line_amount
+            elif line_amount < 0:
+                credit_total -= line_amount
         amount = max(debit_total, credit_total)
 
     # Raw XML for drilldown
-    raw_xml = _el_to_xml_str(el)
+    raw_xml = _el_to_xml_str(el) if include_raw_xml else None
 
     return {
         "voucher_number": voucher_number or "",
@@ -390,10 +422,12 @@ def parse_voucher(el: ET.Element) -> dict[str, Any]:
     }
 
 
-_TAX_HEADS = {"cgst", "sgst", "igst", "cess", "tax", "gst", "tds", "tcs"}
+# A ledger line is a tax line if its (lower-cased) name or tax type
+# contains any of these heads; one alternation scan instead of a loop
+_TAX_HEADS_RE = re.compile(r"cgst|sgst|igst|cess|tax|gst|tds|tcs")
 
 
-def _parse_ledger_entries(voucher_el: ET.Element) -> list[dict[str, Any]]:
+def _parse_ledger_entries(voucher_el: ET._Element) -> list[dict[str, Any]]:
     """
     Extract all ledger entry lines from a voucher.
 
@@ -409,19 +443,22 @@ def _parse_ledger_entries(voucher_el: ET.Element) -> list[dict[str, Any]]:
     # Process ledger entry containers (financial lines)
     for container_tag in ("ALLLEDGERENTRIES.LIST", "LEDGERENTRIES.LIST"):
         for entry in voucher_el.findall(container_tag):
-            ledger_name = _txt(entry, "LEDGERNAME")
-            amount_raw = _txt(entry, "AMOUNT").replace(",", "")
+            fields = _child_texts(entry)
+            ledger_name = fields.get("LEDGERNAME", "")
+            amount_raw = fields.get("AMOUNT", "").replace(",", "")
             try:
                 amount = float(amount_raw)
             except ValueError:
                 amount = 0.0
 
-            tax_head = _txt(entry, "TAXTYPE") or ""
-            is_tax = any(t in ledger_name.lower() for t in _TAX_HEADS) or \
-                     any(t in tax_head.lower() for t in _TAX_HEADS)
+            tax_head = fields.get("TAXTYPE", "")
+            is_tax = bool(
+                _TAX_HEADS_RE.search(ledger_name.lower())
+                or _TAX_HEADS_RE.search(tax_head.lower())
+            )
 
             # Tax rate – skip unit-qualified RATE for tax lines
-            tax_rate_raw = _txt(entry, "TAXRATE")
+            tax_rate_raw = fields.get("TAXRATE", "")
             try:
                 tax_rate = float(tax_rate_raw) if tax_rate_raw else None
             except ValueError:
@@ -438,7 +475,7 @@ def _parse_ledger_entries(voucher_el: ET.Element) -> list[dict[str, Any]]:
                 "unit": None,
                 "rate": None,
                 "discount": None,
-                "gstin_of_party": _txt(entry, "GSTREGNO") or None,
+                "gstin_of_party": fields.get("GSTREGNO", "") or None,
                 "order": order,
             })
             order += 1
@@ -446,29 +483,30 @@ def _parse_ledger_entries(voucher_el: ET.Element) -> list[dict[str, Any]]:
     # Process inventory entry containers (stock movement lines)
     for container_tag in ("ALLINVENTORYENTRIES.LIST", "INVENTORYENTRIES.LIST"):
         for entry in voucher_el.findall(container_tag):
-            stock_item = _txt(entry, "STOCKITEMNAME")
+            fields = _child_texts(entry)
+            stock_item = fields.get("STOCKITEMNAME", "")
             if not stock_item:
                 continue  # skip empty inventory placeholders
 
             # Amount: use first AMOUNT child (may be nested in sub-element)
-            amount_raw = _txt(entry, "AMOUNT").replace(",", "")
+            amount_raw = fields.get("AMOUNT", "").replace(",", "")
             try:
                 amount = abs(float(amount_raw))  # inventory amounts in sales are positive value
             except ValueError:
                 amount = 0.0
 
             # Quantity: "10 PC" → (10.0, "PC")
-            qty_raw = _txt(entry, "ACTUALQTY") or _txt(entry, "BILLEDQTY")
+            qty_raw = fields.get("ACTUALQTY", "") or fields.get("BILLEDQTY", "")
             quantity, unit_from_qty = _parse_qty(qty_raw)
 
             # Unit: explicit UNIT tag, fall back to unit embedded in qty string
-            unit = _txt(entry, "UNIT") or unit_from_qty
+            unit = fields.get("UNIT", "") or unit_from_qty
 
             # Rate: "1066.96/PC" → 1066.96
-            item_rate = _parse_rate(_txt(entry, "RATE"))
+            item_rate = _parse_rate(fields.get("RATE", ""))
 
             # Discount
-            discount_raw = _txt(entry, "DISCOUNT")
+            discount_raw = fields.get("DISCOUNT", "")
             try:
                 discount = float(discount_raw) if discount_raw else None
             except ValueError:
@@ -496,8 +534,20 @@ def _parse_ledger_entries(voucher_el: ET.Element) -> list[dict[str, Any]]:
 # ── Top-level XML parse ───────────────────────────────────────────────────────
 
 
-def _process_tally_messages(tally_msgs, result: dict) -> None:
-    """Shared logic: extract masters and vouchers from a list of TALLYMESSAGE elements."""
+def _process_tally_messages(
+    tally_msgs,
+    result: dict,
+    voucher_xml: Optional[list[tuple[str, Optional[tuple[int, int]]]]] = None,
+    include_raw_xml: bool = True,
+    raw_xml_ranges: Optional[dict[ET._Element, tuple[int, int]]] = None,
+) -> None:
+    """
+    Shared logic: extract masters and vouchers from a list of TALLYMESSAGE elements.
+    When voucher_xml is given, vouchers are serialised into it for
+    _parse_vouchers_parallel instead of being parsed here. Vouchers found
+    in raw_xml_ranges get that byte range as raw_xml_range instead of a
+    serialised raw_xml.
+    """
     for msg in tally_msgs:
         # Company
         for el in msg.findall("COMPANY") + msg.findall(".//COMPANY"):
@@ -529,10 +579,104 @@ def _process_tally_messages(tally_msgs, result: dict) -> None:
 
         # Vouchers
         for el in msg.findall("VOUCHER"):
+            raw_xml_range = raw_xml_ranges.pop(el, None) if raw_xml_ranges else None
+            if voucher_xml is not None:
+                voucher_xml.append((_el_to_xml_str(el), raw_xml_range))
+                continue
             try:
-                result["vouchers"].append(parse_voucher(el))
+                voucher = parse_voucher(el, include_raw_xml and raw_xml_range is None)
             except Exception as exc:
                 logger.warning(f"Could not parse VOUCHER: {exc}")
+                continue
+            if raw_xml_range is not None:
+                voucher["raw_xml_range"] = raw_xml_range
+            result["vouchers"].append(voucher)
+
+
+# Streaming parses of at least this many vouchers spread them over a process
+# pool; below it, worker start-up and pickling outweigh the gain.
+_PARALLEL_MIN_VOUCHERS = 10_000
+
+# Files larger than this are parsed with iterparse rather than as one DOM
+_STREAMING_THRESHOLD = 50 * 1024 * 1024  # 50 MB
+
+# Per-process parser for the vouchers a worker re-parses
+_VOUCHER_PARSER = ET.XMLParser(**_PARSER_OPTIONS)
+
+
+def _parse_voucher_xml(xml: str) -> tuple[Optional[dict[str, Any]], Optional[str]]:
+    """
+    Worker: parse one serialised <VOUCHER> (raw_xml left None). Returns
+    (voucher, None), or (None, error) so the parent can log and skip it as
+    the serial path does.
+    """
+    try:
+        return parse_voucher(ET.fromstring(xml, _VOUCHER_PARSER), include_raw_xml=False), None
+    except Exception as exc:
+        return None, str(exc)
+
+
+def _parse_vouchers_parallel(
+    voucher_xml: list[tuple[str, Optional[tuple[int, int]]]], result: dict, workers: int
+) -> None:
+    """
+    Parse serialised vouchers across worker processes, keeping file order,
+    and attach each one's raw_xml_range.
+    """
+    logger.info(f"Parsing {len(voucher_xml):,} vouchers in {workers} processes")
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        parsed = pool.map(_parse_voucher_xml, (xml for xml, _ in voucher_xml), chunksize=64)
+        for (voucher, error), (_, raw_xml_range) in zip(parsed, voucher_xml):
+            if error is not None:
+                logger.warning(f"Could not parse VOUCHER: {error}")
+                continue
+            if raw_xml_range is not None:
+                voucher["raw_xml_range"] = raw_xml_range
+            result["vouchers"].append(voucher)
+
+
+# Start and end tags of VOUCHER elements. Comments, CDATA sections and
+# processing instructions are matched too (group 1 is None for them), so a
+# "<VOUCHER" inside one is skipped; anywhere else in well-formed XML it is a tag.
+_VOUCHER_TAG_RE = re.compile(
+    rb"<(?:!--.*?-->|!\[CDATA\[.*?\]\]>|\?.*?\?>"
+    rb"|(/?)VOUCHER(?=[\s/>])(?:[^>\"']|\"[^\"]*\"|'[^']*')*>)",
+    re.DOTALL,
+)
+
+
+def _voucher_spans(clean_bytes: bytes) -> list[tuple[int, Optional[int]]]:
+    """(start, end) byte offsets of every <VOUCHER> element, in document order."""
+    spans: list[tuple[int, Optional[int]]] = []
+    open_spans: list[int] = []
+    for m in _VOUCHER_TAG_RE.finditer(clean_bytes):
+        slash = m.group(1)
+        if slash is None:
+            continue
+        if slash:
+            if open_spans:  # unbalanced input fails in the parser itself
+                k = open_spans.pop()
+                spans[k] = (spans[k][0], m.end())
+        elif m.group().endswith(b"/>"):
+            spans.append((m.start(), m.end()))
+        else:
+            open_spans.append(len(spans))
+            spans.append((m.start(), None))
+    return spans
+
+
+def get_raw_xml(clean_bytes: bytes, voucher: dict[str, Any]) -> Optional[str]:
+    """
+    A parsed voucher's raw XML. Streaming parses record where the voucher
+    sits in the sanitised bytes (raw_xml_range) rather than keeping a copy
+    of its text; pass the same bytes that were parsed.
+    """
+    raw_xml_range = voucher.get("raw_xml_range")
+    if raw_xml_range is None:
+        return voucher.get("raw_xml")
+    start, end = raw_xml_range
+    with memoryview(clean_bytes) as view:
+        return str(view[start:end], "utf-8", "replace")
 
 
 def _set_file_type(result: dict) -> None:
@@ -549,11 +693,11 @@ def _set_file_type(result: dict) -> None:
         result["file_type"] = "transaction"
 
 
-def _parse_xml_dom(clean_bytes: bytes, result: dict) -> dict:
+def _parse_xml_dom(clean_bytes: bytes, result: dict, include_raw_xml: bool = True) -> dict:
     """Original DOM parse for small files."""
     try:
-        root = ET.fromstring(clean_bytes)
-    except ET.ParseError as e:
+        root = ET.fromstring(clean_bytes, ET.XMLParser(**_PARSER_OPTIONS))
+    except ET.XMLSyntaxError as e:
         raise ValueError(f"XML parse error: {e}") from e
 
     # Extract SVCURRENTCOMPANY
@@ -572,7 +716,7 @@ def _parse_xml_dom(clean_bytes: bytes, result: dict) -> dict:
     if not tally_msgs:
         tally_msgs = [root]
 
-    _process_tally_messages(tally_msgs, result)
+    _process_tally_messages(tally_msgs, result, include_raw_xml=include_raw_xml)
 
     if result["company"] is None and svc_company_name:
         result["company"] = {
@@ -585,49 +729,74 @@ def _parse_xml_dom(clean_bytes: bytes, result: dict) -> dict:
     return result
 
 
-def _parse_xml_streaming(clean_bytes: bytes, result: dict) -> dict:
+def _parse_xml_streaming(
+    clean_bytes: bytes, result: dict, parallel: bool = True, include_raw_xml: bool = True
+) -> dict:
     """
     Memory-efficient streaming parse using iterparse.
     Processes one TALLYMESSAGE at a time, clearing elements from memory.
+
+    With parallel set, a multi-core host and at least _PARALLEL_MIN_VOUCHERS
+    vouchers (counted from their start tags), vouchers are only serialised
+    during the stream and parsed afterwards in a process pool.
+
+    Vouchers get no raw_xml text here: each carries raw_xml_range, its
+    (start, end) byte offsets in clean_bytes, for get_raw_xml to slice out
+    when it is stored, so a large file's voucher text is not held twice.
     """
     logger.info(f"Using streaming parse for large file ({len(clean_bytes):,} bytes)")
 
+    voucher_xml: Optional[list[tuple[str, Optional[tuple[int, int]]]]] = None
+    workers = os.cpu_count() or 1
+    if parallel and workers > 1:
+        n_vouchers = clean_bytes.count(b"<VOUCHER ") + clean_bytes.count(b"<VOUCHER>")
+        if n_vouchers >= _PARALLEL_MIN_VOUCHERS:
+            voucher_xml = []
+
+    # The k-th VOUCHER start event is the k-th span; only the TALLYMESSAGE
+    # children (the ones parsed) are kept, until their message is processed
+    spans = _voucher_spans(clean_bytes) if include_raw_xml else None
+    raw_xml_ranges: dict[ET._Element, tuple[int, int]] = {}
+    n_started = 0
+
     svc_company_name = None
     svc_gstin = None
 
     stream = io.BytesIO(clean_bytes)
-    context = ET.iterparse(stream, events=("start", "end"))
-
-    current_msg = None
-    depth = 0
+    # Only these tags raise events, so no Python work is done per element
+    context = ET.iterparse(
+        stream,
+        events=("start", "end") if spans is not None else ("end",),
+        tag=("TALLYMESSAGE", "VOUCHER", "SVCURRENTCOMPANY", "CMPGSTIN"),
+        **_PARSER_OPTIONS,
+    )
 
     for event, elem in context:
-        if event == "start":
-            if elem.tag == "SVCURRENTCOMPANY" and svc_company_name is None:
-                pass  # will get text on "end"
-            if elem.tag == "TALLYMESSAGE":
-                current_msg = elem
-                depth = 0
-            elif current_msg is not None:
-                depth += 1
-
-        elif event == "end":
-            if elem.tag == "SVCURRENTCOMPANY" and svc_company_name is None:
-                if elem.text and elem.text.strip():
-                    svc_company_name = elem.text.strip()
-            elif elem.tag == "CMPGSTIN" and svc_gstin is None:
-                if elem.text and elem.text.strip():
-                    svc_gstin = elem.text.strip()
-
-            if elem.tag == "TALLYMESSAGE" and current_msg is not None:
-                # Process this message
-                _process_tally_messages([current_msg], result)
-                # Free memory
-                current_msg.clear()
-                current_msg = None
-                depth = 0
-                # Also clear the element from the parse tree
-                elem.clear()
+        if elem.tag == "VOUCHER":
+            if event == "start":
+                parent = elem.getparent()
+                if parent is not None and parent.tag == "TALLYMESSAGE":
+                    raw_xml_ranges[elem] = spans[n_started]
+                n_started += 1
+        elif event == "start":
+            continue
+        elif elem.tag == "TALLYMESSAGE":
+            _process_tally_messages(
+                [elem], result, voucher_xml, include_raw_xml=False, raw_xml_ranges=raw_xml_ranges
+            )
+            # Free memory: the message's subtree and the finished messages
+            # before it (lxml keeps them linked to the root otherwise)
+            elem.clear()
+            while elem.getprevious() is not None:
+                del elem.getparent()[0]
+        elif elem.tag == "SVCURRENTCOMPANY":
+            if svc_company_name is None and elem.text and elem.text.strip():
+                svc_company_name = elem.text.strip()
+        elif svc_gstin is None and elem.text and elem.text.strip():
+            svc_gstin = elem.text.strip()
+
+    if voucher_xml:
+        _parse_vouchers_parallel(voucher_xml, result, workers)
 
     if result["company"] is None and svc_company_name:
         result["company"] = {
@@ -642,10 +811,17 @@ def _parse_xml_streaming(clean_bytes: bytes, result: dict) -> dict:
 
 def parse_xml_file(
     clean_bytes: bytes,
+    parallel: bool = True,
+    include_raw_xml: bool = True,
 ) -> dict[str, Any]:
     """
     Parse sanitised XML bytes. For large files (>50 MB), uses iterparse
-    to avoid loading the entire DOM into RAM.
+    to avoid loading the entire DOM into RAM; parallel=False keeps its
+    voucher parsing in this process. include_raw_xml=False skips
+    serialising each voucher for its raw_xml (left None).
+
+    Streamed vouchers carry raw_xml_range instead of raw_xml; read their
+    text with get_raw_xml(clean_bytes, voucher).
 
     Returns a dict:
     {
@@ -666,9 +842,7 @@ def parse_xml_file(
         "file_type": "unknown",
     }
 
-    SIZE_THRESHOLD = 50 * 1024 * 1024  # 50 MB
-
-    if len(clean_bytes) > SIZE_THRESHOLD:
-        return _parse_xml_streaming(clean_bytes, result)
+    if len(clean_bytes) > _STREAMING_THRESHOLD:
+        return _parse_xml_streaming(clean_bytes, result, parallel, include_raw_xml)
     else:
-        return _parse_xml_dom(clean_bytes, result)
+        return _parse_xml_dom(clean_bytes, result, include_raw_xml)
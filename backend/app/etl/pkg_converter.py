@@ -26,11 +26,17 @@ dict[str, float]
 from __future__ import annotations
 
 import re
+from collections.abc import Iterator
 from pathlib import Path
 from typing import Optional
 
 from loguru import logger
 
+try:
+    from python_calamine import CalamineWorkbook
+except ImportError:  # optional Rust reader; openpyxl fallback below
+    CalamineWorkbook = None
+
 # Normalise whitespace inside item names
 _WS_RE = re.compile(r"\s+")
 
@@ -41,6 +47,10 @@ _PKG_SUFFIX_RE = re.compile(
     re.IGNORECASE,
 )
 
+# Cell value types openpyxl returns for numeric cells, used as-is. Matched
+# by exact type: bool is an int subclass, but "True" never parsed as a number.
+_NUMERIC_TYPES = (int, float)
+
 
 def _clean_name(raw: str) -> str:
     """
@@ -53,6 +63,59 @@ def _clean_name(raw: str) -> str:
     return _WS_RE.sub(" ", name.strip()).upper()
 
 
+def _pick_sheet(sheet_names: list[str], xlsx_path: Path) -> str:
+    """The "Price List" sheet, else the first one (with a warning)."""
+    if "Price List" in sheet_names:
+        return "Price List"
+    if sheet_names:
+        logger.warning(
+            f"pkg_converter: 'Price List' sheet not found in {xlsx_path.name}; "
+            f"using first sheet '{sheet_names[0]}'"
+        )
+        return sheet_names[0]
+    raise ValueError(f"No sheets found in {xlsx_path.name}")
+
+
+def _calamine_value(value: object) -> object:
+    """Map a calamine cell value onto what openpyxl returns for it."""
+    if value == "":
+        return None  # empty cell
+    # xlsx stores every number as a double; openpyxl hands whole ones back as int
+    if type(value) is float and value.is_integer():
+        return int(value)
+    return value
+
+
+def _sheet_rows(xlsx_path: Path) -> Iterator[tuple]:
+    """
+    Yield the value rows of the price-list sheet below the header.
+
+    Read with python-calamine (Rust) when installed, else with openpyxl in
+    read-only mode. Both yield the same values: None for empty cells, int
+    or float for numbers. calamine's entirely blank rows are dropped; the
+    read-only openpyxl reader never reports most of them.
+    """
+    if CalamineWorkbook is not None:
+        wb = CalamineWorkbook.from_path(str(xlsx_path))
+        sheet = wb.get_sheet_by_name(_pick_sheet(wb.sheet_names, xlsx_path))
+        for row in sheet.to_python(skip_empty_area=False)[1:]:
+            if any(value != "" for value in row):
+                yield tuple(map(_calamine_value, row))
+        return
+
+    try:
+        from openpyxl import load_workbook  # type: ignore
+    except ImportError as exc:
+        raise ValueError("python-calamine or openpyxl is required to read .xlsx files") from exc
+
+    wb = load_workbook(str(xlsx_path), read_only=True, data_only=True)
+    try:
+        ws = wb[_pick_sheet(wb.sheetnames, xlsx_path)]
+        yield from ws.iter_rows(min_row=2, values_only=True)
+    finally:
+        wb.close()
+
+
 def parse_pkg_conversion_xlsx(xlsx_path: str | Path) -> dict[str, float]:
     """
     Parse PKG CONVERSION.xlsx and return {clean_item_name → pkg_factor}.
@@ -62,38 +125,18 @@ def parse_pkg_conversion_xlsx(xlsx_path: str | Path) -> dict[str, float]:
     FileNotFoundError
         If the xlsx file does not exist.
     ValueError
-        If openpyxl is not installed or the expected sheet is missing.
+        If no xlsx reader is installed or the workbook has no sheets.
     """
     xlsx_path = Path(xlsx_path)
     if not xlsx_path.exists():
         raise FileNotFoundError(f"PKG CONVERSION xlsx not found: {xlsx_path}")
 
-    try:
-        from openpyxl import load_workbook  # type: ignore
-    except ImportError as exc:
-        raise ValueError("openpyxl is required to read .xlsx files") from exc
-
-    wb = load_workbook(str(xlsx_path), read_only=True, data_only=True)
-
-    # Locate sheet — prefer "Price List", fall back to first sheet
-    if "Price List" in wb.sheetnames:
-        ws = wb["Price List"]
-    elif wb.sheetnames:
-        ws = wb[wb.sheetnames[0]]
-        logger.warning(
-            f"pkg_converter: 'Price List' sheet not found in {xlsx_path.name}; "
-            f"using first sheet '{ws.title}'"
-        )
-    else:
-        wb.close()
-        raise ValueError(f"No sheets found in {xlsx_path.name}")
-
     result: dict[str, float] = {}
     pending_name: Optional[str] = None
     rows_read = 0
     items_found = 0
 
-    for row in ws.iter_rows(min_row=2, values_only=True):
+    for row in _sheet_rows(xlsx_path):
         if not row or len(row) < 3:
             continue
 
@@ -106,7 +149,10 @@ def parse_pkg_conversion_xlsx(xlsx_path: str | Path) -> dict[str, float]:
         is_name_row = False
         if col_a is not None:
             try:
-                sno = float(str(col_a).replace(",", "").strip())
+                if type(col_a) in _NUMERIC_TYPES:
+                    sno = col_a
+                else:
+                    sno = float(str(col_a).replace(",", "").strip())
                 if sno > 0:
                     is_name_row = True
             except (ValueError, TypeError):
@@ -124,7 +170,10 @@ def parse_pkg_conversion_xlsx(xlsx_path: str | Path) -> dict[str, float]:
         # ── Conversion row: col_c holds the factor ────────────────────────────
         if pending_name and col_c is not None:
             try:
-                factor = float(str(col_c).replace(",", "").strip())
+                if type(col_c) in _NUMERIC_TYPES:
+                    factor = float(col_c)
+                else:
+                    factor = float(str(col_c).replace(",", "").strip())
                 if factor > 0:
                     result[pending_name] = factor
                 else:
@@ -140,8 +189,6 @@ def parse_pkg_conversion_xlsx(xlsx_path: str | Path) -> dict[str, float]:
             # Always consume pending_name (even if factor invalid)
             pending_name = None
 
-    wb.close()
-
     logger.info(
         f"pkg_converter: parsed {xlsx_path.name} — "
         f"{items_found} item rows, {len(result)} factors resolved "
@@ -15,10 +15,15 @@ import re
 import shutil
 from datetime import datetime
 from pathlib import Path
-from typing import Tuple
+from mmap import mmap
+from typing import Tuple, Union
 
 from loguru import logger
 
+# Anything the decoders accept: bytes, or a buffer such as a read-only mmap
+# of the file, so callers need not copy it into memory first
+Buffer = Union[bytes, bytearray, memoryview, mmap]
+
 # Large file threshold for chunk-based sanitization (100 MB)
 SANITIZE_CHUNK_THRESHOLD = 100 * 1024 * 1024
 
@@ -42,59 +47,55 @@ _XML_DECL_RE = re.compile(
     re.IGNORECASE,
 )
 
+# The encoding pseudo-attribute inside that declaration
+_DECL_ENCODING_RE = re.compile(rb'encoding=["\'][^"\']+["\']', re.IGNORECASE)
+
 
-def _fix_encoding(raw: bytes) -> Tuple[bytes, str]:
+def _decode_text(raw: Buffer) -> Tuple[str, str]:
     """
-    Detect and normalise the byte stream to UTF-8.
+    Detect the encoding of *raw* (any bytes-like object) and decode it,
+    dropping a leading BOM.
 
-    Returns (utf8_bytes, detected_encoding).
+    Returns (text, detected_encoding).
     """
     # Check for UTF-16 BOM first (MKCP files use UTF-16 LE)
-    if raw.startswith(b"\xff\xfe"):
-        # UTF-16 LE BOM
+    head = bytes(raw[:2])
+    if head in (b"\xff\xfe", b"\xfe\xff"):
+        enc = "utf-16-le" if head == b"\xff\xfe" else "utf-16-be"
         try:
-            text = raw.decode("utf-16-le")
-            fixed = text.encode("utf-8")
-            # Strip UTF-8 BOM if present
-            if fixed.startswith(b"\xef\xbb\xbf"):
-                fixed = fixed[3:]
-            # Also strip Unicode BOM from the text if it slipped through
-            text = fixed.decode("utf-8", errors="replace")
+            text = str(raw, enc)
+            # The BOM decodes to \ufeff; strip it, and a second one if it
+            # slipped through
             if text.startswith("\ufeff"):
                 text = text[1:]
-            return text.encode("utf-8"), "utf-16-le"
-        except (UnicodeDecodeError, LookupError):
-            pass
-    elif raw.startswith(b"\xfe\xff"):
-        # UTF-16 BE BOM
-        try:
-            text = raw.decode("utf-16-be")
-            fixed = text.encode("utf-8")
-            if fixed.startswith(b"\xef\xbb\xbf"):
-                fixed = fixed[3:]
-            # Also strip Unicode BOM from the text if it slipped through
-            text = fixed.decode("utf-8", errors="replace")
             if text.startswith("\ufeff"):
                 text = text[1:]
-            return text.encode("utf-8"), "utf-16-be"
+            return text, enc
         except (UnicodeDecodeError, LookupError):
             pass
 
     # Try UTF-8 and other encodings
     for enc in ("utf-8-sig", "utf-8", "utf-16", "windows-1252", "latin-1"):
         try:
-            text = raw.decode(enc)
-            # Re-encode to UTF-8
-            fixed = text.encode("utf-8")
+            text = str(raw, enc)
             # Strip BOM if present
-            if fixed.startswith(b"\xef\xbb\xbf"):
-                fixed = fixed[3:]
-            return fixed, enc
+            if text.startswith("\ufeff"):
+                text = text[1:]
+            return text, enc
         except (UnicodeDecodeError, LookupError):
             continue
     # Last resort: decode with replacement
-    text = raw.decode("utf-8", errors="replace")
-    return text.encode("utf-8"), "utf-8(replaced)"
+    return str(raw, "utf-8", "replace"), "utf-8(replaced)"
+
+
+def _fix_encoding(raw: Buffer) -> Tuple[bytes, str]:
+    """
+    Detect and normalise the byte stream to UTF-8.
+
+    Returns (utf8_bytes, detected_encoding).
+    """
+    text, enc = _decode_text(raw)
+    return text.encode("utf-8"), enc
 
 
 def _strip_invalid_chars(text: str) -> Tuple[str, list[str]]:
@@ -182,25 +183,19 @@ def _fix_xml_declaration(raw_bytes: bytes) -> bytes:
     def replace_decl(m: re.Match) -> bytes:
         decl = m.group(0)
         # Replace whatever encoding is declared with utf-8
-        decl = re.sub(
-            rb'encoding=["\'][^"\']+["\']',
-            b'encoding="utf-8"',
-            decl,
-            flags=re.IGNORECASE,
-        )
-        return decl
+        return _DECL_ENCODING_RE.sub(b'encoding="utf-8"', decl)
 
     return _XML_DECL_RE.sub(replace_decl, raw_bytes, count=1)
 
 
-def _sanitize_large(raw: bytes, source_path: str) -> Tuple[bytes, list[str]]:
+def _sanitize_large(raw: Buffer, source_path: str) -> Tuple[bytes, list[str]]:
     """
     Memory-efficient sanitisation for large UTF-16 files.
     Decodes and sanitizes in a single pass to avoid double-buffering.
 
     Parameters
     ----------
-    raw:         Raw bytes from the file (may be >100MB).
+    raw:         Raw bytes or buffer from the file (may be >100MB).
     source_path: File path for logging.
 
     Returns
@@ -209,24 +204,22 @@ def _sanitize_large(raw: bytes, source_path: str) -> Tuple[bytes, list[str]]:
     """
     warnings: list[str] = []
 
-    # Detect encoding
-    if raw.startswith(b'\xff\xfe'):
-        encoding = 'utf-16-le'
-        raw = raw[2:]  # strip BOM
-    elif raw.startswith(b'\xfe\xff'):
-        encoding = 'utf-16-be'
-        raw = raw[2:]
+    # Detect encoding; BOMs are skipped by slicing a view, not a copy
+    if raw[:2] == b'\xff\xfe':
+        encoding, bom = 'utf-16-le', 2
+    elif raw[:2] == b'\xfe\xff':
+        encoding, bom = 'utf-16-be', 2
     else:
         encoding = 'utf-8'
         # Strip UTF-8 BOM if present
-        if raw.startswith(b'\xef\xbb\xbf'):
-            raw = raw[3:]
+        bom = 3 if raw[:3] == b'\xef\xbb\xbf' else 0
 
     warnings.append(f"Large file mode: Re-encoded from {encoding} to UTF-8")
-    logger.info(f"{source_path}: Large file mode ({len(raw):,} bytes), encoding={encoding}")
+    logger.info(f"{source_path}: Large file mode ({len(raw) - bom:,} bytes), encoding={encoding}")
 
     # Decode in one pass
-    text = raw.decode(encoding, errors='replace')
+    with memoryview(raw) as view:
+        text = str(view[bom:], encoding, 'replace')
 
     # Strip BOM char if it slipped through
     if text.startswith('\ufeff'):
@@ -250,7 +243,7 @@ def _sanitize_large(raw: bytes, source_path: str) -> Tuple[bytes, list[str]]:
 
 
 def sanitize_xml(
-    raw: bytes,
+    raw: Buffer,
     *,
     source_path: str = "<unknown>",
     backup_dir: Path | None = None,
@@ -267,7 +260,7 @@ def sanitize_xml(
 
     Parameters
     ----------
-    raw:         Raw bytes from the file.
+    raw:         Raw bytes from the file, or any buffer over them (e.g. an mmap).
     source_path: File path string (used for logging and backup naming).
     backup_dir:  If provided, the original raw bytes are saved here.
 
@@ -295,15 +288,12 @@ def sanitize_xml(
         clean_bytes, enc_warnings = _sanitize_large(raw, source_path)
         warnings.extend(enc_warnings)
     else:
-        # --- 2a. Decode to UTF-8, strip BOM ---
-        utf8_bytes, detected_enc = _fix_encoding(raw)
+        # --- 2a/3. Decode straight to str for char-level cleaning, strip BOM ---
+        text, detected_enc = _decode_text(raw)
         if detected_enc != "utf-8":
             warnings.append(f"Re-encoded from {detected_enc} to UTF-8")
             logger.info(f"{source_path}: Re-encoded from {detected_enc}")
 
-        # --- 3. Decode to str for char-level cleaning ---
-        text = utf8_bytes.decode("utf-8", errors="replace")
-
         # --- 4. Strip invalid &#N; character references ---
         text, ref_warnings = _strip_invalid_char_refs(text)
         warnings.extend(ref_warnings)
@@ -7,6 +7,7 @@ Run with:
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from loguru import logger
 
@@ -38,6 +39,7 @@ app = FastAPI(
     description="Local REST API for Tally ERP XML data ingestion and analytics",
     version="1.0.0",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # CORS – allow frontend dev server
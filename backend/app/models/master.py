@@ -1,6 +1,7 @@
 """SQLModel models for Tally master data (companies, ledgers, units, stock items)."""
 from typing import Optional
 from datetime import datetime
+from sqlalchemy import Index, func, literal_column
 from sqlmodel import SQLModel, Field
 
 
@@ -44,10 +45,6 @@ class Ledger(SQLModel, table=True):
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
-    class Config:
-        # Compound uniqueness enforced at app level (name + company_id)
-        pass
-
 
 class Unit(SQLModel, table=True):
     """Tally unit of measure master (UNIT node)."""
@@ -82,3 +79,17 @@ class StockItem(SQLModel, table=True):
     opening_value: float = Field(default=0.0)
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+# Masters are unique per (name, company); the importer upserts with
+# ON CONFLICT against these keys. company_id goes through coalesce() because
+# SQLite treats NULLs as distinct in a unique index, and masters imported
+# without a company have no company_id. The 0 must stay a literal: the
+# conflict target only matches the index if the expressions are identical.
+LEDGER_KEY = (Ledger.name, func.coalesce(Ledger.company_id, literal_column("0")))
+UNIT_KEY = (Unit.name, func.coalesce(Unit.company_id, literal_column("0")))
+STOCK_ITEM_KEY = (StockItem.name, func.coalesce(StockItem.company_id, literal_column("0")))
+
+Index("ix_ledgers_name_company", *LEDGER_KEY, unique=True)
+Index("ix_units_name_company", *UNIT_KEY, unique=True)
+Index("ix_stock_items_name_company", *STOCK_ITEM_KEY, unique=True)
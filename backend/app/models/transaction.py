@@ -1,7 +1,8 @@
 """SQLModel models for Tally transaction data (vouchers, lines, import log)."""
 from typing import Optional
 from datetime import date, datetime
-from sqlmodel import SQLModel, Field
+from sqlalchemy import Index, func
+from sqlmodel import SQLModel, Field, Relationship
 
 
 class Voucher(SQLModel, table=True):
@@ -41,13 +42,19 @@ class Voucher(SQLModel, table=True):
     # Raw XML stored for drilldown
     raw_xml: Optional[str] = Field(default=None)  # sanitized XML text
 
-    # Deduplication composite key (used when IRN absent)
-    # Enforced at app level for flexibility
+    # Deduplication composite key (used when IRN absent). Unique among
+    # vouchers without an IRN: see ix_vouchers_dedup_key_no_irn below
     dedup_key: Optional[str] = Field(default=None, index=True)
 
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
+    # Lines in voucher order. Not loaded unless asked for (e.g. joinedload in
+    # the voucher detail route); the importer manages lines via voucher_id.
+    lines: list["VoucherLine"] = Relationship(
+        sa_relationship_kwargs={"order_by": "VoucherLine.order"}
+    )
+
 
 class VoucherLine(SQLModel, table=True):
     """A single ledger entry line within a voucher."""
@@ -79,6 +86,43 @@ class VoucherLine(SQLModel, table=True):
     order: int = Field(default=0)  # line order within voucher
 
 
+# Case-normalised voucher type (Tally type names vary in case: SALES vs
+# Sales). Queries filter on this expression rather than spelling out
+# func.upper(...) themselves: SQLite only uses the expression index below when
+# the query repeats the exact expression.
+VOUCHER_TYPE_UPPER = func.upper(Voucher.voucher_type)
+
+# Composite indexes for the report aggregations.
+Index(
+    "ix_vouchers_utype_cancelled_date",
+    VOUCHER_TYPE_UPPER,
+    Voucher.is_cancelled,
+    Voucher.voucher_date,
+)
+# Date-range reports (KPIs, top-N, monthly) filter on the date first.
+Index(
+    "ix_vouchers_date_cancelled_utype",
+    Voucher.voucher_date,
+    Voucher.is_cancelled,
+    VOUCHER_TYPE_UPPER,
+)
+# CSV export: exact voucher_type filter, newest first, without a sort step
+Index("ix_vouchers_type_date_desc", Voucher.voucher_type, Voucher.voucher_date.desc())
+Index("ix_voucher_lines_voucher_item", VoucherLine.voucher_id, VoucherLine.stock_item_name)
+# Per-item history / inventory lookups
+Index("ix_voucher_lines_item_voucher", VoucherLine.stock_item_name, VoucherLine.voucher_id)
+# GST sums join each voucher to its tax lines only
+Index("ix_voucher_lines_voucher_tax", VoucherLine.voucher_id, VoucherLine.is_tax_line)
+# The importer identifies a voucher without an IRN by dedup_key alone, so at
+# most one such voucher may hold each key (vouchers with an IRN may share it).
+Index(
+    "ix_vouchers_dedup_key_no_irn",
+    Voucher.dedup_key,
+    unique=True,
+    sqlite_where=Voucher.irn.is_(None),
+)
+
+
 class ImportLog(SQLModel, table=True):
     """Audit log of every file import attempt."""
 
@@ -73,10 +73,11 @@ class VoucherDetail(VoucherRead):
 
 
 class VoucherListResponse(BaseModel):
-    total: int
+    total: Optional[int] = None     # omitted when include_total=false
     page: int
     page_size: int
     items: list[VoucherRead]
+    next_cursor: Optional[str] = None   # pass as ?cursor= for the next page
 
 
 class KPIResponse(BaseModel):
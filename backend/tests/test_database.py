@@ -0,0 +1,140 @@
+"""
+Tests for the startup schema upgrade: duplicate keys removed before the
+unique indexes are built on a database from an older version.
+"""
+import os
+import tempfile
+from datetime import date
+
+import pytest
+from sqlalchemy import text
+from sqlmodel import Session, SQLModel, create_engine, select
+
+# Point to a temp DB before importing the app (see test_integration.py)
+_tmp_db = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+_tmp_db.close()
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_tmp_db.name}")
+os.environ.setdefault("TALLY_INBOX", tempfile.mkdtemp())
+
+from app.core.database import _create_indexes  # noqa: E402
+from app.models.master import Ledger  # noqa: E402
+from app.models.transaction import Voucher, VoucherLine  # noqa: E402
+
+# Unique indexes an older version of the app did not create (vouchers.irn
+# was already unique, so ix_vouchers_irn is not among them)
+_NEW_UNIQUE = (
+    "ix_ledgers_name_company",
+    "ix_units_name_company",
+    "ix_stock_items_name_company",
+    "ix_vouchers_dedup_key_no_irn",
+)
+
+
+@pytest.fixture
+def old_db(tmp_path):
+    """A file database with the current tables but none of the unique indexes."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    SQLModel.metadata.create_all(engine)
+    with engine.begin() as conn:
+        for name in _NEW_UNIQUE:
+            conn.execute(text(f"DROP INDEX {name}"))
+    yield engine
+    engine.dispose()
+
+
+def _voucher(number: str, **kw) -> Voucher:
+    return Voucher(
+        voucher_number=number, voucher_type="Sales", voucher_date=date(2024, 1, 15), **kw
+    )
+
+
+def _upgrade(engine) -> None:
+    with engine.begin() as conn:
+        _create_indexes(conn)
+
+
+class TestDropDuplicateKeys:
+    def test_oldest_row_and_its_lines_kept(self, old_db):
+        # The importer looks a dedup_key up by lowest id, so re-imports have
+        # been updating the oldest copy
+        with Session(old_db) as s:
+            old, new = _voucher("SI/1", dedup_key="K1"), _voucher("SI/1", dedup_key="K1")
+            s.add_all([old, new, _voucher("SI/2", dedup_key="K2")])
+            s.commit()
+            s.add_all([
+                VoucherLine(voucher_id=old.id, ledger_name="Old"),
+                VoucherLine(voucher_id=new.id, ledger_name="New"),
+            ])
+            s.commit()
+            old_id = old.id
+
+        _upgrade(old_db)
+
+        with Session(old_db) as s:
+            kept = s.exec(select(Voucher).where(Voucher.dedup_key == "K1")).all()
+            assert [v.id for v in kept] == [old_id]
+            lines = s.exec(select(VoucherLine)).all()
+            assert [(l.voucher_id, l.ledger_name) for l in lines] == [(old_id, "Old")]
+            assert len(s.exec(select(Voucher)).all()) == 2
+
+    def test_ledger_duplicates_per_company(self, old_db):
+        with Session(old_db) as s:
+            s.add_all([Ledger(name="Cash"), Ledger(name="Cash"), Ledger(name="Bank")])
+            s.commit()
+
+        _upgrade(old_db)
+
+        with Session(old_db) as s:
+            rows = s.exec(select(Ledger.id, Ledger.name).order_by(Ledger.id)).all()
+        assert rows == [(1, "Cash"), (3, "Bank")]
+
+    def test_dedup_key_unique_only_without_irn(self, old_db):
+        with Session(old_db) as s:
+            s.add_all([
+                _voucher("SI/1", dedup_key="K1"),
+                _voucher("SI/1", dedup_key="K1"),
+                # Vouchers with an IRN are outside the partial index
+                _voucher("SI/1", dedup_key="K1", irn="IRN-1"),
+                _voucher("SI/2", dedup_key="K2", irn="IRN-2"),
+                _voucher("SI/2", dedup_key="K2", irn="IRN-3"),
+                _voucher("SI/3", dedup_key="K3"),
+            ])
+            s.commit()
+
+        _upgrade(old_db)
+
+        with Session(old_db) as s:
+            rows = s.exec(select(Voucher.id, Voucher.dedup_key, Voucher.irn).order_by(Voucher.id)).all()
+        assert rows == [
+            (1, "K1", None),
+            (3, "K1", "IRN-1"),
+            (4, "K2", "IRN-2"),
+            (5, "K2", "IRN-3"),
+            (6, "K3", None),
+        ]
+
+    def test_database_backed_up_before_delete(self, old_db, tmp_path):
+        with Session(old_db) as s:
+            s.add_all([_voucher("SI/1", dedup_key="K1"), _voucher("SI/1", dedup_key="K1")])
+            s.commit()
+
+        _upgrade(old_db)
+
+        backups = list(tmp_path.glob("old.db.pre-dedup-*.bak"))
+        assert len(backups) == 1
+        backup = create_engine(f"sqlite:///{backups[0]}")
+        with Session(backup) as s:
+            assert len(s.exec(select(Voucher)).all()) == 2
+        backup.dispose()
+
+    def test_no_backup_without_duplicates(self, old_db, tmp_path):
+        with Session(old_db) as s:
+            s.add_all([_voucher("SI/1", irn="IRN-1"), _voucher("SI/2", irn="IRN-2")])
+            s.commit()
+
+        _upgrade(old_db)
+
+        assert not list(tmp_path.glob("*.bak"))
+        with old_db.connect() as conn:
+            names = set(conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'index'")).scalars())
+        assert set(_NEW_UNIQUE) <= names
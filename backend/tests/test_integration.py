@@ -147,6 +147,23 @@ class TestAPIEndpoints:
         data = r.json()
         assert len(data["items"]) <= 2
 
+    def test_list_vouchers_cursor(self, client):
+        full = client.get("/api/vouchers?page_size=500").json()["items"]
+        r = client.get("/api/vouchers?page_size=2&include_total=false")
+        data = r.json()
+        assert data["total"] is None
+        seen = [v["id"] for v in data["items"]]
+        while data["next_cursor"]:
+            data = client.get(
+                f"/api/vouchers?page_size=2&cursor={data['next_cursor']}"
+            ).json()
+            seen += [v["id"] for v in data["items"]]
+        assert seen == [v["id"] for v in full]
+
+    def test_list_vouchers_bad_cursor(self, client):
+        r = client.get("/api/vouchers?cursor=not-a-cursor")
+        assert r.status_code == 400
+
     def test_get_voucher_detail(self, client):
         r = client.get("/api/vouchers")
         items = r.json()["items"]
@@ -251,3 +268,33 @@ class TestManualImport:
     def test_import_no_params(self, client):
         r = client.post("/api/import")
         assert r.status_code == 400
+
+
+class TestOrderEndpoints:
+    def test_order_items(self, client):
+        r = client.get("/api/order/items")
+        assert r.status_code == 200
+        items = r.json()
+        assert isinstance(items, list)
+        assert len(items) > 0
+        for item in items:
+            assert item["group"]  # ungrouped items fall under "Togo Cycles"
+            assert item["suggestion_base"] >= 0
+
+    def test_item_history(self, client):
+        items = client.get("/api/order/items").json()
+        name = items[0]["name"]
+        r = client.get(f"/api/order/items/{name}/history?months=6")
+        assert r.status_code == 200
+        rows = r.json()
+        assert len(rows) == 7  # start month .. current month
+        for prev, cur in zip(rows, rows[1:]):
+            assert cur["opening"] == prev["closing"]
+            assert cur["month"] > prev["month"]
+
+    def test_compliance(self, client):
+        r = client.get("/api/order/compliance")
+        assert r.status_code == 200
+        for issue in r.json():
+            assert issue["voucher_type"] in ("Sales", "Purchase")
+            assert issue["issues"]
@@ -0,0 +1,203 @@
+"""Unit tests for the MKCP importer's pkg_factor matching."""
+import random
+from datetime import datetime
+
+import pytest
+from sqlalchemy import event
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from app.etl import mkcp_importer
+from app.etl.mkcp_importer import (
+    _PrefixIndex,
+    _fuzzy_buckets,
+    _fuzzy_match,
+    _py_levenshtein,
+    _rf_levenshtein,
+    _upsert_rows,
+)
+from app.models.order import AlternateUnit, VendorGroup
+
+
+def _linear_first_match(keys: list[str], name: str) -> str | None:
+    """The scan _PrefixIndex replaced: first key, in order, sharing a prefix with name."""
+    for key in keys:
+        if name.startswith(key) or key.startswith(name):
+            return key
+    return None
+
+
+def _full_scan_fuzzy_match(norm_db: str, keys: list[str]) -> tuple[str, int] | None:
+    """The scan _fuzzy_buckets replaced: every key in order, first best distance wins."""
+    threshold = min(3, max(2, int(len(norm_db) * 0.10)))
+    best_key, best_dist = None, threshold + 1
+    for key in keys:
+        if not key or key[0] != norm_db[0] or abs(len(key) - len(norm_db)) > threshold:
+            continue
+        dist = mkcp_importer._levenshtein(norm_db, key)
+        if dist < best_dist:
+            best_key, best_dist = key, dist
+    return (best_key, best_dist) if best_key is not None else None
+
+
+# Names sharing prefixes, inserted out of sorted order
+SHARED_KEYS = ["BELL CROWN", "BELL", "BELL CROWN MINI", "BE", "BRAKE SHOE", "BRAKE", "AXLE"]
+
+
+class TestPrefixIndex:
+    @pytest.mark.parametrize(
+        "name",
+        [
+            "BELL CROWN MINI 300",  # several keys are prefixes of it
+            "BELL CROWN",           # exact key, also a prefix of a later key
+            "BEL",                  # prefix of several keys, none of them a prefix of it
+            "B",
+            "BRAKE SHOE BLACK",
+            "BRAKES",
+            "AXLE",
+            "AX",
+            "",                     # every key extends the empty name
+            "CHAIN",                # no match
+            "BX",                   # falls between sorted keys, no match
+            "ZZZ",                  # sorts after every key
+        ],
+    )
+    def test_matches_linear_scan(self, name):
+        index = _PrefixIndex(SHARED_KEYS)
+        assert index.first_match(name) == _linear_first_match(SHARED_KEYS, name)
+
+    def test_empty_name_takes_first_key(self):
+        assert _PrefixIndex(SHARED_KEYS).first_match("") == "BELL CROWN"
+
+    def test_empty_key_prefixes_every_name(self):
+        keys = ["BELL", "", "AXLE"]
+        index = _PrefixIndex(keys)
+        assert index.first_match("BELLS") == "BELL"
+        assert index.first_match("CHAIN") == ""
+
+    def test_no_keys(self):
+        assert _PrefixIndex([]).first_match("BELL") is None
+
+    def test_random_names_match_linear_scan(self):
+        rng = random.Random(7)
+        for _ in range(200):
+            keys = list(dict.fromkeys(
+                "".join(rng.choices("AB ", k=rng.randint(1, 5))) for _ in range(rng.randint(1, 12))
+            ))
+            index = _PrefixIndex(keys)
+            for _ in range(20):
+                name = "".join(rng.choices("AB ", k=rng.randint(0, 6)))
+                assert index.first_match(name) == _linear_first_match(keys, name), (keys, name)
+
+
+@pytest.fixture(params=["rapidfuzz", "python"])
+def levenshtein(request, monkeypatch):
+    """Run with rapidfuzz's distance and with the pure-Python fallback."""
+    if request.param == "rapidfuzz":
+        if _rf_levenshtein is None:
+            pytest.skip("rapidfuzz not installed")
+        distance = _rf_levenshtein.distance
+    else:
+        distance = _py_levenshtein
+    monkeypatch.setattr(mkcp_importer, "_levenshtein", distance)
+    return distance
+
+
+# The B keys are all 2 edits from BELLX; the earliest-inserted one is in the
+# longest length bucket, which the bucketed lookup reads last. CELLX is 1
+# edit away but starts with a different character.
+TIED_KEYS = ["BELLYZ", "BELLAB", "BEL", "BELYY", "BLLY", "CELLX"]
+
+
+class TestFuzzyMatch:
+    def _lookup(self, name: str, keys: list[str]):
+        factors = {k: float(i + 1) for i, k in enumerate(keys)}
+        return _fuzzy_match(name, factors, _fuzzy_buckets(keys))
+
+    def test_tie_goes_to_first_inserted_key(self, levenshtein):
+        assert all(levenshtein("BELLX", k) == 2 for k in TIED_KEYS[:5])
+        assert self._lookup("BELLX", TIED_KEYS) == ("BELLYZ", 1.0, 2)
+        assert self._lookup("BELLX", TIED_KEYS[::-1]) == ("BLLY", 2.0, 2)
+
+    def test_tie_matches_full_scan(self, levenshtein):
+        for keys in (TIED_KEYS, TIED_KEYS[::-1], TIED_KEYS[2:] + TIED_KEYS[:2]):
+            match = self._lookup("BELLX", keys)
+            assert match[::2] == _full_scan_fuzzy_match("BELLX", keys)
+
+    def test_no_match_beyond_threshold(self, levenshtein):
+        assert self._lookup("BELLX", ["CHAIN", "BRAKE SHOE"]) is None
+        assert self._lookup("", TIED_KEYS) is None
+
+    def test_random_names_match_full_scan(self, levenshtein):
+        rng = random.Random(13)
+        for _ in range(200):
+            keys = list(dict.fromkeys(
+                "".join(rng.choices("AB", k=rng.randint(1, 8))) for _ in range(rng.randint(1, 15))
+            ))
+            for _ in range(10):
+                name = "".join(rng.choices("AB", k=rng.randint(1, 8)))
+                match = self._lookup(name, keys)
+                expected = _full_scan_fuzzy_match(name, keys)
+                assert (match[::2] if match else None) == expected, (keys, name)
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://")
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as s:
+        yield s
+    engine.dispose()
+
+
+def _capture_sql(session) -> list[str]:
+    statements: list[str] = []
+    event.listen(
+        session.get_bind(), "before_cursor_execute",
+        lambda conn, cursor, statement, *args: statements.append(statement),
+    )
+    return statements
+
+
+class TestUpsertRows:
+    def test_vendor_group_update_leaves_created_at(self, session):
+        created = datetime(2024, 1, 1)
+        session.add(VendorGroup(name="HERO", parent=None, base_unit="PCS", created_at=created))
+        session.commit()
+        statements = _capture_sql(session)
+
+        counts = _upsert_rows(
+            session, VendorGroup, "name",
+            [
+                {"name": "HERO", "parent": "CYCLES", "base_unit": "PKG", "guid": "g-1"},
+                {"name": "AVON", "parent": None, "base_unit": "PCS", "guid": "g-2"},
+            ],
+            ("parent", "base_unit", "guid"),
+        )
+        session.commit()
+
+        assert counts == (1, 1)
+        hero = session.exec(select(VendorGroup).where(VendorGroup.name == "HERO")).one()
+        assert (hero.parent, hero.base_unit, hero.guid) == ("CYCLES", "PKG", "g-1")
+        assert hero.created_at == created
+        # vendor_groups has no updated_at column to stamp
+        upsert = next(s for s in statements if "ON CONFLICT" in s)
+        assert "updated_at" not in upsert
+
+    def test_alternate_unit_update_stamps_updated_at(self, session):
+        stamp = datetime(2024, 1, 1)
+        session.add(AlternateUnit(item_name="BELL", pkg_factor=10, created_at=stamp, updated_at=stamp))
+        session.commit()
+        statements = _capture_sql(session)
+
+        counts = _upsert_rows(
+            session, AlternateUnit, "item_name", [{"item_name": "BELL", "pkg_factor": 12}], ("pkg_factor",)
+        )
+        session.commit()
+
+        assert counts == (0, 1)
+        bell = session.exec(select(AlternateUnit)).one()
+        assert bell.pkg_factor == 12
+        assert bell.created_at == stamp
+        assert bell.updated_at > stamp
+        upsert = next(s for s in statements if "ON CONFLICT" in s)
+        assert "updated_at = CURRENT_TIMESTAMP" in upsert
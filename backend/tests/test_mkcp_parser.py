@@ -0,0 +1,52 @@
+"""Unit tests for the MKCP Tally XML parser."""
+import pytest
+from lxml import etree
+
+from app.etl import mkcp_parser
+from app.etl.mkcp_parser import iter_utf16_xml
+
+
+# &#x1B; is illegal in XML and stripped; U+1F6B2 is a surrogate pair in UTF-16
+STOCK_ITEMS_XML = """<?xml version="1.0" encoding="UTF-16"?>
+<ENVELOPE>
+ <STOCKITEM NAME="BELL &amp; HORN"><PARENT>BELL ( 87149990 )</PARENT></STOCKITEM>
+ <STOCKITEM NAME="TYRE&#x1B; 20&quot;"><PARENT>TYRE</PARENT><RATE>&#8377; 120</RATE></STOCKITEM>
+ <STOCKITEM NAME="KIDS \U0001F6B2 CYCLE"><PARENT>BICYCLE ( 87120010 )</PARENT></STOCKITEM>
+</ENVELOPE>
+"""
+
+
+def _records(path, tag="STOCKITEM") -> list[bytes]:
+    # Elements are cleared once the next one is read, so serialise each one now
+    return [etree.tostring(el, with_tail=False) for el in iter_utf16_xml(str(path), tag)]
+
+
+class TestIterUtf16Xml:
+    @pytest.fixture
+    def xml_file(self, tmp_path):
+        path = tmp_path / "STOCK ITEM.xml"
+        path.write_bytes(b"\xff\xfe" + STOCK_ITEMS_XML.encode("utf-16-le"))
+        return path
+
+    def test_one_shot_parse(self, xml_file):
+        items = [etree.fromstring(r) for r in _records(xml_file)]
+        assert [el.get("NAME") for el in items] == [
+            "BELL & HORN", 'TYRE 20"', "KIDS \U0001F6B2 CYCLE",
+        ]
+        assert items[1].findtext("RATE") == "₹ 120"
+
+    # Size 1 puts a read boundary between every byte, splitting each entity
+    # and both halves of the surrogate pair; the others split them unevenly
+    @pytest.mark.parametrize("chunk", [1, 2, 3, 5, 7])
+    def test_tiny_reads_match_one_shot_parse(self, xml_file, monkeypatch, chunk):
+        one_shot = _records(xml_file)
+        monkeypatch.setattr(mkcp_parser, "_READ_CHUNK", chunk)
+        assert _records(xml_file) == one_shot
+
+    def test_utf8_without_bom(self, tmp_path, monkeypatch):
+        path = tmp_path / "STOCK ITEM.xml"
+        path.write_bytes(STOCK_ITEMS_XML.replace("UTF-16", "UTF-8").encode("utf-8"))
+        one_shot = _records(path)
+        monkeypatch.setattr(mkcp_parser, "_READ_CHUNK", 1)
+        assert _records(path) == one_shot
+        assert len(one_shot) == 3
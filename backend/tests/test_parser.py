@@ -1,7 +1,8 @@
 """Unit tests for the Tally XML parser."""
 import pytest
 from datetime import date
-from xml.etree import ElementTree as ET
+from lxml import etree as ET
+from app.etl import parser
 from app.etl.parser import (
     parse_voucher,
     parse_ledger,
@@ -9,6 +10,7 @@ from app.etl.parser import (
     parse_stock_item,
     parse_company,
     parse_xml_file,
+    get_raw_xml,
     _date,
     _infer_ledger_type,
 )
@@ -85,6 +87,17 @@ SAMPLE_TXN_XML = b"""<?xml version="1.0" encoding="utf-8"?>
   </BODY>
 </ENVELOPE>"""
 
+# Vouchers with no whitespace between them: the DOM raw_xml serialises an
+# element with its tail, which the source byte range does not include.
+STREAM_TXN_XML = """<?xml version="1.0" encoding="utf-8"?>
+<ENVELOPE><BODY><IMPORTDATA><REQUESTDATA>
+<TALLYMESSAGE><VOUCHER VOUCHERTYPENAME="Sales" VOUCHERNUMBER="SI/001" DATE="20240115"><DATE>20240115</DATE><PARTYNAME>ABC &amp; Sons</PARTYNAME><ALLLEDGERENTRIES.LIST><LEDGERNAME>Sales</LEDGERNAME><AMOUNT>-1000.00</AMOUNT></ALLLEDGERENTRIES.LIST></VOUCHER><VOUCHER VOUCHERTYPENAME="Receipt" VOUCHERNUMBER="RC/001" DATE="20240116"><DATE>20240116</DATE><NARRATION>Caf\u00e9 \u20b9 500</NARRATION></VOUCHER></TALLYMESSAGE>
+<TALLYMESSAGE><VOUCHER VOUCHERTYPENAME="Journal" VOUCHERNUMBER="J/001" DATE="20240117">
+  <DATE>20240117</DATE>
+  <NARRATION>Indented</NARRATION>
+</VOUCHER></TALLYMESSAGE>
+</REQUESTDATA></IMPORTDATA></BODY></ENVELOPE>""".encode("utf-8")
+
 
 class TestDateParser:
     def test_yyyymmdd(self):
@@ -258,3 +271,46 @@ class TestParseXmlFile:
     def test_invalid_xml_raises(self):
         with pytest.raises(ValueError):
             parse_xml_file(b"<UNCLOSED_TAG>")
+
+
+class TestStreamingParse:
+    def test_raw_xml_range_matches_dom_raw_xml(self, monkeypatch):
+        dom = parse_xml_file(STREAM_TXN_XML)
+        monkeypatch.setattr(parser, "_STREAMING_THRESHOLD", 0)
+        streamed = parse_xml_file(STREAM_TXN_XML)
+
+        assert len(streamed["vouchers"]) == len(dom["vouchers"]) == 3
+        for s_voucher, d_voucher in zip(streamed["vouchers"], dom["vouchers"]):
+            assert s_voucher["raw_xml"] is None
+            start, end = s_voucher["raw_xml_range"]
+            assert STREAM_TXN_XML[start:end].decode("utf-8") == d_voucher["raw_xml"]
+            assert get_raw_xml(STREAM_TXN_XML, s_voucher) == d_voucher["raw_xml"]
+
+    def test_parallel_matches_serial(self, monkeypatch):
+        # Enough vouchers for more than one pool chunk (chunksize 64)
+        body = "".join(
+            f'<TALLYMESSAGE><VOUCHER VOUCHERTYPENAME="Sales" VOUCHERNUMBER="SI/{n}" DATE="20240115">'
+            f"<DATE>20240115</DATE><PARTYNAME>Party {n % 7}</PARTYNAME>"
+            f"<ALLLEDGERENTRIES.LIST><LEDGERNAME>Party {n % 7}</LEDGERNAME><AMOUNT>{n}.50</AMOUNT></ALLLEDGERENTRIES.LIST>"
+            f"<ALLLEDGERENTRIES.LIST><LEDGERNAME>CGST</LEDGERNAME><AMOUNT>-{n}.50</AMOUNT></ALLLEDGERENTRIES.LIST>"
+            "</VOUCHER></TALLYMESSAGE>"
+            for n in range(150)
+        )
+        xml = f"<ENVELOPE><BODY><DATA>{body}</DATA></BODY></ENVELOPE>".encode()
+        monkeypatch.setattr(parser, "_STREAMING_THRESHOLD", 0)
+        monkeypatch.setattr(parser, "_PARALLEL_MIN_VOUCHERS", 0)
+        monkeypatch.setattr(parser.os, "cpu_count", lambda: 2)
+        pool_calls = []
+        real_parallel = parser._parse_vouchers_parallel
+        monkeypatch.setattr(
+            parser, "_parse_vouchers_parallel",
+            lambda *args: pool_calls.append(args[2]) or real_parallel(*args),
+        )
+
+        serial = parse_xml_file(xml, parallel=False)
+        assert pool_calls == []
+        parallel = parse_xml_file(xml, parallel=True)
+        assert pool_calls == [2]
+
+        assert len(serial["vouchers"]) == 150
+        assert parallel == serial
@@ -0,0 +1,204 @@
+"""
+Tests for the item rate override store (app/api/rate_routes.py).
+
+Each test points the store at its own temporary data directory; the router
+is mounted on a bare FastAPI app, so no settings or main database are needed.
+"""
+import json
+import sqlite3
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api import rate_routes as rates
+
+
+@pytest.fixture(autouse=True)
+def rate_store(tmp_path, monkeypatch):
+    """An empty rate store in tmp_path; yields the database path."""
+    monkeypatch.setattr(rates, "_DATA_DIR", tmp_path)
+    monkeypatch.setattr(rates, "_DB_FILE", tmp_path / "rates.sqlite")
+    monkeypatch.setattr(rates, "_OVERRIDES_FILE", tmp_path / "item_rate_overrides.json")
+    monkeypatch.setattr(rates, "_CHANGELOG_FILE", tmp_path / "rate_change_log.jsonl")
+    monkeypatch.setattr(rates, "_LEGACY_CHANGELOG_FILE", tmp_path / "rate_change_log.json")
+    _reset_store()
+    yield tmp_path / "rates.sqlite"
+    # Commit what this test queued into its own database, not the next one
+    rates._flush_now()
+    _reset_store()
+
+
+def _reset_store() -> None:
+    with rates._cache_lock:
+        if rates._conn is not None:
+            rates._conn.close()
+        rates._conn = None
+        rates._pending.clear()
+        rates._pending_log.clear()
+        rates._CACHE.update(version=None, data={}, table=None, epoch=rates._CACHE["epoch"] + 1)
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(rates.rate_router)
+    with TestClient(app) as c:
+        yield c
+
+
+def _rows(db_file, sql: str) -> list[tuple]:
+    """Read the database through a connection of its own."""
+    conn = sqlite3.connect(db_file)
+    try:
+        return conn.execute(sql).fetchall()
+    finally:
+        conn.close()
+
+
+class TestRateOverrideRoutes:
+    def test_save_and_read_back(self, client):
+        r = client.post("/api/rates/BELL", json={"pkg_rate": 120.0, "unit_rate": 12.0})
+        assert r.status_code == 200
+        assert r.json()["warnings"] == []
+
+        body = client.get("/api/rates/BELL").json()
+        assert (body["pkg_rate"], body["unit_rate"]) == (120.0, 12.0)
+        assert body["last_modified"] is not None
+        listed = client.get("/api/rates/").json()
+        assert [(o["item_name"], o["pkg_rate"], o["unit_rate"]) for o in listed] == [("BELL", 120.0, 12.0)]
+
+    def test_unknown_item_reads_empty(self, client):
+        body = client.get("/api/rates/NOPE").json()
+        assert (body["item_name"], body["pkg_rate"], body["unit_rate"]) == ("NOPE", None, None)
+
+    def test_partial_save_merges(self, client):
+        client.post("/api/rates/BELL", json={"pkg_rate": 120.0})
+        body = client.post("/api/rates/BELL", json={"unit_rate": 12.0}).json()
+        assert (body["pkg_rate"], body["unit_rate"]) == (120.0, 12.0)
+        body = client.get("/api/rates/BELL").json()
+        assert (body["pkg_rate"], body["unit_rate"]) == (120.0, 12.0)
+
+    def test_large_change_warns(self, client):
+        client.post("/api/rates/BELL", json={"unit_rate": 10.0})
+        # 100 % is over the 30 % threshold; the rate is still saved
+        body = client.post("/api/rates/BELL", json={"unit_rate": 20.0}).json()
+        assert body["warnings"] == ["unit_rate changed by 100.0% (threshold is 30%)"]
+        assert client.get("/api/rates/BELL").json()["unit_rate"] == 20.0
+
+        body = client.post("/api/rates/BELL", json={"unit_rate": 25.0}).json()
+        assert body["warnings"] == []
+
+    def test_negative_rate_rejected(self, client):
+        assert client.post("/api/rates/BELL", json={"pkg_rate": -1}).status_code == 422
+
+    def test_delete(self, client):
+        client.post("/api/rates/BELL", json={"unit_rate": 10.0})
+        r = client.delete("/api/rates/BELL")
+        assert r.json() == {"status": "deleted", "item": "BELL"}
+        assert client.get("/api/rates/BELL").json()["unit_rate"] is None
+
+    def test_delete_missing_is_404(self, client):
+        r = client.delete("/api/rates/NOPE")
+        assert r.status_code == 404
+        assert r.json()["detail"] == "No override found for 'NOPE'"
+
+    def test_changelog_newest_first(self, client):
+        client.post("/api/rates/BELL", json={"pkg_rate": 100.0, "unit_rate": 10.0})
+        client.post("/api/rates/BELL", json={"unit_rate": 11.0})
+
+        log = client.get("/api/rates/log/changes").json()
+        assert [(e["item"], e["field"], e["old_value"], e["new_value"]) for e in log] == [
+            ("BELL", "unit_rate", 10.0, 11.0),
+            ("BELL", "unit_rate", None, 10.0),
+            ("BELL", "pkg_rate", None, 100.0),
+        ]
+        assert len(client.get("/api/rates/log/changes?limit=1").json()) == 1
+
+
+class TestRateStore:
+    def test_flush_now_commits_queued_changes(self, rate_store):
+        rates._db()
+        # Queued directly, without waking the flusher thread
+        with rates._cache_lock:
+            rates._pending["BELL"] = rates._Entry(120.0, 12.0, "2024-01-01T00:00:00+00:00")
+            rates._pending_log.append(
+                {"item": "BELL", "field": "pkg_rate", "old_value": None,
+                 "new_value": 120.0, "timestamp": "2024-01-01T00:00:00+00:00"}
+            )
+        assert _rows(rate_store, "SELECT item FROM overrides") == []
+
+        rates._flush_now()
+
+        assert not rates._pending and not rates._pending_log
+        assert _rows(rate_store, "SELECT item, pkg_rate, unit_rate FROM overrides") == [("BELL", 120.0, 12.0)]
+        assert _rows(rate_store, "SELECT item, field, new_value FROM changelog") == [("BELL", "pkg_rate", 120.0)]
+
+    def test_queued_delete_flushed(self, rate_store):
+        rates._store_rate_override("BELL", rates.RateOverrideIn(unit_rate=10.0))
+        rates._flush_now()
+        assert _rows(rate_store, "SELECT item FROM overrides") == [("BELL",)]
+        rates._remove_rate_override("BELL")
+        rates._flush_now()
+        assert _rows(rate_store, "SELECT item FROM overrides") == []
+
+    def test_legacy_json_imported_and_removed(self, tmp_path, rate_store):
+        (tmp_path / "item_rate_overrides.json").write_text(json.dumps(
+            {"BELL": {"pkg_rate": 120.0, "unit_rate": 12.0, "last_modified": "2024-01-01T00:00:00"}}
+        ))
+        entry = {"item": "BELL", "field": "pkg_rate", "old_value": None,
+                 "new_value": 100.0, "timestamp": "2024-01-01T00:00:00"}
+        (tmp_path / "rate_change_log.json").write_text(json.dumps([entry]))
+        (tmp_path / "rate_change_log.jsonl").write_text(
+            json.dumps({**entry, "old_value": 100.0, "new_value": 120.0}) + "\n"
+        )
+
+        overrides = rates._load_overrides()
+
+        assert overrides["BELL"] == rates._Entry(120.0, 12.0, "2024-01-01T00:00:00")
+        assert _rows(rate_store, "SELECT old_value, new_value FROM changelog ORDER BY id") == [
+            (None, 100.0), (100.0, 120.0),
+        ]
+        for name in ("item_rate_overrides.json", "rate_change_log.json", "rate_change_log.jsonl"):
+            assert not (tmp_path / name).exists()
+
+    def test_write_from_another_connection_seen(self, rate_store):
+        assert rates.get_effective_rate("BELL", 5.0) == 5.0
+
+        other = sqlite3.connect(rate_store)
+        with other:
+            other.execute(
+                "INSERT INTO overrides (item, pkg_rate, unit_rate, last_modified) VALUES (?, ?, ?, ?)",
+                ("BELL", 80.0, 8.0, "2024-01-01T00:00:00"),
+            )
+        other.close()
+
+        # PRAGMA data_version changed, so the cached overrides are re-read
+        assert rates._load_overrides()["BELL"].unit_rate == 8.0
+        assert rates.get_effective_rate("BELL", 5.0) == 8.0
+        assert rates.get_effective_pkg_rate("BELL", 50.0) == 80.0
+
+
+class TestEffectiveRates:
+    def test_saved_override_replaces_cached_rate(self):
+        assert rates.get_effective_rate("BELL", 5.0) == 5.0
+        assert rates.get_effective_pkg_rate("BELL", 50.0) == 50.0
+        assert rates.get_effective_rates([("BELL", 5.0), ("HORN", 3.0)]) == [5.0, 3.0]
+        hits = rates._resolve_unit_rate.cache_info().hits
+        assert rates.get_effective_rate("BELL", 5.0) == 5.0
+        assert rates._resolve_unit_rate.cache_info().hits == hits + 1
+
+        rates._store_rate_override("BELL", rates.RateOverrideIn(pkg_rate=60.0, unit_rate=6.0))
+
+        assert rates.get_effective_rate("BELL", 5.0) == 6.0
+        assert rates.get_effective_pkg_rate("BELL", 50.0) == 60.0
+        assert rates.get_effective_rates([("BELL", 5.0), ("HORN", 3.0)]) == [6.0, 3.0]
+
+    def test_deleted_override_reverts_to_tally_rate(self):
+        rates._store_rate_override("BELL", rates.RateOverrideIn(unit_rate=6.0))
+        assert rates.get_effective_rate("BELL", 5.0) == 6.0
+
+        rates._remove_rate_override("BELL")
+
+        assert rates.get_effective_rate("BELL", 5.0) == 5.0
+        assert rates.get_effective_rates([("BELL", 5.0)]) == [5.0]